@@ -0,0 +1,80 @@
+from pathfinding_algorithms import PathfindingAlgorithms, SearchMetrics, as_events, measure_events
+from distance_cache import DistanceFieldCache
+from incremental_planner import IncrementalPlanner
+from hierarchical_planner import HierarchicalPlanner
+from run_recording import RunRecorder, painted_nodes
+
+
+# Search time is recorded every this many events, the time timeline is interpolated between the checkpoints
+CHECKPOINT_EVENTS = 256
+
+# Algorithms that take a list of end points instead of a single one
+MULTI_TARGET_ALGORITHMS = ['Multi-target Dijkstra']
+
+# Algorithms that can also move to diagonal neighbors, the others only move to orthogonal ones
+DIAGONAL_ALGORITHMS = ['Dijkstra\'s Algorithm', 'Multi-target Dijkstra', 'A* Search', 'Depth-First Search', 'Bidirectional Dijkstra',
+                       'Bidirectional A*']
+
+
+def algorithm_table(pf_algorithms, distance_cache, incremental_planner, hierarchical_planner):
+    # Algorithms shown in the visualizer as event generators, results of the cache and the incremental planner are replayed as events
+    return {'Dijkstra\'s Algorithm': pf_algorithms.dijkstra_events,
+            'Multi-target Dijkstra': pf_algorithms.multi_target_events,
+            'A* Search': pf_algorithms.astar_events,
+            'Depth-First Search': pf_algorithms.dfs_events,
+            'Wavefront BFS': pf_algorithms.wavefront_events,
+            'Jump Point Search': pf_algorithms.jps_events,
+            'Bidirectional Dijkstra': pf_algorithms.bidirectional_dijkstra_events,
+            'Bidirectional A*': pf_algorithms.bidirectional_astar_events,
+            'Cached Dijkstra': as_events(distance_cache.shortest_path),
+            'Incremental LPA*': as_events(incremental_planner.shortest_path),
+            'Hierarchical A*': hierarchical_planner.events}
+
+
+def algorithm_events(algorithms, name, board, start, end_points, metrics=None, diagonal=False):
+    # Events of an algorithm from the table for the end points of the board, errors are raised by the search like its own ones
+    if diagonal and name not in DIAGONAL_ALGORITHMS:
+        raise ValueError(f'{name} moves only to orthogonal neighbors, turn off diagonal moves!')
+    # Only algorithms with diagonal moves take the option
+    options = {'diagonal': True} if diagonal else {}
+
+    if name in MULTI_TARGET_ALGORITHMS:
+        return (yield from algorithms[name](board, start, end_points, metrics, **options))
+    if len(end_points) > 1:
+        raise ValueError(f'{name} searches for a single end point, choose Multi-target Dijkstra!')
+
+    return (yield from algorithms[name](board, start, end_points[0] if end_points else None, metrics, **options))
+
+
+def record_run(name, board, start, end_points, algorithms=None, diagonal=False):
+    # Runs an algorithm from the table to the end, search time is checkpointed every CHECKPOINT_EVENTS events
+    algorithms = algorithms if algorithms is not None else algorithm_table(PathfindingAlgorithms(), DistanceFieldCache(), IncrementalPlanner(),
+                                                                           HierarchicalPlanner())
+    metrics = SearchMetrics()
+    recorder = RunRecorder(name, board, start, end_points)
+    try:
+        events = measure_events(algorithm_events(algorithms, name, board, start, end_points, metrics, diagonal), metrics)
+        for count, (event, data) in enumerate(events, start=1):
+            recorder.add_event(event, data)
+            if count % CHECKPOINT_EVENTS == 0:
+                recorder.add_checkpoint(metrics.wall_time())
+    except (ValueError, RuntimeError) as e:
+        return recorder.finish(metrics, str(e))
+
+    return recorder.finish(metrics)
+
+
+def run_race_entry(name, board, start, end_points, diagonal=False):
+    # Runs in a worker process with its own algorithm instances. Painted nodes are flat board indices with
+    # their visualization values, visited nodes first and then the path, start and end points are left out
+    run = record_run(name, board, start, end_points, diagonal=diagonal)
+    nodes, values, visited_count, painted_counts = painted_nodes(run)
+
+    return {'name': name,
+            'nodes': nodes,
+            'values': values,
+            'visited_count': visited_count,
+            'checkpoint_counts': painted_counts[run['checkpoint_counts']],
+            'checkpoint_times': run['checkpoint_times'],
+            'metrics': run['metrics'],
+            'error': run['error']}
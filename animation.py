@@ -0,0 +1,237 @@
+import time
+import cProfile
+import io
+import pstats
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from PySide6.QtCore import QObject, QThread, QTimer, Signal
+
+
+class SolveWorker(QThread):
+    solved = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        # Set by the GUI when the result isn't wanted anymore, a running algorithm can't be interrupted
+        self.cancelled = False
+
+    def run(self):
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        self.solved.emit(result)
+
+
+class EventWorker(QThread):
+    progress = Signal(object)
+    done = Signal()
+    failed = Signal(str)
+
+    def __init__(self, events, batch_size=512, batch_interval=0.02, profile=False):
+        super().__init__()
+        self.events = events
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        # Checked between events, so a cancelled search stops right away
+        self.cancelled = False
+        # With profile set the search thread runs under cProfile, the report is ready once the worker is done
+        self.profile = profile
+        self.profile_report = None
+
+    def run(self):
+        profiler = cProfile.Profile() if self.profile else None
+        if profiler is not None:
+            profiler.enable()
+
+        finished = self.__run()
+
+        if profiler is not None:
+            profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(20)
+            self.profile_report = report.getvalue()
+
+        if finished:
+            self.done.emit()
+
+    def __run(self):
+        # Events are sent in batches, one signal per event would flood the GUI thread
+        batch = []
+        last_emit = time.perf_counter()
+        try:
+            for event in self.events:
+                if self.cancelled:
+                    self.events.close()
+                    return False
+
+                batch.append(event)
+                if len(batch) >= self.batch_size or time.perf_counter() - last_emit >= self.batch_interval:
+                    self.progress.emit(batch)
+                    batch = []
+                    last_emit = time.perf_counter()
+        except Exception as e:
+            if batch:
+                self.progress.emit(batch)
+            self.failed.emit(str(e))
+            return False
+
+        if batch:
+            self.progress.emit(batch)
+        return True
+
+
+class RaceWorker(QThread):
+    result = Signal(object)
+    failed = Signal(str, str)
+
+    def __init__(self, function, names, *args):
+        super().__init__()
+        self.function = function
+        self.names = names
+        self.args = args
+        # Checked while waiting for the processes, results of a cancelled race are dropped
+        self.cancelled = False
+
+    def run(self):
+        # function(name, *args) runs for every name in its own process. Processes are spawned, forking
+        # the GUI process with its running threads isn't safe
+        context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(max_workers=len(self.names), mp_context=context)
+        futures = {executor.submit(self.function, name, *self.args): name for name in self.names}
+        pending = set(futures)
+        try:
+            while pending and not self.cancelled:
+                finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    try:
+                        self.result.emit(future.result())
+                    except Exception as e:
+                        self.failed.emit(futures[future], str(e))
+        finally:
+            # A cancelled race doesn't wait for the processes, they exit once their algorithm is done
+            executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+
+
+class Animator(QObject):
+    finished = Signal()
+
+    def __init__(self, frame_interval=16):
+        super().__init__()
+        self.timer = QTimer(self)
+        self.timer.setInterval(frame_interval)
+        self.timer.timeout.connect(self.__on_frame)
+
+        # Segments are (SegmentHistory, cells per second), played one after another a whole run of nodes per step
+        self.segments = deque()
+        self.position = 0
+        self.budget = 0.0
+        self.paused = False
+        self.paint_nodes = None
+        # While streaming, segments are appended as they arrive and running out of nodes doesn't finish the animation
+        self.streaming = False
+
+
+    def start(self, segments, paint_nodes, streaming=False):
+        self.timer.stop()
+        self.segments = deque((history, speed) for history, speed in segments if len(history))
+        self.paint_nodes = paint_nodes
+        self.position = 0
+        self.budget = 0.0
+        self.paused = False
+        self.streaming = streaming
+
+        if not self.segments:
+            if not streaming:
+                self.finished.emit()
+            return
+
+        self.last_frame = time.perf_counter()
+        self.timer.start()
+
+
+    def append(self, history, speed):
+        if len(history):
+            self.segments.append((history, speed))
+
+        if self.segments and not self.paused and not self.timer.isActive():
+            self.last_frame = time.perf_counter()
+            self.timer.start()
+
+
+    def end_stream(self):
+        self.streaming = False
+        if not self.segments:
+            self.timer.stop()
+            self.paused = False
+            self.finished.emit()
+
+
+    def is_running(self):
+        return bool(self.segments) or self.streaming
+
+
+    def pause(self):
+        self.paused = True
+        self.timer.stop()
+
+
+    def resume(self):
+        if not self.is_running():
+            return
+
+        self.paused = False
+        if self.segments:
+            self.last_frame = time.perf_counter()
+            self.timer.start()
+
+
+    def step(self):
+        if not self.paused:
+            self.pause()
+        self.__paint(1)
+
+
+    def cancel(self):
+        self.timer.stop()
+        self.segments.clear()
+        self.paused = False
+        self.streaming = False
+
+
+    def __on_frame(self):
+        # Nodes are painted at the speed of the current segment however long the frame took,
+        # a run longer than the budget is painted at once and paid off by the next frames
+        now = time.perf_counter()
+        self.budget += (now - self.last_frame) * self.segments[0][1]
+        self.last_frame = now
+
+        if self.budget > 0:
+            self.budget = self.__paint(self.budget)
+
+
+    def __paint(self, budget):
+        while budget > 0 and self.segments:
+            history, _ = self.segments[0]
+            xs, ys, value = history.nodes(self.position)
+            self.paint_nodes(xs, ys, value)
+
+            budget -= len(xs)
+            self.position += 1
+            if self.position == len(history):
+                self.segments.popleft()
+                self.position = 0
+
+        if not self.segments:
+            self.timer.stop()
+            if not self.streaming:
+                self.paused = False
+                self.finished.emit()
+
+        return budget
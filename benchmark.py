@@ -0,0 +1,156 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from maze_generator import MazeGenerator
+from solver import ALGORITHMS, Solver, parse_board_size
+from run_recording import solver_run, write_run, read_run, runs_match
+
+
+# Board sizes offered in the menu as (rows, cols), the visualizer board has the shape (cols, rows)
+BOARD_SIZES = {'Small': (23, 33), 'Medium': (41, 51), 'Large': (65, 79)}
+
+FIELDS = ['board_class', 'rows', 'cols', 'seed', 'density', 'algorithm',
+          'time', 'expanded', 'pushes', 'stale_pops', 'peak_frontier', 'path_length', 'peak_memory', 'recording', 'error']
+
+
+def parse_size(text):
+    rows, cols = text.lower().split('x')
+    return (int(rows), int(cols))
+
+
+def make_board(rows, cols, seed, density=None):
+    # Without a density the board is a maze, otherwise walls are scattered at random
+    if density is None:
+        board, _ = MazeGenerator((cols, rows)).generate(seed, record_history=False)
+    else:
+        board = (np.random.default_rng(seed).random((cols, rows)) < density).astype(float)
+
+    start, end = (1, 1), (cols - 2, rows - 2)
+    board[start] = 2
+    board[end] = 3
+
+    return board, start, end
+
+
+def make_cases(sizes, seeds, densities):
+    for board_class, (rows, cols) in sizes.items():
+        for seed in seeds:
+            for density in [None] + densities:
+                yield {'board_class': board_class, 'rows': rows, 'cols': cols, 'seed': seed, 'density': density}
+
+
+def recording_path(directory, case, algorithm):
+    density = 'maze' if case['density'] is None else f"{case['density']:g}"
+    return os.path.join(directory, f"{case['board_class']}-{case['seed']}-{density}-{algorithm}.run")
+
+
+def check_recording(board, result, path, record):
+    # Runs are either recorded or compared with their recordings, which catches algorithms that start to visit other nodes
+    run = solver_run(board, result)
+    if record:
+        write_run(path, run)
+        return 'recorded'
+    if not os.path.exists(path):
+        return 'missing'
+
+    return 'match' if runs_match(read_run(path), run) else 'mismatch'
+
+
+def run_case(case, algorithm, repeat, recordings=None, record=False):
+    board, start, end = make_board(case['rows'], case['cols'], case['seed'], case['density'])
+    solver = Solver()
+    row = dict(case, algorithm=algorithm, recording='')
+
+    try:
+        # Timed runs are kept apart from the traced one, tracemalloc slows allocations down a lot
+        timings = []
+        for _ in range(repeat):
+            result = solver.solve(board, algorithm, start, end)
+            timings.append(result['time'])
+
+        tracemalloc.start()
+        solver.solve(board, algorithm, start, end)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        metrics = result['metrics']
+        row.update(time=min(timings), expanded=metrics['expanded'], pushes=metrics['pushes'], stale_pops=metrics['stale_pops'],
+                   peak_frontier=metrics['peak_frontier'], path_length=metrics['path_length'], peak_memory=peak_memory, error='')
+        if recordings is not None:
+            row['recording'] = check_recording(board, result, recording_path(recordings, case, algorithm), record)
+    except (ValueError, RuntimeError) as e:
+        row.update(time=None, expanded=None, pushes=None, stale_pops=None, peak_frontier=None, path_length=None,
+                   peak_memory=None, error=str(e))
+
+    return row
+
+
+def run_benchmark(cases, algorithms, repeat=3, workers=None, recordings=None, record=False):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_case, case, algorithm, repeat, recordings, record) for case in cases for algorithm in algorithms]
+        return [future.result() for future in futures]
+
+
+def write_csv(rows, file):
+    writer = csv.DictWriter(file, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def write_json(rows, file):
+    json.dump(rows, file, indent=2)
+    file.write('\n')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description='Benchmark pathfinding algorithms on generated boards.')
+    parser.add_argument('-a', '--algorithms', nargs='+', default=list(ALGORITHMS), choices=ALGORITHMS.keys())
+    parser.add_argument('-b', '--boards', nargs='+', default=list(BOARD_SIZES), type=parse_board_size,
+                        help=f'board sizes to benchmark, {", ".join(BOARD_SIZES)} or custom ones as "ROWSxCOLS"')
+    parser.add_argument('--sizes', nargs='*', default=[], type=parse_size, help='additional board sizes as "ROWSxCOLS"')
+    parser.add_argument('--seeds', nargs='+', default=[0, 1, 2], type=int)
+    parser.add_argument('--densities', nargs='*', default=[0.2, 0.35], type=float, help='wall densities of random boards')
+    parser.add_argument('-r', '--repeat', default=3, type=int, help='timed runs per case, the fastest one is reported')
+    parser.add_argument('-j', '--workers', default=None, type=int, help='worker processes (all CPUs if omitted)')
+    recordings = parser.add_mutually_exclusive_group()
+    recordings.add_argument('--record', metavar='DIR', help='save a run recording of every case to the directory')
+    recordings.add_argument('--compare', metavar='DIR', help='compare every case with its run recording in the directory')
+    parser.add_argument('-f', '--format', default='csv', choices=['csv', 'json'])
+    parser.add_argument('-o', '--output', help='output file (stdout if omitted)')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    sizes = {name: BOARD_SIZES[name] if name in BOARD_SIZES else parse_size(name) for name in args.boards}
+    sizes.update({f'{rows}x{cols}': (rows, cols) for rows, cols in args.sizes})
+    cases = list(make_cases(sizes, args.seeds, args.densities))
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+
+    start_time = time.perf_counter()
+    rows = run_benchmark(cases, args.algorithms, args.repeat, args.workers, args.record or args.compare, bool(args.record))
+    print(f'{len(rows)} runs in {time.perf_counter() - start_time:.1f}s', file=sys.stderr)
+
+    write = write_json if args.format == 'json' else write_csv
+    if args.output:
+        with open(args.output, 'w', newline='') as file:
+            write(rows, file)
+    else:
+        write(rows, sys.stdout)
+
+    # Compared runs that don't match their recordings fail the benchmark
+    return 1 if any(row['recording'] in ['missing', 'mismatch'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
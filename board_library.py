@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import time
+import numpy as np
+
+
+# Thumbnails keep at most this many nodes along the longer side of the board
+THUMBNAIL_SIZE = 32
+
+ORDERS = {'created': 'created DESC', 'name': 'name', 'density': 'wall_density', 'size': 'cols * rows'}
+
+
+def make_thumbnail(values, size=THUMBNAIL_SIZE):
+    # Every thumbnail node is the node nearest to its center, the shape keeps the aspect ratio of the board
+    cols, rows = values.shape
+    scale = max(cols, rows) / size
+    if scale <= 1:
+        return np.ascontiguousarray(values, dtype=np.uint8)
+
+    xs = ((np.arange(max(round(cols / scale), 1)) + 0.5) * scale).astype(np.intp)
+    ys = ((np.arange(max(round(rows / scale), 1)) + 0.5) * scale).astype(np.intp)
+
+    return np.ascontiguousarray(values[np.ix_(xs, ys)], dtype=np.uint8)
+
+
+class BoardLibrary:
+    # SQLite index of saved boards, so listing doesn't touch the board files
+    def __init__(self, database_path='./saved_boards/library.sqlite'):
+        os.makedirs(os.path.dirname(database_path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(database_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS boards (
+                size TEXT NOT NULL,
+                name TEXT NOT NULL,
+                cols INTEGER NOT NULL,
+                rows INTEGER NOT NULL,
+                wall_density REAL NOT NULL,
+                content_hash TEXT NOT NULL,
+                created REAL NOT NULL,
+                modified REAL NOT NULL,
+                thumbnail_cols INTEGER NOT NULL,
+                thumbnail_rows INTEGER NOT NULL,
+                thumbnail BLOB NOT NULL,
+                PRIMARY KEY (size, name)
+            );
+            CREATE INDEX IF NOT EXISTS boards_content ON boards (content_hash, cols, rows);
+            CREATE INDEX IF NOT EXISTS boards_created ON boards (size, created);
+        ''')
+
+
+    def add_board(self, size, name, values, content_hash, modified, created=None):
+        # A board saved under an existing name replaces it
+        cols, rows = values.shape
+        thumbnail = make_thumbnail(values)
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO boards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (size, name, cols, rows, float(np.count_nonzero(values == 1)) / values.size, content_hash,
+                                     time.time() if created is None else created, modified, *thumbnail.shape, thumbnail.tobytes()))
+
+
+    def remove_board(self, size, name):
+        with self.connection:
+            self.connection.execute('DELETE FROM boards WHERE size = ? AND name = ?', (size, name))
+
+
+    def find_duplicate(self, shape, content_hash):
+        # Name of a saved board with the same walls and terrain, in any size directory
+        row = self.connection.execute('SELECT size, name FROM boards WHERE content_hash = ? AND cols = ? AND rows = ?',
+                                      (content_hash, *shape)).fetchone()
+
+        return None if row is None else (row['size'], row['name'])
+
+
+    def list_boards(self, size=None, name=None, min_density=None, max_density=None, order='created', limit=None, offset=0):
+        # Boards matching every given filter, name matches as a substring
+        conditions, parameters = [], []
+        for condition, value in [('size = ?', size), ('name LIKE ?', None if name is None else f'%{name}%'),
+                                 ('wall_density >= ?', min_density), ('wall_density <= ?', max_density)]:
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        query = 'SELECT size, name, cols, rows, wall_density, content_hash, created FROM boards'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += f' ORDER BY {ORDERS[order]}, name LIMIT ? OFFSET ?'
+        parameters.extend([-1 if limit is None else limit, offset])
+
+        return [dict(row) for row in self.connection.execute(query, parameters)]
+
+
+    def thumbnail(self, size, name):
+        row = self.connection.execute('SELECT thumbnail_cols, thumbnail_rows, thumbnail FROM boards WHERE size = ? AND name = ?',
+                                      (size, name)).fetchone()
+        if row is None:
+            return None
+
+        return np.frombuffer(row['thumbnail'], dtype=np.uint8).reshape(row['thumbnail_cols'], row['thumbnail_rows'])
+
+
+    def modification_times(self, size):
+        return dict(self.connection.execute('SELECT name, modified FROM boards WHERE size = ?', (size,)).fetchall())
+
+
+    def close(self):
+        self.connection.close()
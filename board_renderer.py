@@ -0,0 +1,180 @@
+import math
+import time
+import numpy as np
+from PySide6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+from PySide6.QtCore import Qt, QRectF, QLineF
+from PySide6.QtGui import QImage, QColor, QPen, QPixmap
+
+
+# Node values in the order they win when several nodes are shown as one pixel of a coarser level,
+# visualization stays visible over walls when zoomed out
+DETAIL_PRIORITY = [0, 6, 7, 1, 4, 8, 5, 2, 3]
+
+# Coarser levels are kept until the board fits in this many pixels along its longer side
+MIN_LEVEL_SIZE = 256
+
+# Grid lines are drawn only when a cell takes at least this many pixels on the screen
+MIN_GRID_CELL_SIZE = 4
+
+
+def thumbnail_pixmap(values, lut, size):
+    # Board values of shape (cols, rows) drawn with the colors of a BoardItem lookup table
+    pixels = np.ascontiguousarray(lut[values.T.astype(np.intp)])
+    image = QImage(pixels.data, values.shape[0], values.shape[1], values.shape[0] * 4, QImage.Format_ARGB32)
+
+    return QPixmap.fromImage(image.scaled(size, size, Qt.KeepAspectRatio))
+
+
+class BoardItem(QGraphicsItem):
+    # Whole board drawn as one item with a cell per scene unit, every node is a single ARGB pixel
+    # scaled up by the view, only the part of the board in the exposed area is painted
+    def __init__(self, shape, node_colors):
+        super().__init__()
+        self.cols, self.rows = shape
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+        # Color lookup table indexed by node value, and by detail rank for the coarser levels
+        self.lut = np.zeros(max(node_colors) + 1, dtype=np.uint32)
+        for value, color in node_colors.items():
+            self.lut[value] = QColor(color).rgba()
+        self.rank = np.zeros(len(self.lut), dtype=np.uint8)
+        self.rank[DETAIL_PRIORITY] = np.arange(len(DETAIL_PRIORITY))
+        self.rank_lut = self.lut[DETAIL_PRIORITY]
+
+        self.pixels = np.zeros((self.rows, self.cols), dtype=np.uint32)
+        self.image = QImage(self.pixels.data, self.cols, self.rows, self.cols * 4, QImage.Format_ARGB32)
+        self.grid_pen = QPen(Qt.black, 0)
+
+        # Level k shows blocks of 2^k x 2^k nodes, every block takes the node with the highest detail rank
+        self.levels = [(self.pixels, self.image, np.zeros((self.rows, self.cols), dtype=np.uint8))]
+        rows, cols = self.rows, self.cols
+        while max(rows, cols) > MIN_LEVEL_SIZE:
+            rows, cols = (rows + 1) // 2, (cols + 1) // 2
+            pixels = np.zeros((rows, cols), dtype=np.uint32)
+            image = QImage(pixels.data, cols, rows, cols * 4, QImage.Format_ARGB32)
+            self.levels.append((pixels, image, np.zeros((rows, cols), dtype=np.uint8)))
+        self.painted_level = 0
+        # Time spent on updating nodes and on painting the board, reset by the view before every visualization
+        self.reset_timings()
+
+
+    def render(self, board, visualization_nodes):
+        # Visualization is shown on top of empty and terrain nodes, walls, start and end points stay visible
+        values = board.astype(np.intp)
+        visualization_nodes = visualization_nodes.astype(np.intp)
+        shown = (visualization_nodes != 0) & ((values == 0) | (values > 5))
+        values[shown] = visualization_nodes[shown]
+
+        # Board is indexed as [x, y] while image rows go along y
+        values = values.T
+        self.pixels[:] = self.lut[values]
+
+        ranks = self.rank[values]
+        self.levels[0][2][:] = ranks
+        for pixels, _, level_ranks in self.levels[1:]:
+            # Odd sizes are padded with empty nodes, which never win over anything else
+            padded = np.zeros((level_ranks.shape[0] * 2, level_ranks.shape[1] * 2), dtype=np.uint8)
+            padded[:ranks.shape[0], :ranks.shape[1]] = ranks
+            ranks = padded.reshape(level_ranks.shape[0], 2, level_ranks.shape[1], 2).max(axis=(1, 3))
+            level_ranks[:] = ranks
+            pixels[:] = self.rank_lut[ranks]
+
+        self.update()
+
+
+    def set_node(self, x, y, value):
+        start_time = time.perf_counter()
+        self.pixels[y, x] = self.lut[int(value)]
+        # Only the block of the level shown last needs to be repainted
+        size = 1 << self.painted_level
+        dirty = QRectF(x // size * size, y // size * size, size, size)
+
+        # Blocks containing the node are recomputed from the 2 x 2 blocks one level finer
+        self.levels[0][2][y, x] = self.rank[int(value)]
+        for level in range(1, len(self.levels)):
+            x, y = x // 2, y // 2
+            rank = self.levels[level - 1][2][2 * y:2 * y + 2, 2 * x:2 * x + 2].max()
+
+            pixels, _, level_ranks = self.levels[level]
+            level_ranks[y, x] = rank
+            pixels[y, x] = self.rank_lut[rank]
+
+        self.update(dirty)
+        self.update_time += time.perf_counter() - start_time
+
+
+    def set_nodes(self, xs, ys, value):
+        # Nodes given as arrays of coordinates, e.g. a run of a SegmentHistory, are set with one assignment per level
+        if len(xs) == 1:
+            return self.set_node(int(xs[0]), int(ys[0]), value)
+
+        start_time = time.perf_counter()
+        self.pixels[ys, xs] = self.lut[int(value)]
+        size = 1 << self.painted_level
+        dirty = QRectF(xs.min() // size * size, ys.min() // size * size,
+                       (xs.max() // size + 1) * size - xs.min() // size * size, (ys.max() // size + 1) * size - ys.min() // size * size)
+
+        self.levels[0][2][ys, xs] = self.rank[int(value)]
+        for level in range(1, len(self.levels)):
+            xs, ys = xs // 2, ys // 2
+            # Children past the edge of an odd sized level are replaced by the last ones, which doesn't change the maximum
+            finer_ranks = self.levels[level - 1][2]
+            left, top = 2 * xs, 2 * ys
+            right, bottom = np.minimum(left + 1, finer_ranks.shape[1] - 1), np.minimum(top + 1, finer_ranks.shape[0] - 1)
+            rank = np.maximum(np.maximum(finer_ranks[top, left], finer_ranks[top, right]),
+                              np.maximum(finer_ranks[bottom, left], finer_ranks[bottom, right]))
+
+            pixels, _, level_ranks = self.levels[level]
+            level_ranks[ys, xs] = rank
+            pixels[ys, xs] = self.rank_lut[rank]
+
+        self.update(dirty)
+        self.update_time += time.perf_counter() - start_time
+
+
+    def reset_timings(self):
+        self.update_time = 0.0
+        self.paint_time = 0.0
+        self.paint_count = 0
+
+
+    def boundingRect(self):
+        return QRectF(0, 0, self.cols, self.rows)
+
+
+    def paint(self, painter, option, widget=None):
+        start_time = time.perf_counter()
+        self.__paint_board(painter, option)
+        self.paint_time += time.perf_counter() - start_time
+        self.paint_count += 1
+
+
+    def __paint_board(self, painter, option):
+        # Pick the level with about one image pixel per screen pixel, so the cost depends on the viewport only
+        cell_size = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        level = min(max(int(math.floor(-math.log2(cell_size))), 0), len(self.levels) - 1)
+        pixels, image, _ = self.levels[level]
+        scale = 1 << level
+        self.painted_level = level
+
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        left = max(int(exposed.left() // scale), 0)
+        top = max(int(exposed.top() // scale), 0)
+        right = min(int(math.ceil(exposed.right() / scale)), pixels.shape[1])
+        bottom = min(int(math.ceil(exposed.bottom() / scale)), pixels.shape[0])
+        if left >= right or top >= bottom:
+            return
+
+        # The last blocks of a coarser level may reach past the board
+        width = min(right * scale, self.cols) - left * scale
+        height = min(bottom * scale, self.rows) - top * scale
+        target = QRectF(left * scale, top * scale, width, height)
+        painter.drawImage(target, image, QRectF(left, top, width / scale, height / scale))
+
+        if cell_size < MIN_GRID_CELL_SIZE:
+            return
+
+        painter.setPen(self.grid_pen)
+        lines = [QLineF(x, target.top(), x, target.bottom()) for x in range(left, right + 1)]
+        lines.extend(QLineF(target.left(), y, target.right(), y) for y in range(top, bottom + 1))
+        painter.drawLines(lines)
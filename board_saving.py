@@ -1,11 +1,106 @@
 import os
+import struct
+import hashlib
 import numpy as np
 import json
+from board_library import BoardLibrary
+
+
+# Binary boards are a fixed size header followed by the board as uint8 values in C order (shape (cols, rows)).
+# Header: magic, version, header size, cols, rows, start x, y, end x, y (-1 when not set), blake2b hash of the values
+BOARD_MAGIC = b'PFVB'
+BOARD_VERSION = 1
+BOARD_HEADER = struct.Struct('<4sHHII4i16s')
+BOARD_HEADER_SIZE = 64
+
+
+def board_content_hash(values):
+    return hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+
+
+def board_values(board):
+    # Start and end points are kept apart from the board, the values hold walls and terrain only
+    return np.where((board == 2) | (board == 3), 0, board).astype(np.uint8)
+
+
+def write_binary_board(path, board, start=None, end=None):
+    values = board_values(board)
+    write_board_values(path, values, board_content_hash(values), start, end)
+
+
+def write_board_values(path, values, content_hash, start=None, end=None):
+    write_board_lines(path, values.shape, [values], start, end, content_hash)
+
+
+def write_board_lines(path, shape, lines, start=None, end=None, content_hash=None):
+    # Lines are consecutive blocks of values (board[x, :] for a single x or more), only one of them has to be in memory.
+    # The hash is computed on the way unless it is given, the header is written last
+    digest = hashlib.blake2b(digest_size=16)
+    size = 0
+
+    # Written next to the target and renamed, boards mapped from the old file keep their data
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(bytes(BOARD_HEADER_SIZE))
+        for line in lines:
+            data = np.ascontiguousarray(line, dtype=np.uint8).tobytes()
+            if content_hash is None:
+                digest.update(data)
+            file.write(data)
+            size += len(data)
+
+        if size != shape[0] * shape[1]:
+            raise ValueError(f'Board lines don\'t match the board shape {shape}!')
+
+        points = [*(start or (-1, -1)), *(end or (-1, -1))]
+        file.seek(0)
+        file.write(BOARD_HEADER.pack(BOARD_MAGIC, BOARD_VERSION, BOARD_HEADER_SIZE, *shape, *points, content_hash or digest.digest()))
+    os.replace(temp_path, path)
+
+
+def read_board_header(path):
+    with open(path, 'rb') as file:
+        data = file.read(BOARD_HEADER.size)
+
+    if len(data) < BOARD_HEADER.size:
+        raise ValueError(f'{path} is not a board file!')
+    magic, version, header_size, cols, rows, start_x, start_y, end_x, end_y, content_hash = BOARD_HEADER.unpack(data)
+    if magic != BOARD_MAGIC:
+        raise ValueError(f'{path} is not a board file!')
+    if version > BOARD_VERSION:
+        raise ValueError(f'{path} was saved by a newer version (format {version})!')
+
+    return {'version': version,
+            'header_size': header_size,
+            'shape': (cols, rows),
+            'start': (start_x, start_y) if start_x >= 0 else None,
+            'end': (end_x, end_y) if end_x >= 0 else None,
+            'hash': content_hash.hex()}
+
+
+def read_binary_board(path, verify=False):
+    # The values are memory mapped copy-on-write, edits of the board never reach the file
+    header = read_board_header(path)
+    board = np.memmap(path, dtype=np.uint8, mode='c', offset=header['header_size'], shape=header['shape'])
+
+    if verify and board_content_hash(board).hex() != header['hash']:
+        raise ValueError(f'{path} is corrupted!')
+
+    return board, header
+
 
 class BoardSaver:
-    def __init__(self, board_size):
-        self.boards_path = f'./saved_boards/{board_size.lower()}'
-        self.__make_boards_path_dirs()
+    def __init__(self, board_size, library=None, index=True):
+        self.board_size = board_size.lower()
+        self.boards_path = f'./saved_boards/{self.board_size}'
+
+        # Without the index boards are only read, nothing is written until a board is saved and names are listed
+        # from the directory. Listing by metadata and thumbnails need the index
+        self.library = None
+        if index:
+            self.__make_boards_path_dirs()
+            self.library = library or BoardLibrary()
+            self.__sync_library()
 
 
     def __make_boards_path_dirs(self):
@@ -13,29 +108,112 @@ class BoardSaver:
             os.makedirs(self.boards_path)
 
 
-    def get_boards_names(self):
-        boards_names = []
+    def __board_files(self):
+        # Paths of the saved boards by name, boards saved in both formats are read from the binary file
+        board_files = {}
+        if not os.path.isdir(self.boards_path):
+            return board_files
 
         for filename in os.listdir(self.boards_path):
-            board_name = os.path.splitext(filename)[0]
-            boards_names.append(board_name)
+            board_name, extension = os.path.splitext(filename)
+            if extension == '.board' or (extension == '.json' and board_name not in board_files):
+                board_files[board_name] = os.path.join(self.boards_path, filename)
 
-        return boards_names
-    
+        return board_files
 
-    def save_board(self, name, board):
-        board_path = os.path.join(self.boards_path, name + '.json')
 
-        board[board > 1] = 0
+    def __sync_library(self):
+        # Boards added, changed or removed outside the app are indexed once here, listing only queries the library
+        board_files = self.__board_files()
+        indexed = self.library.modification_times(self.board_size)
+        for name, path in board_files.items():
+            modified = os.path.getmtime(path)
+            if indexed.get(name) == modified:
+                continue
 
-        with open(board_path, 'w') as file:
-            json.dump(board.tolist(), file)
+            # Files that can't be read aren't indexed, loading them reports the error
+            try:
+                if path.endswith('.board'):
+                    values, header = read_binary_board(path)
+                    content_hash = header['hash']
+                else:
+                    values = board_values(self.import_json(path))
+                    content_hash = board_content_hash(values).hex()
+            except (OSError, ValueError):
+                continue
+            self.library.add_board(self.board_size, name, values, content_hash, modified, created=modified)
+
+        for name in indexed.keys() - board_files.keys():
+            self.library.remove_board(self.board_size, name)
+
+
+    def get_boards_names(self):
+        if self.library is None:
+            return sorted(self.__board_files())
+
+        return [board['name'] for board in self.list_boards(order='name')]
+
+
+    def list_boards(self, **filters):
+        # Filters and pagination of BoardLibrary.list_boards, limited to boards of this size
+        return self.library.list_boards(self.board_size, **filters)
+
+
+    def thumbnail(self, name):
+        return self.library.thumbnail(self.board_size, name)
+
+
+    def save_board(self, name, board, start=None, end=None):
+        values = board_values(board)
+        content_hash = board_content_hash(values)
+
+        # The same walls and terrain are saved only once, saving over the same board is allowed
+        if self.library is not None:
+            duplicate = self.library.find_duplicate(values.shape, content_hash.hex())
+            if duplicate is not None and duplicate != (self.board_size, name):
+                raise ValueError(f'This board is already saved as "{duplicate[1]}"!')
+
+        self.__make_boards_path_dirs()
+        board_path = os.path.join(self.boards_path, name + '.board')
+        write_board_values(board_path, values, content_hash, start, end)
+        if self.library is not None:
+            self.library.add_board(self.board_size, name, values, content_hash.hex(), os.path.getmtime(board_path))
 
 
     def load_board(self, name):
-        board_path = os.path.join(self.boards_path, name + '.json')
+        board, _, _ = self.load_board_with_points(name)
+        return board
+
+
+    def load_board_with_points(self, name):
+        # Binary boards are preferred, JSON ones are read for compatibility and have no start or end points
+        board_path = os.path.join(self.boards_path, name + '.board')
+        if os.path.exists(board_path):
+            board, header = read_binary_board(board_path)
+            start, end = header['start'], header['end']
+        else:
+            board = self.import_json(os.path.join(self.boards_path, name + '.json'))
+            start, end = None, None
+
+        # Start and end points saved with the board are put back on it
+        for point, value in [(start, 2), (end, 3)]:
+            if point is not None:
+                board[point] = value
+
+        return board, start, end
+
+
+    def export_json(self, name, path):
+        # Start and end points aren't exported, terrain is
+        board = self.load_board(name)
+        board = np.where((board == 2) | (board == 3), 0, board)
+
+        with open(path, 'w') as file:
+            json.dump(board.tolist(), file)
+
 
-        with open(board_path, 'r') as file:
+    def import_json(self, path):
+        with open(path, 'r') as file:
             board = json.load(file)
 
-        return np.array(board)
\ No newline at end of file
+        return np.array(board)
@@ -0,0 +1,172 @@
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+import numpy as np
+from pathfinding_algorithms import SearchGrid, UNREACHED, dial_search, node_costs
+
+
+def board_hash(costs):
+    # Only node costs matter for distances, so moving start or end points keeps the hash
+    digest = hashlib.blake2b(np.array(costs.shape, dtype=np.int64).tobytes(), digest_size=16)
+    digest.update(costs.tobytes())
+
+    return digest.hexdigest()
+
+
+class DistanceField:
+    def __init__(self, board, start):
+        self.grid = SearchGrid(board)
+        self.start_index = self.grid.index(start)
+        self.expanded, self.distance, self.predecessors = dial_search(self.grid, self.start_index)
+
+        # Position of every node in the expansion order and the number of nodes it is the predecessor of
+        self.expansion_position = array('i', [-1]) * self.grid.size
+        for position, index in enumerate(self.expanded):
+            self.expansion_position[index] = position
+        predecessors = np.frombuffer(self.predecessors, dtype=np.int32)
+        self.children = array('i', np.bincount(predecessors[predecessors >= 0], minlength=self.grid.size).tolist())
+
+        self.costs = bytearray(self.grid.costs)
+
+    def expanded_before(self, end):
+        # Nodes Dijkstra would expand before reaching the end node
+        position = self.expansion_position[self.grid.index(end)]
+        expanded = self.expanded if position == -1 else self.expanded[:position]
+
+        return [self.grid.node(index) for index in expanded]
+
+    def path_to(self, end):
+        end_index = self.grid.index(end)
+        if self.distance[end_index] == UNREACHED:
+            raise RuntimeError('No path found!')
+
+        return self.grid.reconstruct_path(self.predecessors, end_index)
+
+    def update_node(self, node, cost):
+        # Returns False when the change can affect distances of other nodes and the field has to be rebuilt
+        index = self.grid.index(node)
+        old_cost = self.costs[index]
+        if cost == old_cost:
+            return True
+        if index == self.start_index or self.children[index]:
+            return False
+
+        self.costs[index] = cost
+        distance, predecessors, children = self.distance, self.predecessors, self.children
+
+        # The node is a leaf of the shortest path tree, only its own distance changes
+        if predecessors[index] != -1:
+            children[predecessors[index]] -= 1
+        distance[index], predecessors[index] = UNREACHED, -1
+
+        if not cost:
+            return True
+
+        neighbors = [index + offset for offset in self.grid.offsets]
+        for neighbor in neighbors:
+            if distance[neighbor] != UNREACHED and distance[neighbor] + cost < distance[index]:
+                distance[index], predecessors[index] = distance[neighbor] + cost, neighbor
+        if predecessors[index] == -1:
+            return True
+        children[predecessors[index]] += 1
+
+        # A cheaper or new node must not shorten the path to any of its neighbors
+        return all(not self.costs[neighbor] or distance[index] + self.costs[neighbor] >= distance[neighbor] for neighbor in neighbors)
+
+
+class DistanceFieldCache:
+    def __init__(self, max_size=16):
+        self.max_size = max_size
+        self.fields = OrderedDict()
+        # Costs of the board of the last query, kept up to date by update_node. Fields of an edited board are keyed
+        # by the number of edits instead of its hash, the next query hashes the board once and takes them over
+        self.costs = None
+        self.key = None
+        self.edits = 0
+        # Queries run on the solving thread while drawing updates the fields on the GUI thread
+        self.lock = threading.Lock()
+
+    def shortest_path(self, board, start, end):
+        if start is None or end is None:
+            raise ValueError("Start or end point not found!")
+
+        costs = node_costs(board)
+        start = tuple(int(i) for i in start)
+        with self.lock:
+            key = (self.__board_key(costs), start)
+            field = self.fields.get(key)
+            if field is not None:
+                # Cached queries expand nothing, the path is read from the predecessor pointers
+                self.fields.move_to_end(key)
+                return [], field.path_to(end)
+
+        # The search runs outside of the lock, so drawing doesn't wait for it. The field is keyed by the hash of the
+        # queried board, edits made in the meantime don't change it
+        field = DistanceField(board, start)
+        with self.lock:
+            self.fields[key] = field
+            if len(self.fields) > self.max_size:
+                self.fields.popitem(last=False)
+
+            return field.expanded_before(end), field.path_to(end)
+
+    def update_node(self, board, node, old_value):
+        # Called after a single node of the board has changed, fields of the board before the change that stay valid
+        # are moved to the board after it. The board isn't hashed, drawing calls this for every painted node
+        with self.lock:
+            self.__update_node(board, node, old_value)
+
+    def __update_node(self, board, node, old_value):
+        if not self.fields:
+            return
+
+        new_cost, old_cost = (int(cost) for cost in node_costs(np.array([board[node], old_value])))
+        if new_cost == old_cost:
+            return
+        if self.costs is None or self.costs.shape != board.shape or self.costs[node] != old_cost:
+            # The board was replaced since the last query, its fields can't be followed anymore
+            self.__drop_edited(None)
+            return
+
+        self.costs[node] = new_cost
+        self.edits += 1
+        fields = OrderedDict()
+        for (key, start), field in self.fields.items():
+            if key != self.key:
+                fields[(key, start)] = field
+            elif field.update_node(node, new_cost):
+                fields[(self.edits, start)] = field
+        self.fields = fields
+        self.key = self.edits
+
+    def __board_key(self, costs):
+        same_board = self.costs is not None and self.costs.shape == costs.shape and np.array_equal(self.costs, costs)
+        if same_board and isinstance(self.key, str):
+            # Nothing was edited since the last query, its hash still holds
+            return self.key
+
+        key = board_hash(costs)
+        if self.key != key:
+            # Fields of the edited board belong to this one if the edits are all that changed since the last query
+            self.__drop_edited(key if same_board else None)
+        self.costs, self.key = costs, key
+
+        return key
+
+    def __drop_edited(self, key):
+        # Fields keyed by an edit count are moved to the board hash, or dropped without one
+        if isinstance(self.key, int):
+            fields = OrderedDict()
+            for (field_key, start), field in self.fields.items():
+                if field_key != self.key:
+                    fields[(field_key, start)] = field
+                elif key is not None:
+                    fields[(key, start)] = field
+            self.fields = fields
+        self.costs, self.key = None, None
+
+    def clear(self):
+        with self.lock:
+            self.fields.clear()
+            self.costs, self.key = None, None
@@ -0,0 +1,287 @@
+import heapq
+from collections import OrderedDict
+import numpy as np
+from pathfinding_algorithms import SearchGrid, SearchMetrics, UNREACHED, EXPAND, PUSH, collect_events, dial_search, node_costs, path_events
+from distance_cache import board_hash
+
+
+# Openings between two clusters at least this long get a transition at both ends instead of one in the middle
+LONG_ENTRANCE = 6
+
+# Cost of entering a wall when the distances of a cluster are relaxed, far above any distance inside a cluster
+CLUSTER_WALL_COST = 1 << 28
+
+
+class ClusterGraph:
+    # Board split into square clusters, neighboring nodes on both sides of a cluster border are the abstract nodes.
+    # Distances between the abstract nodes of a cluster are computed the first time a search reaches it
+    def __init__(self, costs, cluster_size):
+        self.costs = costs
+        self.cluster_size = cluster_size
+        self.cluster_counts = (-(-costs.shape[0] // cluster_size), -(-costs.shape[1] // cluster_size))
+
+        # Transitions of every border as (node, node of the other cluster) pairs, borders are keyed by the pair of clusters
+        self.borders = {}
+        # Abstract node: {abstract node of the same cluster: distance}, filled cluster by cluster
+        self.edges = {}
+        # Search grids of the clusters searched so far, rebuilt when their nodes change
+        self.grids = {}
+        self.nodes = {}
+        self.partners = {}
+        for cx in range(self.cluster_counts[0]):
+            for cy in range(self.cluster_counts[1]):
+                if cx + 1 < self.cluster_counts[0]:
+                    self.__build_border((cx, cy), (cx + 1, cy))
+                if cy + 1 < self.cluster_counts[1]:
+                    self.__build_border((cx, cy), (cx, cy + 1))
+        self.__index_transitions()
+
+    def cluster(self, node):
+        return (node[0] // self.cluster_size, node[1] // self.cluster_size)
+
+    def intra_edges(self, node):
+        # Distances from an abstract node to the other abstract nodes of its cluster
+        if node not in self.edges:
+            self.__build_edges(self.cluster(node))
+
+        return self.edges[node]
+
+    def distances(self, source, targets):
+        # Distances from a node to the targets in its cluster, moving only inside the cluster
+        targets = [target for target in targets if self.cluster(target) == self.cluster(source)]
+        if not targets:
+            return {}
+
+        grid, distance, _ = self.local_search(source, targets)
+        distances = {target: distance[self.__grid_index(grid, target)] for target in targets}
+
+        return {target: dist for target, dist in distances.items() if dist != UNREACHED}
+
+    def local_search(self, source, targets):
+        # Dial's algorithm on the grid of the cluster of the source node, it stops once all of the targets are reached.
+        # Returns the grid with distances and predecessors by its padded indices
+        grid = self.__grid(self.cluster(source))
+        _, distance, predecessors = dial_search(grid, self.__grid_index(grid, source),
+                                                targets=[self.__grid_index(grid, target) for target in targets])
+
+        return grid, distance, predecessors
+
+    def local_path(self, source, target):
+        grid, _, predecessors = self.local_search(source, [target])
+        x0, y0, _, _ = self.__bounds(self.cluster(source))
+        path = grid.reconstruct_path(predecessors, self.__grid_index(grid, target))
+
+        return [(x + x0, y + y0) for x, y in (divmod(index, grid.cols) for index in path)]
+
+    def update(self, costs):
+        # Only clusters with changed nodes get their borders rebuilt, and only clusters whose transitions
+        # changed lose their distances
+        changed = {self.cluster(node) for node in map(tuple, np.argwhere(costs != self.costs).tolist())}
+        self.costs = costs
+
+        dirty = set(changed)
+        for cx, cy in changed:
+            for first, second in [((cx - 1, cy), (cx, cy)), ((cx, cy), (cx + 1, cy)), ((cx, cy - 1), (cx, cy)), ((cx, cy), (cx, cy + 1))]:
+                if min(first) < 0 or second[0] >= self.cluster_counts[0] or second[1] >= self.cluster_counts[1]:
+                    continue
+                old_transitions = self.borders.get((first, second))
+                self.__build_border(first, second)
+                if self.borders.get((first, second)) != old_transitions:
+                    dirty.update([first, second])
+
+        for cluster in dirty:
+            for node in self.nodes.get(cluster, []):
+                self.edges.pop(node, None)
+        for cluster in changed:
+            self.grids.pop(cluster, None)
+        self.__index_transitions()
+
+    def __bounds(self, cluster):
+        x0, y0 = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return x0, y0, min(x0 + self.cluster_size, self.costs.shape[0]), min(y0 + self.cluster_size, self.costs.shape[1])
+
+    def __grid(self, cluster):
+        if cluster not in self.grids:
+            x0, y0, x1, y1 = self.__bounds(cluster)
+            self.grids[cluster] = SearchGrid(None, costs=self.costs[x0:x1, y0:y1])
+
+        return self.grids[cluster]
+
+    def __grid_index(self, grid, node):
+        # Index of a board node in the grid of its cluster
+        return grid.index((node[0] % self.cluster_size, node[1] % self.cluster_size))
+
+    def __build_border(self, first, second):
+        # Openings along the border are runs of nodes passable on both sides
+        x0, y0, x1, y1 = self.__bounds(first)
+        if second[0] > first[0]:
+            inside, outside = self.costs[x1 - 1, y0:y1], self.costs[x1, y0:y1]
+            to_nodes = lambda i: ((x1 - 1, y0 + i), (x1, y0 + i))
+        else:
+            inside, outside = self.costs[x0:x1, y1 - 1], self.costs[x0:x1, y1]
+            to_nodes = lambda i: ((x0 + i, y1 - 1), (x0 + i, y1))
+
+        open_nodes = np.concatenate([[False], (inside > 0) & (outside > 0), [False]])
+        edges = np.flatnonzero(open_nodes[1:] != open_nodes[:-1])
+        transitions = []
+        for run_start, run_end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            if run_end - run_start >= LONG_ENTRANCE:
+                transitions.extend([to_nodes(run_start), to_nodes(run_end - 1)])
+            else:
+                transitions.append(to_nodes((run_start + run_end - 1) // 2))
+
+        if transitions:
+            self.borders[(first, second)] = transitions
+        else:
+            self.borders.pop((first, second), None)
+
+    def __index_transitions(self):
+        # Abstract nodes of every cluster and the nodes across the borders they lead to
+        self.nodes, self.partners = {}, {}
+        for transitions in self.borders.values():
+            for first, second in transitions:
+                for node, partner in [(first, second), (second, first)]:
+                    self.partners.setdefault(node, []).append(partner)
+                    self.nodes.setdefault(self.cluster(node), set()).add(node)
+
+    def __build_edges(self, cluster):
+        # A single search from all abstract nodes of the cluster at once, with a row of distances per node. Every round
+        # relaxes all rows by one move in every direction, until a round changes nothing. Walls and the padding
+        # of the grid cost far more than any path, so nothing moves through them
+        nodes = sorted(self.nodes.get(cluster, set()))
+        grid = self.__grid(cluster)
+        enter = np.frombuffer(grid.costs, dtype=np.uint8).astype(np.int32)
+        enter[enter == 0] = CLUSTER_WALL_COST
+
+        indices = [self.__grid_index(grid, node) for node in nodes]
+        distance = np.full((len(nodes), grid.size), CLUSTER_WALL_COST, dtype=np.int32)
+        distance[np.arange(len(nodes)), indices] = 0
+
+        # Updates within a round are made in place, so distances move further than a node per round. Distances only
+        # ever drop, a round that changes nothing leaves their sum the same
+        last_total = None
+        while True:
+            for offset in grid.offsets:
+                if offset > 0:
+                    np.minimum(distance[:, offset:], distance[:, :-offset] + enter[offset:], out=distance[:, offset:])
+                else:
+                    np.minimum(distance[:, :offset], distance[:, -offset:] + enter[:offset], out=distance[:, :offset])
+            total = int(distance.sum(dtype=np.int64))
+            if total == last_total:
+                break
+            last_total = total
+
+        reached = distance[:, indices] < CLUSTER_WALL_COST
+        for i, node in enumerate(nodes):
+            self.edges[node] = {target: int(distance[i, index]) for target, index, found in zip(nodes, indices, reached[i])
+                                if found and target != node}
+
+
+class HierarchicalPlanner:
+    # Hierarchical A* (HPA*). Searches the graph of cluster transitions first and then refines the chosen abstract path
+    # cluster by cluster. Paths aren't always the shortest ones, they stay close to them. Cluster graphs are cached
+    # per board hash, a board that differs from the last one in a few nodes reuses its graph
+    def __init__(self, cluster_size=16, max_size=8):
+        self.cluster_size = cluster_size
+        self.max_size = max_size
+        self.graphs = OrderedDict()
+
+    def shortest_path(self, board, start, end, metrics=None):
+        return collect_events(self.events(board, start, end, metrics), metrics)
+
+    def events(self, board, start, end, metrics=None):
+        if start is None or end is None:
+            raise ValueError("Start or end point not found!")
+
+        metrics = metrics if metrics is not None else SearchMetrics()
+        costs = node_costs(board)
+        graph = self.graph(costs)
+        start, end = tuple(int(i) for i in start), tuple(int(i) for i in end)
+        rows = costs.shape[1]
+
+        # Start and end points join the abstract graph through their clusters, the distance to the end point
+        # is taken from the search from it backwards, which pays for leaving nodes instead of entering them
+        metrics.begin_phase('search')
+        start_edges = graph.distances(start, graph.nodes.get(graph.cluster(start), set()) | {end})
+        end_edges = {node: dist - int(costs[node]) + int(costs[end])
+                     for node, dist in graph.distances(end, graph.nodes.get(graph.cluster(end), set())).items()}
+
+        distance = {start: 0}
+        predecessors = {start: None}
+        closed = set()
+        priority_queue = [(0, start)]
+        while priority_queue:
+            if len(priority_queue) > metrics.peak_frontier:
+                metrics.peak_frontier = len(priority_queue)
+            _, node = heapq.heappop(priority_queue)
+            metrics.pops += 1
+
+            if node in closed:
+                metrics.stale_pops += 1
+                continue
+            if node == end:
+                break
+
+            closed.add(node)
+            yield EXPAND, node
+
+            neighbors = list((start_edges if node == start else graph.intra_edges(node)).items())
+            neighbors.extend((partner, int(costs[partner])) for partner in graph.partners.get(node, []))
+            if node in end_edges:
+                neighbors.append((end, end_edges[node]))
+
+            for neighbor, cost in neighbors:
+                tentative_dist = distance[node] + cost
+                if neighbor in closed or tentative_dist >= distance.get(neighbor, tentative_dist + 1):
+                    continue
+
+                distance[neighbor] = tentative_dist
+                predecessors[neighbor] = node
+                # Manhattan distance stays admissible, no node costs less than 1 to enter
+                priority = tentative_dist + abs(neighbor[0] - end[0]) + abs(neighbor[1] - end[1])
+                heapq.heappush(priority_queue, (priority, neighbor))
+                yield PUSH, neighbor
+
+        if end not in distance:
+            raise RuntimeError('No path found!')
+
+        # Transitions across a border are single steps, moves inside a cluster are searched again within it
+        metrics.begin_phase('path')
+        abstract_path = [end]
+        while predecessors[abstract_path[-1]] is not None:
+            abstract_path.append(predecessors[abstract_path[-1]])
+        abstract_path.reverse()
+
+        path = [start]
+        for node in abstract_path[1:]:
+            if graph.cluster(node) == graph.cluster(path[-1]):
+                path.extend(graph.local_path(path[-1], node)[1:])
+            else:
+                path.append(node)
+
+        yield from path_events(x * rows + y for x, y in path)
+
+    def graph(self, costs):
+        key = board_hash(costs)
+        graph = self.graphs.get(key)
+        if graph is not None:
+            self.graphs.move_to_end(key)
+            return graph
+
+        # The newest graph of a board of the same size is updated where the boards differ
+        for old_key in reversed(self.graphs):
+            if self.graphs[old_key].costs.shape == costs.shape:
+                graph = self.graphs.pop(old_key)
+                graph.update(costs)
+                break
+        else:
+            graph = ClusterGraph(costs, self.cluster_size)
+
+        self.graphs[key] = graph
+        if len(self.graphs) > self.max_size:
+            self.graphs.popitem(last=False)
+
+        return graph
+
+    def clear(self):
+        self.graphs.clear()
@@ -0,0 +1,65 @@
+from array import array
+import numpy as np
+
+
+class SegmentHistory:
+    # Painted nodes stored as runs of flat board indices, every run paints length nodes from start,
+    # stride apart in the flattened board, with a single value. Walls, lines of a maze and search fronts
+    # take one run each instead of a tuple per node
+    def __init__(self, shape):
+        self.shape = shape
+        self.starts = array('i')
+        self.lengths = array('i')
+        self.strides = array('i')
+        self.values = array('b')
+
+    def __len__(self):
+        return len(self.starts)
+
+    def node_count(self):
+        return sum(self.lengths)
+
+    def nbytes(self):
+        return sum(len(data) * data.itemsize for data in (self.starts, self.lengths, self.strides, self.values))
+
+    def add_segments(self, starts, lengths, strides, values):
+        # Scalars are broadcast, so e.g. a single value can be given for all segments
+        starts, lengths, strides, values = np.broadcast_arrays(starts, lengths, strides, values)
+        self.starts.frombytes(starts.astype(np.int32).tobytes())
+        self.lengths.frombytes(lengths.astype(np.int32).tobytes())
+        self.strides.frombytes(strides.astype(np.int32).tobytes())
+        self.values.frombytes(values.astype(np.int8).tobytes())
+
+    def add_nodes(self, indices, values):
+        # Consecutive nodes with the same value and the same distance between them join one run
+        starts, lengths, strides, run_values = [], [], [], []
+        for index, value in zip(indices, values):
+            if lengths and value == run_values[-1]:
+                if lengths[-1] == 1:
+                    strides[-1] = index - starts[-1]
+                    lengths[-1] = 2
+                    continue
+                if index == starts[-1] + strides[-1] * lengths[-1]:
+                    lengths[-1] += 1
+                    continue
+
+            starts.append(index)
+            lengths.append(1)
+            strides.append(0)
+            run_values.append(value)
+
+        if starts:
+            self.add_segments(starts, lengths, strides, run_values)
+
+    def nodes(self, segment):
+        # Board coordinates of the nodes of a run and its value
+        start, length, stride = self.starts[segment], self.lengths[segment], self.strides[segment]
+        xs, ys = np.divmod(start + stride * np.arange(length), self.shape[1])
+
+        return xs, ys, self.values[segment]
+
+    def cells(self):
+        # One (x, y, value) tuple per node, as the history used to be stored
+        for segment in range(len(self)):
+            xs, ys, value = self.nodes(segment)
+            yield from ((x, y, value) for x, y in zip(xs.tolist(), ys.tolist()))
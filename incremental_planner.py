@@ -0,0 +1,126 @@
+import heapq
+import math
+import numpy as np
+from pathfinding_algorithms import SearchGrid
+
+
+class IncrementalPlanner:
+    # Lifelong Planning A* (LPA*), g and rhs values are kept between runs and repaired after node cost changes
+    def __init__(self):
+        self.grid = None
+        self.start_index = None
+        self.end_index = None
+
+    def shortest_path(self, board, start, end):
+        if start is None or end is None:
+            raise ValueError("Start or end point not found!")
+
+        grid = SearchGrid(board)
+        start_index, end_index = grid.index(start), grid.index(end)
+
+        if self.grid is None or (grid.rows, grid.cols, start_index, end_index) != (self.grid.rows, self.grid.cols, self.start_index, self.end_index):
+            self.__reset(grid, start_index, end_index)
+        else:
+            # Only nodes whose cost changed since the last run are updated
+            changed = np.flatnonzero(np.frombuffer(grid.costs, dtype=np.uint8) != np.frombuffer(self.grid.costs, dtype=np.uint8))
+            self.grid = grid
+            for index in changed.tolist():
+                self.__update_vertex(index)
+
+        visited = self.__compute_shortest_path()
+
+        if self.g[end_index] == math.inf:
+            raise RuntimeError('No path found!')
+
+        return visited, self.__extract_path()
+
+
+    def __reset(self, grid, start_index, end_index):
+        self.grid = grid
+        self.start_index, self.end_index = start_index, end_index
+        self.end_row, self.end_col = divmod(end_index, grid.width)
+
+        self.g = [math.inf] * grid.size
+        self.rhs = [math.inf] * grid.size
+        self.rhs[start_index] = 0
+
+        # Heap entries are (key, index), queued keeps the current key of every inconsistent node
+        self.priority_queue = []
+        self.queued = {}
+        self.__push(start_index)
+
+
+    def __calculate_key(self, index):
+        # Manhattan distance heuristic
+        row, col = divmod(index, self.grid.width)
+        min_dist = min(self.g[index], self.rhs[index])
+
+        return (min_dist + abs(row - self.end_row) + abs(col - self.end_col), min_dist)
+
+
+    def __push(self, index):
+        key = self.__calculate_key(index)
+        self.queued[index] = key
+        heapq.heappush(self.priority_queue, (key, index))
+
+
+    def __top_key(self):
+        # Drop stale heap entries of nodes that were re-queued or became consistent
+        while self.priority_queue:
+            key, index = self.priority_queue[0]
+            if self.queued.get(index) == key:
+                return key
+            heapq.heappop(self.priority_queue)
+
+        return (math.inf, math.inf)
+
+
+    def __update_vertex(self, index):
+        g, rhs = self.g, self.rhs
+
+        if index != self.start_index:
+            cost = self.grid.costs[index]
+            # Walls are never entered, other nodes cost the same from every neighbor
+            rhs[index] = cost + min(g[index + offset] for offset in self.grid.offsets) if cost else math.inf
+
+        if g[index] != rhs[index]:
+            self.__push(index)
+        else:
+            self.queued.pop(index, None)
+
+
+    def __compute_shortest_path(self):
+        g, rhs = self.g, self.rhs
+        end_index = self.end_index
+        visited = []
+
+        while self.__top_key() < self.__calculate_key(end_index) or rhs[end_index] != g[end_index]:
+            _, curr_index = heapq.heappop(self.priority_queue)
+            del self.queued[curr_index]
+            visited.append(self.grid.node(curr_index))
+
+            if g[curr_index] > rhs[curr_index]:
+                # Overconsistent node, its distance got shorter
+                g[curr_index] = rhs[curr_index]
+            else:
+                # Underconsistent node, its distance got longer and it is updated from its neighbors again
+                g[curr_index] = math.inf
+                self.__update_vertex(curr_index)
+
+            for offset in self.grid.offsets:
+                self.__update_vertex(curr_index + offset)
+
+        return visited
+
+
+    def __extract_path(self):
+        # Walk from the end node to the neighbor with the smallest distance until the start node is reached
+        g = self.g
+        path = [self.end_index]
+        current = self.end_index
+        while current != self.start_index:
+            current = min((current + offset for offset in self.grid.offsets), key=g.__getitem__)
+            path.append(current)
+        path.reverse()
+
+        return [self.grid.board_index(index) for index in path]
@@ -1,81 +1,213 @@
-import random
 import numpy as np
-
+from board_saving import write_board_lines
+from history import SegmentHistory
+
+
+def eller_lines(shape, seed=None):
+    # Eller's algorithm, yields the maze one board line (board[x, :]) at a time and keeps only the sets of the current row.
+    # Maze cells lie at odd coordinates, an even size leaves an extra line or column of walls
+    lines, width = shape
+    cells = (width - 1) // 2
+    rows = (lines - 1) // 2
+    random_generator = np.random.default_rng(seed)
+
+    yield np.ones(width, dtype=np.uint8)
+    if cells == 0 or rows == 0:
+        for _ in range(lines - 1):
+            yield np.ones(width, dtype=np.uint8)
+        return
+
+    sets = np.arange(cells)
+    for row in range(rows):
+        last_row = row == rows - 1
+        line = np.ones(width, dtype=np.uint8)
+        line[1:2 * cells:2] = 0
+
+        # Join neighbors of different sets at random, the last row joins all of them. Sets of the row
+        # are merged with a small union-find over set labels, which are always below the number of cells
+        parent = list(range(cells))
+
+        def find(label):
+            while parent[label] != label:
+                parent[label] = parent[parent[label]]
+                label = parent[label]
+            return label
+
+        join = random_generator.random(cells - 1) < 0.5
+        labels = sets.tolist()
+        for i in range(cells - 1):
+            left, right = find(labels[i]), find(labels[i + 1])
+            if left != right and (last_row or join[i]):
+                parent[right] = left
+                line[2 * i + 2] = 0
+        sets = np.array([find(label) for label in labels])
+        yield line
+
+        if last_row:
+            break
+
+        # Every set goes down at least once, through a random cell of it when no cell was chosen
+        down = random_generator.random(cells) < 0.5
+        has_down = np.zeros(cells, dtype=bool)
+        has_down[sets[down]] = True
+        order = random_generator.permutation(cells)
+        set_labels, first = np.unique(sets[order], return_index=True)
+        down[order[first[~has_down[set_labels]]]] = True
+
+        line = np.ones(width, dtype=np.uint8)
+        line[1:2 * cells:2][down] = 0
+        yield line
+
+        # Cells that don't go down start new sets, labels are renumbered below the number of cells
+        sets = np.where(down, sets, cells + np.arange(cells))
+        sets = np.unique(sets, return_inverse=True)[1]
+
+    for _ in range(lines - 2 * rows):
+        yield np.ones(width, dtype=np.uint8)
+
+
+def write_eller_maze(path, shape, seed=None):
+    # Maze streamed straight into a binary board file, the whole board is never in memory
+    write_board_lines(path, shape, eller_lines(shape, seed))
 
 
 class MazeGenerator:
     def __init__(self, board_shape):
         self.rows, self.cols = board_shape
+        # Value of all nodes before the history is drawn, recursive division draws walls and the other generators carve passages
+        self.initial_value = 0
 
-    def generate(self):
-        self.history = []
+    def generate(self, seed=None, record_history=True):
+        # Recursive division, the same seed gives the same maze, history of drawn nodes can be skipped for large boards
+        self.history = SegmentHistory((self.rows, self.cols)) if record_history else None
+        self.random_generator = np.random.default_rng(seed)
+        self.initial_value = 0
 
         self.board = np.ones((self.rows, self.cols))
         self.board[1:-1,1:-1] = 0
 
-        top_border = [(i, 0) for i in range(self.rows)]
-        right_border = [(self.rows-1, i) for i in range(self.cols)]
-        bottom_border = [(i, self.cols-1) for i in range(self.rows)]
-        left_border = [(0, i) for i in range(self.cols)]
-        
-        self.history.extend(top_border)
-        self.history.extend(right_border)
-        self.history.extend(reversed(bottom_border))
-        self.history.extend(reversed(left_border))
-        
+        if record_history:
+            # Top, right, bottom and left border, the last two drawn backwards
+            last_x, last_y = (self.rows - 1) * self.cols, self.cols - 1
+            self.history.add_segments([0, last_x, last_x + last_y, last_y], [self.rows, self.cols, self.rows, self.cols],
+                                      [self.cols, 1, -self.cols, -1], 1)
+
         self.divide(0, 0, self.cols, self.rows)
 
         return self.board, self.history
 
     def divide(self, x, y, cols, rows):
-        random_generator = random.Random()
-
-        if cols < rows:
-            orientation = 0
-        elif cols > rows:
-            orientation = 1
-        else:
-            orientation = random_generator.randint(0, 1)
-
-        if orientation == 0:
-            if rows < 5:
-                return
-
-            new_wall = y + (random_generator.randint(2, rows - 3) // 2) * 2
-            new_hole = x + (random_generator.randint(1, cols - 2) // 2) * 2 + 1
-
-            for i in range(x, x + cols - 1):
-                self.board[new_wall, i] = 1
-                self.history.append((new_wall, i))
-            self.board[new_wall, new_hole] = 0
-            self.history.append((new_wall, new_hole))
-
-            new_rows = new_wall - y + 1
-            new_cols = cols
-
-            y_pair = new_wall
-            x_pair = x
-            new_rows_pair = y + rows - new_wall
-            new_cols_pair = cols
-        elif orientation == 1:
-            if cols < 5:
-                return
-
-            new_wall = x + (random_generator.randint(2, cols - 3) // 2) * 2
-            new_hole = y + (random_generator.randint(1, rows - 2) // 2) * 2 + 1
-            for i in range(y, y + rows - 1):
-                self.board[i, new_wall] = 1
-                self.history.append((i, new_wall))
-            self.board[new_hole][new_wall] = 0
-            self.history.append((new_hole, new_wall))
-
-            new_rows = rows
-            new_cols = new_wall - x + 1
-
-            y_pair = y
-            x_pair = new_wall
-            new_rows_pair = rows
-            new_cols_pair = x + cols - new_wall
-
-        self.divide(x, y, new_cols, new_rows)
-        self.divide(x_pair, y_pair, new_cols_pair, new_rows_pair)
\ No newline at end of file
+        # Chambers are divided level by level instead of recursively, every level splits all of its chambers at once.
+        # Holes lie at odd offsets and walls at even ones, so no wall drawn later closes a hole
+        chambers = np.array([[x, y, cols, rows]], dtype=np.intp)
+
+        while len(chambers):
+            x, y, cols, rows = chambers.T
+            uniform = self.random_generator.random((3, len(chambers)))
+
+            # Orientation 0 splits the chamber with a wall along a row, it is chosen for tall chambers
+            # and at random for square ones, chambers too small to split are dropped
+            horizontal = (cols < rows) | ((cols == rows) & (uniform[0] < 0.5))
+            length = np.where(horizontal, rows, cols)
+            width = np.where(horizontal, cols, rows)
+            split = length >= 5
+            x, y, cols, rows, horizontal, length, width, uniform = (values[..., split] for values in (x, y, cols, rows, horizontal, length, width, uniform))
+
+            wall_offset = ((2 + (uniform[1] * (length - 4)).astype(np.intp)) // 2) * 2
+            hole_offset = ((1 + (uniform[2] * (width - 2)).astype(np.intp)) // 2) * 2 + 1
+
+            # Wall nodes of all chambers at once, the wall goes along the chamber but not into its far side
+            wall_line = np.where(horizontal, y, x) + wall_offset
+            wall_start = np.where(horizontal, x, y)
+            wall_lengths = width - 1
+            wall_stride = np.where(horizontal, 1, self.cols)
+            ends = np.cumsum(wall_lengths)
+            along = np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - wall_lengths - wall_start, wall_lengths)
+            line = np.repeat(wall_line, wall_lengths)
+            wall_horizontal = np.repeat(horizontal, wall_lengths)
+            wall_rows = np.where(wall_horizontal, line, along)
+            wall_cols = np.where(wall_horizontal, along, line)
+            self.board[wall_rows, wall_cols] = 1
+
+            hole_rows = np.where(horizontal, wall_line, y + hole_offset)
+            hole_cols = np.where(horizontal, x + hole_offset, wall_line)
+            self.board[hole_rows, hole_cols] = 0
+
+            # Every wall is a single segment and so is every hole
+            if self.history is not None:
+                wall_first = np.where(horizontal, wall_line * self.cols + wall_start, wall_start * self.cols + wall_line)
+                self.history.add_segments(wall_first, wall_lengths, wall_stride, 1)
+                self.history.add_segments(hole_rows * self.cols + hole_cols, 1, 0, 0)
+
+            # Both parts of every chamber share the new wall
+            first = np.stack([x, y, np.where(horizontal, cols, wall_offset + 1), np.where(horizontal, wall_offset + 1, rows)], axis=1)
+            second = np.stack([np.where(horizontal, x, x + wall_offset), np.where(horizontal, y + wall_offset, y),
+                               np.where(horizontal, cols, cols - wall_offset), np.where(horizontal, rows - wall_offset, rows)], axis=1)
+            chambers = np.concatenate([first, second])
+
+    def generate_kruskal(self, seed=None, record_history=True):
+        # Randomized Kruskal's algorithm, walls between maze cells are removed in random order unless both cells are
+        # already connected, which is checked with an array-backed union-find of the cells
+        self.random_generator = np.random.default_rng(seed)
+        self.initial_value = 1
+        self.board = np.ones((self.rows, self.cols))
+        cells_x, cells_y = (self.rows - 1) // 2, (self.cols - 1) // 2
+        self.board[1:2 * cells_x:2, 1:2 * cells_y:2] = 0
+
+        # Edges are numbered by the cell they leave, first the ones going along x, then the ones going along y
+        cells = np.arange(cells_x * cells_y).reshape(cells_x, cells_y)
+        first = np.concatenate([cells[:-1, :].ravel(), cells[:, :-1].ravel()])
+        second = np.concatenate([cells[1:, :].ravel(), cells[:, 1:].ravel()])
+        order = self.random_generator.permutation(len(first))
+        first, second = first[order], second[order]
+
+        parent = list(range(cells_x * cells_y))
+        removed = []
+        for a, b in zip(first.tolist(), second.tolist()):
+            # Path halving keeps the trees flat
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            while parent[b] != b:
+                parent[b] = parent[parent[b]]
+                b = parent[b]
+            removed.append(a != b)
+            if a != b:
+                parent[b] = a
+
+        # Walls lie halfway between the cells of their edge
+        removed = np.array(removed, dtype=bool)
+        first_x, first_y = np.divmod(first[removed], cells_y)
+        second_x, second_y = np.divmod(second[removed], cells_y)
+        wall_x, wall_y = first_x + second_x + 1, first_y + second_y + 1
+        self.board[wall_x, wall_y] = 0
+
+        # Every removed wall carves its two cells and the wall between them as one segment,
+        # a maze of a single cell has no walls to remove
+        self.history = None
+        if record_history:
+            self.history = SegmentHistory((self.rows, self.cols))
+            first_index = (2 * first_x + 1) * self.cols + 2 * first_y + 1
+            wall_index = wall_x * self.cols + wall_y
+            if len(removed):
+                self.history.add_segments(first_index, 3, wall_index - first_index, 0)
+            else:
+                self.history.add_segments([self.cols + 1] * (cells_x * cells_y), 1, 0, 0)
+
+        return self.board, self.history
+
+    def generate_eller(self, seed=None, record_history=True):
+        # Eller's algorithm assembled into a board, passages are carved line by line
+        self.initial_value = 1
+        self.board = np.ones((self.rows, self.cols))
+        self.history = SegmentHistory((self.rows, self.cols)) if record_history else None
+
+        for x, line in enumerate(eller_lines((self.rows, self.cols), seed)):
+            self.board[x] = line
+            if record_history:
+                # Runs of carved nodes of the line, each one is a segment
+                edges = np.flatnonzero(np.diff(np.concatenate([[1], line, [1]]).astype(np.int8)))
+                run_starts, run_ends = edges[::2], edges[1::2]
+                self.history.add_segments(x * self.cols + run_starts, run_ends - run_starts, 1, 0)
+
+        return self.board, self.history
@@ -1,4 +1,4 @@
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QLabel, QPushButton, QComboBox)
+from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QLabel, QPushButton, QComboBox, QSpinBox)
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QIcon, QPixmap, QFont
 from path_finding_visualizer_view import PathfindingVisualizer
@@ -8,6 +8,10 @@ from path_finding_visualizer_view import PathfindingVisualizer
 class MenuView(QMainWindow):
     def __init__(self):
         super().__init__()
+        # Board sizes as (rows, cols), custom boards can have up to max_board_size nodes per side. Sizes are odd,
+        # maze generators lay cells on odd coordinates and an even size would leave parts of the maze cut off
+        self.board_sizes = {'Small': (23, 33), 'Medium': (41, 51), 'Large': (65, 79)}
+        self.max_board_size = 4095
         self.setWindowTitle("Pathfinding Visualizer")
         self.setMinimumSize(930, 635)
         self.resize(1200, 800)
@@ -38,13 +42,31 @@ class MenuView(QMainWindow):
         self.board_options = QComboBox()
         self.board_options.setFont(font)
         self.board_options.setFixedSize(250, 80)
-        self.board_options.addItems(['Small', 'Medium', 'Large'])
+        self.board_options.addItems(['Small', 'Medium', 'Large', 'Custom'])
         self.board_options.setItemIcon(0, QIcon('./icons/small_icon.png'))
         self.board_options.setItemIcon(1, QIcon('./icons/mid_icon.png'))
         self.board_options.setItemIcon(2, QIcon('./icons/large_icon.png'))
         self.board_options.setIconSize(QSize(30, 30))
         self.board_options.setCurrentIndex(1)
         self.board_options.setToolTip('Choose board size')
+        self.board_options.currentTextChanged.connect(self.__on_board_option_changed)
+
+        self.custom_size_widget = QWidget()
+        custom_size_layout = QHBoxLayout()
+        custom_size_layout.setContentsMargins(0, 0, 0, 0)
+        self.custom_rows = QSpinBox()
+        self.custom_cols = QSpinBox()
+        for spin_box, name, value in [(self.custom_rows, 'rows', 201), (self.custom_cols, 'columns', 301)]:
+            spin_box.setFont(font)
+            spin_box.setFixedSize(120, 50)
+            spin_box.setRange(5, self.max_board_size)
+            spin_box.setSingleStep(2)
+            spin_box.setValue(value)
+            spin_box.setToolTip(f'Number of {name} (odd)')
+            spin_box.editingFinished.connect(self.__on_custom_size_edited)
+            custom_size_layout.addWidget(spin_box)
+        self.custom_size_widget.setLayout(custom_size_layout)
+        self.custom_size_widget.setVisible(False)
         #self.board_options.setEditable(True)
         #self.board_options.lineEdit().setAlignment(Qt.AlignCenter)
         #self.board_options.lineEdit().setReadOnly(True)
@@ -56,6 +78,7 @@ class MenuView(QMainWindow):
 
         buttons_layout.addWidget(start_button, alignment=Qt.AlignCenter)
         buttons_layout.addWidget(self.board_options, alignment=Qt.AlignCenter)
+        buttons_layout.addWidget(self.custom_size_widget, alignment=Qt.AlignCenter)
         buttons_layout.addWidget(quit_button, alignment=Qt.AlignCenter)
 
         buttons_layout.setContentsMargins(0, 50, 0, 50)
@@ -64,9 +87,27 @@ class MenuView(QMainWindow):
         self.central_layout.addLayout(buttons_layout)
 
 
+    def __on_board_option_changed(self, option):
+        self.custom_size_widget.setVisible(option == 'Custom')
+
+
+    def __on_custom_size_edited(self):
+        # Typed even sizes are rounded up to the next odd one
+        for spin_box in [self.custom_rows, self.custom_cols]:
+            spin_box.setValue(spin_box.value() | 1)
+
+
     def __open_path_finding_visualizer(self):
-        board_sizes = {'Small': (23, 33), 'Medium': (41, 51), 'Large': (65, 79)}
-        self.pfv_view = PathfindingVisualizer(*board_sizes[self.board_options.currentText()], self.board_options.currentText())
+        # Custom boards are saved next to other boards of the same size
+        size = self.board_options.currentText()
+        if size == 'Custom':
+            self.__on_custom_size_edited()
+            rows, cols = self.custom_rows.value(), self.custom_cols.value()
+            size = f'{rows}x{cols}'
+        else:
+            rows, cols = self.board_sizes[size]
+
+        self.pfv_view = PathfindingVisualizer(rows, cols, size)
         self.pfv_view.go_back.connect(self.show)
 
         self.pfv_view.show()
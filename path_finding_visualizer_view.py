@@ -1,14 +1,24 @@
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QLineEdit, 
-                               QPushButton, QMessageBox, QGraphicsView, QGraphicsScene, QComboBox)
-from PySide6.QtCore import Qt, QEvent, QRectF, QSize, Signal
-from PySide6.QtGui import QPen, QBrush, QIcon, QColor, QPixmap
+from PySide6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QLineEdit, QLabel, QCheckBox, QPlainTextEdit,
+                               QPushButton, QMessageBox, QGraphicsView, QGraphicsScene, QComboBox, QFileDialog)
+from PySide6.QtCore import Qt, QEvent, QSize, Signal
+from PySide6.QtGui import QIcon, QColor, QPixmap, QTransform, QFontDatabase
 import numpy as np
-from pathfinding_algorithms import PathfindingAlgorithms
+from board_renderer import BoardItem, thumbnail_pixmap
+from animation import Animator, EventWorker, SolveWorker
+from pathfinding_algorithms import PathfindingAlgorithms, SearchMetrics, EXPAND, PATH, measure_events
+from algorithm_race import algorithm_table, algorithm_events
+from distance_cache import DistanceFieldCache
+from incremental_planner import IncrementalPlanner
+from hierarchical_planner import HierarchicalPlanner
+from reachability import ReachabilityIndex
 from maze_generator import MazeGenerator
+from history import SegmentHistory
+from run_recording import RunRecorder, board_hash, write_run, read_run, metrics_from_dict, painted_nodes
 from board_saving import BoardSaver
 from board_saving_window import BoardSavingWindow
-import time
+from race_view import RaceWindow
 import math
+import os
 
 
 
@@ -27,25 +37,58 @@ class PathfindingVisualizer(QMainWindow):
         self.board = np.zeros((self.cols, self.rows))
         self.visualization_nodes = np.zeros((self.cols, self.rows))
         self.start_point = None
-        self.end_point = None
+        # Several end points can be placed, only multi-target algorithms search for more than one
+        self.end_points = []
         self.colors = {'Start point': QColor(52, 168, 83, 255), 
                        'End point': QColor(234, 67, 53, 255), 
                        'Wall': QColor(5, 5, 5, 255),
                        'Visualization': QColor(66, 133, 244, 255),
+                       'Backward visualization': QColor(171, 71, 188, 255),
                        'Path': QColor(251, 188, 5, 255),
+                       'Mud': QColor(141, 110, 99, 255),
+                       'Water': QColor(128, 222, 234, 255),
                        'Empty': Qt.white}
-        self.speed_levels = {'Fast': 0, 'Average': 0.001, 'Slow': 0.0025}
+        self.terrain_types = {'Mud': 6, 'Water': 7}
+        self.node_names = {0: 'Empty', 1: 'Wall', 2: 'Start point', 3: 'End point', 4: 'Visualization', 5: 'Path',
+                           6: 'Mud', 7: 'Water', 8: 'Backward visualization'}
+        # Animation speeds in nodes painted per second
+        self.speed_levels = {'Fast': 10000, 'Average': 1000, 'Slow': 400}
+        self.path_speed = 100
+        # Only the newest boards matching the filter are listed
+        self.saved_boards_page_size = 100
+        # Zoom relative to the whole board fitting into the view, cells are never drawn larger than max_cell_size pixels
+        self.zoom = 1.0
+        self.max_cell_size = 64
 
         self.maze_generator = MazeGenerator(self.board.shape)
         self.pf_algorithms = PathfindingAlgorithms()
+        self.distance_cache = DistanceFieldCache()
+        self.incremental_planner = IncrementalPlanner()
+        self.hierarchical_planner = HierarchicalPlanner()
+        # Components of the board, built by the first visualization after the board was replaced and updated as nodes are drawn
+        self.reachability = None
+        # Algorithms are event generators, results of the cache and the planner are replayed as events
+        self.algorithm_types = algorithm_table(self.pf_algorithms, self.distance_cache, self.incremental_planner, self.hierarchical_planner)
         self.board_saver = BoardSaver(size)
 
+        self.worker = None
+        # Cancelled workers that are still running, a thread must not be destroyed before it's done
+        self.cancelled_workers = set()
+        self.search_metrics = None
+        # Events of the running search are recorded, the last finished run can be saved and played back later
+        self.recorder = None
+        self.last_run = None
+        self.runs_path = './saved_runs'
+        self.animator = Animator()
+        self.animator.finished.connect(self.__on_animation_finished)
+
         self.central_widget = QWidget()
         central_layout = QHBoxLayout()
         
         self.__init_graphics_view()
         central_layout.addWidget(self.__menu_widget())
-        central_layout.addWidget(self.graphics_view, alignment=Qt.AlignCenter)
+        central_layout.addWidget(self.graphics_view, stretch=1)
+        central_layout.addWidget(self.__metrics_widget())
 
         self.central_widget.setLayout(central_layout)
         self.setCentralWidget(self.central_widget)
@@ -62,22 +105,60 @@ class PathfindingVisualizer(QMainWindow):
 
         self.algorithms_list = QComboBox()
         self.algorithms_list.setMinimumSize(120, 50)
-        self.algorithms_list.addItems(['Dijkstra\'s Algorithm', 'A* Search', 'Depth-First Search'])
+        self.algorithms_list.addItems(self.algorithm_types.keys())
         self.algorithms_list.setToolTip('Choose algorithm to visualize')
 
+        self.diagonal_checkbox = QCheckBox('Diagonal moves')
+        self.diagonal_checkbox.setToolTip('Let the search move diagonally too, corners of walls are never cut')
+
+        self.race_button = QPushButton('Race algorithms')
+        self.race_button.setMinimumSize(120, 35)
+        self.race_button.setToolTip('Run several algorithms on this board at once and compare them side by side')
+
         self.speed = QComboBox()
         self.speed.setMinimumSize(120, 50)
         self.speed.addItems(self.speed_levels.keys())
         self.speed.setCurrentIndex(0)
         self.speed.setToolTip('Choose speed of visualization')
 
+        animation_layout = QHBoxLayout()
+
+        self.pause_button = QPushButton('Pause')
+        self.pause_button.setToolTip('Pause or resume visualization')
+        self.step_button = QPushButton('Step')
+        self.step_button.setToolTip('Paint the next node')
+        self.cancel_button = QPushButton('Cancel')
+        self.cancel_button.setToolTip('Cancel visualization')
+
+        for button in [self.pause_button, self.step_button, self.cancel_button]:
+            button.setMinimumSize(35, 35)
+            animation_layout.addWidget(button)
+        self.__set_animation_controls_enabled(False)
+
+        run_layout = QHBoxLayout()
+
+        self.save_run_button = QPushButton('Save run')
+        self.save_run_button.setToolTip('Save the last visualization as a run recording')
+        self.save_run_button.setEnabled(False)
+        self.replay_run_button = QPushButton('Replay run')
+        self.replay_run_button.setToolTip('Play back a run recorded on this board without running the algorithm')
+
+        for button in [self.save_run_button, self.replay_run_button]:
+            button.setMinimumSize(35, 35)
+            run_layout.addWidget(button)
+
         self.node_types = QComboBox()
         self.node_types.setMinimumSize(120, 50)
         self.node_types.addItems(['Start point', 'End point', 'Wall'])
+        self.node_types.addItems(self.terrain_types.keys())
 
         self.node_types.setItemIcon(0, QIcon('./icons/start_point_icon.png'))
         self.node_types.setItemIcon(1, QIcon('./icons/finish_icon.png'))
         self.node_types.setItemIcon(2, QIcon('./icons/wall_icon.png'))
+        for i, terrain in enumerate(self.terrain_types, start=3):
+            icon = QPixmap(20, 20)
+            icon.fill(self.colors[terrain])
+            self.node_types.setItemIcon(i, QIcon(icon))
         self.node_types.setIconSize(QSize(20,20))
         self.node_types.setToolTip('Choose node to draw')
 
@@ -95,10 +176,23 @@ class PathfindingVisualizer(QMainWindow):
         self.maze_button.setIconSize(QSize(30, 30))
         self.maze_button.setToolTip('Generate maze')
 
+        self.maze_types = {'Recursive division': self.maze_generator.generate,
+                           'Kruskal\'s algorithm': self.maze_generator.generate_kruskal,
+                           'Eller\'s algorithm': self.maze_generator.generate_eller}
+        self.maze_list = QComboBox()
+        self.maze_list.setMinimumSize(120, 35)
+        self.maze_list.addItems(self.maze_types.keys())
+        self.maze_list.setToolTip('Choose maze generator')
+
         load_layout = QHBoxLayout()
 
+        self.boards_filter = QLineEdit()
+        self.boards_filter.setPlaceholderText('Filter saved boards')
+        self.boards_filter.setClearButtonEnabled(True)
+
         self.saved_boards = QComboBox()
         self.saved_boards.setMinimumSize(50, 50)
+        self.saved_boards.setIconSize(QSize(30, 30))
         self.__update_saved_boards_list()
         self.saved_boards.setCurrentIndex(0)
         self.saved_boards.setToolTip('Choose board to load')
@@ -122,21 +216,34 @@ class PathfindingVisualizer(QMainWindow):
         self.back_button.setToolTip('Go back to menu')
 
         self.start_button.clicked.connect(self.__visualize)
+        self.race_button.clicked.connect(self.__display_race_window)
+        self.pause_button.clicked.connect(self.__on_pause_button)
+        self.step_button.clicked.connect(self.__on_step_button)
+        self.cancel_button.clicked.connect(self.__on_cancel_button)
+        self.save_run_button.clicked.connect(self.__on_save_run_button)
+        self.replay_run_button.clicked.connect(self.__on_replay_run_button)
         self.maze_button.clicked.connect(self.__generate_maze)
         self.clear_vis_button.clicked.connect(self.__clear_visualization)
         self.clear_board_button.clicked.connect(self.__clear_board)
         self.back_button.clicked.connect(self.__on_back_button)
         save_button.clicked.connect(self.__display_board_saving_window)
         load_button.clicked.connect(self.__on_load_button)
+        self.boards_filter.textChanged.connect(self.__update_saved_boards_list)
 
         self.menu_layout.addWidget(self.algorithms_list)
+        self.menu_layout.addWidget(self.diagonal_checkbox)
         self.menu_layout.addWidget(self.start_button)
+        self.menu_layout.addLayout(animation_layout)
+        self.menu_layout.addLayout(run_layout)
+        self.menu_layout.addWidget(self.race_button)
         self.menu_layout.addWidget(self.speed)
         self.menu_layout.addWidget(self.node_types)
         self.menu_layout.addWidget(self.clear_board_button)
         self.menu_layout.addWidget(self.clear_vis_button)
+        self.menu_layout.addWidget(self.maze_list)
         self.menu_layout.addWidget(self.maze_button)
         self.menu_layout.addWidget(save_button)
+        self.menu_layout.addWidget(self.boards_filter)
         self.menu_layout.addLayout(load_layout)
         self.menu_layout.addWidget(self.back_button)
 
@@ -146,81 +253,321 @@ class PathfindingVisualizer(QMainWindow):
         return self.menu_widget
     
 
+    def __metrics_widget(self):
+        self.metrics_widget = QWidget()
+        metrics_layout = QVBoxLayout()
+
+        # Counters and times of the last search next to the time spent on rendering it
+        self.metrics_label = QLabel()
+        self.metrics_label.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.metrics_label.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        self.metrics_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        self.profile_checkbox = QCheckBox('Profile search')
+        self.profile_checkbox.setToolTip('Run the next search under cProfile')
+
+        self.profile_output = QPlainTextEdit()
+        self.profile_output.setReadOnly(True)
+        self.profile_output.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.profile_output.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.profile_output.hide()
+
+        metrics_layout.addWidget(self.metrics_label)
+        metrics_layout.addWidget(self.profile_checkbox)
+        metrics_layout.addWidget(self.profile_output, stretch=1)
+        metrics_layout.addStretch()
+
+        self.metrics_widget.setLayout(metrics_layout)
+        self.metrics_widget.setMaximumWidth(260)
+        self.__update_metrics_panel()
+
+        return self.metrics_widget
+
+
+    def __update_metrics_panel(self):
+        if self.search_metrics is None:
+            self.metrics_label.setText('No search yet')
+            return
+
+        metrics = self.search_metrics
+        lines = ['Search',
+                 f'  expanded       {metrics.expanded}',
+                 f'  pushes         {metrics.pushes}',
+                 f'  pops           {metrics.pops}',
+                 f'  stale pops     {metrics.stale_pops}',
+                 f'  peak frontier  {metrics.peak_frontier}',
+                 f'  path length    {metrics.path_length}',
+                 '',
+                 'Search time        wall     CPU']
+        # The search thread may add a phase while the panel is updated
+        for phase, (wall, cpu) in list(metrics.phases.items()):
+            lines.append(f'  {phase:<10} {wall * 1000:8.1f} {cpu * 1000:7.1f} ms')
+
+        lines.extend(['',
+                      'Rendering',
+                      f'  node updates {self.board_item.update_time * 1000:8.1f} ms',
+                      f'  board paints {self.board_item.paint_time * 1000:8.1f} ms',
+                      f'  frames       {self.board_item.paint_count:8}'])
+        self.metrics_label.setText('\n'.join(lines))
+
+
     def __update_saved_boards_list(self):
         self.saved_boards.clear()
+        self.saved_boards.addItem('')
 
-        boards_list = ['']
-        boards_list.extend(self.board_saver.get_boards_names())
-        self.saved_boards.addItems(boards_list)
+        # Boards come from the library index, thumbnails are stored there as well
+        for board in self.board_saver.list_boards(name=self.boards_filter.text() or None, limit=self.saved_boards_page_size):
+            icon = QIcon(thumbnail_pixmap(self.board_saver.thumbnail(board['name']), self.board_item.lut, 30))
+            self.saved_boards.addItem(icon, board['name'])
 
 
     def __on_back_button(self):
+        self.__cancel_animation()
         self.close()
         self.go_back.emit()
 
 
     def __generate_maze(self):
         self.__clear_board()
-        self.board, history = self.maze_generator.generate()
-        self.__maze_generation_visualization(history)
+        worker = SolveWorker(self.maze_types[self.maze_list.currentText()])
+        worker.solved.connect(self.__maze_generation_visualization)
+        self.__start_worker(worker)
 
-    
-    def __maze_generation_visualization(self, history):
-        brush = QBrush()
-        brush.setStyle(Qt.SolidPattern)
-        border = QPen(Qt.black)
-        for node in history:
-            x, y = node
-            color = self.colors['Empty'] if self.board[x, y] == 0 else self.colors['Wall']
-            self.__draw_visualization_node(x, y, color, border, brush)
-            QApplication.processEvents()
-            time.sleep(self.speed_levels[self.speed.currentText()])
-    
 
-    def __visualize(self):
-        self.algorithm_types = {'Dijkstra\'s Algorithm': self.pf_algorithms.dijkstra_shortest_path, 
-                                'A* Search': self.pf_algorithms.astar_shortest_path,
-                                'Depth-First Search': self.pf_algorithms.dfs_shortest_path}
+    def __maze_generation_visualization(self, result):
+        if self.sender().cancelled:
+            return
+
+        self.board, history = result
+        self.reachability = None
 
+        # Generators that carve passages start from a board full of walls
+        self.board_item.render(np.full(self.board.shape, self.maze_generator.initial_value), self.visualization_nodes)
+        self.animator.start([(history, self.speed_levels[self.speed.currentText()])], self.board_item.set_nodes)
+
+
+    def __visualize(self):
+        self.__cancel_animation()
         self.visualization_nodes = np.zeros((self.cols, self.rows))
+
+        # End points outside of the component of the start point are rejected without a search,
+        # the nodes reachable from the start point are shown instead
+        if self.start_point is not None and self.end_points:
+            if self.reachability is None:
+                self.reachability = ReachabilityIndex(self.board)
+            if not any(self.reachability.reachable(self.start_point, end_point) for end_point in self.end_points):
+                self.visualization_nodes[self.reachability.region(self.start_point)] = 4
+                self.__reload_graphic_view()
+                self.__display_warning('Visualization error', 'No path found!')
+                return
+
         self.__reload_graphic_view()
 
+        # The algorithm gets its own copy of the board, so it can be edited during the search.
+        # Its time is measured in the search thread, rendering is timed by the board item
+        self.search_metrics = SearchMetrics()
+        self.board_item.reset_timings()
+        self.recorder = RunRecorder(self.algorithms_list.currentText(), self.board, self.start_point, self.end_points)
+        self.last_run = None
+        self.save_run_button.setEnabled(False)
+        events = algorithm_events(self.algorithm_types, self.algorithms_list.currentText(), self.board.copy(), self.start_point, self.end_points,
+                                  self.search_metrics, self.diagonal_checkbox.isChecked())
+        events = measure_events(events, self.search_metrics)
+        self.animator.start([], self.__paint_visualization_nodes, streaming=True)
+
+        worker = EventWorker(events, profile=self.profile_checkbox.isChecked())
+        worker.progress.connect(self.__on_search_progress)
+        worker.done.connect(self.__on_search_done)
+        worker.failed.connect(self.__on_search_failed)
+        self.__start_worker(worker)
+
+
+    def __on_search_progress(self, events):
+        # Batches arrive while the search is still running, they are animated right away
+        if self.sender().cancelled:
+            return
+
+        self.recorder.add_events(events)
+
+        # Nodes are kept as flat indices, consecutive ones along a line are encoded as a single run
+        point_indices = {point[0] * self.rows + point[1] for point in [self.start_point, *self.end_points] if point is not None}
+        visited_nodes, visited_values, path_nodes = [], [], []
+        for event, data in events:
+            if event == EXPAND:
+                index = data[0] * self.rows + data[1]
+                if index not in point_indices:
+                    visited_nodes.append(index)
+                    # Nodes expanded by the search from the end point of bidirectional algorithms are (x, y, 1)
+                    visited_values.append(8 if len(data) == 3 and data[2] == 1 else 4)
+            elif event == PATH and data not in point_indices:
+                path_nodes.append(data)
+
+        visited = SegmentHistory((self.cols, self.rows))
+        visited.add_nodes(visited_nodes, visited_values)
+        path = SegmentHistory((self.cols, self.rows))
+        path.add_nodes(path_nodes, [5] * len(path_nodes))
+
+        self.animator.append(visited, self.speed_levels[self.speed.currentText()])
+        self.animator.append(path, self.path_speed)
+        self.__update_metrics_panel()
+
+
+    def __on_search_done(self):
+        if self.sender().cancelled:
+            return
+
+        self.animator.end_stream()
+        self.__update_metrics_panel()
+        self.__finish_recording()
+
+        report = self.sender().profile_report
+        self.profile_output.setVisible(report is not None)
+        if report is not None:
+            self.profile_output.setPlainText(report)
+
+
+    def __on_search_failed(self, message):
+        # Runs that end with an error are recorded as well, e.g. boards without a path
+        if self.sender().cancelled:
+            return
+
+        self.__finish_recording(message)
+
+
+    def __finish_recording(self, error=None):
+        self.last_run = self.recorder.finish(self.search_metrics, error)
+        self.save_run_button.setEnabled(True)
+
+
+    def __on_save_run_button(self):
+        os.makedirs(self.runs_path, exist_ok=True)
+        default_path = os.path.join(self.runs_path, self.last_run['algorithm'] + '.run')
+        path, _ = QFileDialog.getSaveFileName(self, 'Save run', default_path, 'Run recordings (*.run)')
+        if not path:
+            return
+
+        try:
+            write_run(path, self.last_run)
+        except OSError as e:
+            self.__display_warning('Save error', str(e))
+
+
+    def __on_replay_run_button(self):
+        path, _ = QFileDialog.getOpenFileName(self, 'Replay run', self.runs_path, 'Run recordings (*.run)')
+        if path:
+            self.__replay_run(path)
+
+
+    def __replay_run(self, path):
         try:
-            algorithm = self.algorithm_types[self.algorithms_list.currentText()]
-            visited, path = algorithm(self.board, self.start_point, self.end_point)
-        except Exception as e:
-            self.__display_warning('Visualization error', str(e))
+            run = read_run(path)
+        except (OSError, ValueError) as e:
+            self.__display_warning('Replay error', str(e))
             return
 
-        border = QPen(self.colors['Wall'])
+        if run['shape'] != self.board.shape or run['board_hash'] != board_hash(self.board):
+            self.__display_warning('Replay error', 'This run was recorded on a different board!')
+            return
 
-        brush = QBrush()
-        brush.setStyle(Qt.SolidPattern)
+        # Start and end points of the recording replace the ones on the board, walls and terrain are the same
+        self.__cancel_animation()
+        self.board[(self.board == 2) | (self.board == 3)] = 0
+        self.start_point, self.end_points = run['start'], run['end_points']
+        for point, value in [(self.start_point, 2)] + [(end_point, 3) for end_point in self.end_points]:
+            if point is not None:
+                self.board[point] = value
 
-        for node in visited:
-            x, y = node
-            if (x, y) not in [self.start_point, self.end_point]:
-                self.visualization_nodes[x, y] = 4
-                self.__draw_visualization_node(x, y, self.colors['Visualization'], border, brush)
-                QApplication.processEvents()
-                time.sleep(self.speed_levels[self.speed.currentText()])
+        self.visualization_nodes = np.zeros((self.cols, self.rows))
+        self.__reload_graphic_view()
+        self.search_metrics = metrics_from_dict(run['metrics'])
+        self.board_item.reset_timings()
+        self.last_run = run
 
-        for node in path:
-            x, y = np.unravel_index(node, self.board.shape)
-            if (x, y) not in [self.start_point, self.end_point]:
-                self.visualization_nodes[x, y] = 5
-                self.__draw_visualization_node(x, y, self.colors['Path'], border, brush)
-                QApplication.processEvents()
-                time.sleep(0.01)
+        # Nodes are animated like the ones of a running search, without the search
+        nodes, values, visited_count, _ = painted_nodes(run)
+        visited = SegmentHistory((self.cols, self.rows))
+        visited.add_nodes(nodes[:visited_count].tolist(), values[:visited_count].tolist())
+        path = SegmentHistory((self.cols, self.rows))
+        path.add_nodes(nodes[visited_count:].tolist(), values[visited_count:].tolist())
 
+        self.animator.start([(visited, self.speed_levels[self.speed.currentText()]), (path, self.path_speed)], self.__paint_visualization_nodes)
+        self.__set_animation_controls_enabled(self.animator.is_running())
+        self.__update_metrics_panel()
+        if run['error'] is not None:
+            self.__display_warning('Visualization error', run['error'])
+
+
+    def __paint_visualization_nodes(self, xs, ys, value):
+        self.visualization_nodes[xs, ys] = value
+        self.board_item.set_nodes(xs, ys, value)
+
+
+    def __start_worker(self, worker):
+        # A cancelled worker may still be running, it's kept until it's done and its result is dropped
+        if self.worker is not None and self.worker.isRunning():
+            self.cancelled_workers.add(self.worker)
+            self.worker.finished.connect(self.__on_cancelled_worker_finished)
+
+        self.worker = worker
+        self.worker.failed.connect(self.__on_worker_failed)
+        self.__set_animation_controls_enabled(True)
+        self.worker.start()
+
+
+    def __on_cancelled_worker_finished(self):
+        self.cancelled_workers.discard(self.sender())
+
+
+    def __on_worker_failed(self, message):
+        if self.sender().cancelled:
+            return
+
+        # Nodes streamed before the error are still animated
+        self.animator.end_stream()
+        self.__display_warning('Visualization error', message)
+
+
+    def __cancel_animation(self):
+        if self.worker is not None:
+            self.worker.cancelled = True
+        self.animator.cancel()
+        self.__set_animation_controls_enabled(False)
+
+
+    def __on_animation_finished(self):
+        self.__set_animation_controls_enabled(False)
+        self.__update_metrics_panel()
+
+
+    def __on_pause_button(self):
+        if self.animator.paused:
+            self.animator.resume()
+            self.pause_button.setText('Pause')
+        else:
+            self.animator.pause()
+            self.pause_button.setText('Resume')
+
+
+    def __on_step_button(self):
+        self.animator.step()
+        if self.animator.paused:
+            self.pause_button.setText('Resume')
+
+
+    def __on_cancel_button(self):
+        # Cancelled maze generation leaves the board generated, so it is drawn at once
+        self.__cancel_animation()
+        self.__reload_graphic_view()
+
+
+    def __set_animation_controls_enabled(self, enabled):
+        self.pause_button.setText('Pause')
+        for button in [self.pause_button, self.step_button, self.cancel_button]:
+            button.setEnabled(enabled)
 
-    def __draw_visualization_node(self, x, y, color, border, brush):
-        step = self.__calculate_row_col_step()
-        brush.setColor(color)
-        self.graphics_scene.addRect(QRectF(x * step[0], y * step[1], step[0], step[1]), border, brush)
 
-    
     def __clear_visualization(self):
+        self.__cancel_animation()
         self.visualization_nodes = np.zeros((self.cols, self.rows))
         self.__reload_graphic_view()
 
@@ -229,17 +576,16 @@ class PathfindingVisualizer(QMainWindow):
         self.graphics_view = QGraphicsView(self.central_widget)
         self.graphics_scene = QGraphicsScene()
 
-        gwidth, gheight = self.__calculate_graphics_view_size()
-        self.graphics_view.setFixedSize(gwidth, gheight)
-
+        # Scroll bars are hidden, the view is panned with the middle mouse button and zoomed with the wheel
         self.graphics_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.graphics_view.horizontalScrollBar().blockSignals(True)
         self.graphics_view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.graphics_view.verticalScrollBar().blockSignals(True)
 
         self.graphics_scene.setBackgroundBrush(Qt.white)
 
-        self.__draw_grid()
+        # Single image-backed item for the whole board with one scene unit per cell, the scene never grows
+        self.board_item = BoardItem(self.board.shape, {value: self.colors[name] for value, name in self.node_names.items()})
+        self.graphics_scene.addItem(self.board_item)
+        self.graphics_scene.setSceneRect(self.board_item.boundingRect())
 
         self.graphics_view.setScene(self.graphics_scene)
         self.graphics_view.viewport().installEventFilter(self)
@@ -247,149 +593,119 @@ class PathfindingVisualizer(QMainWindow):
     
     def __clear_board(self):
         self.board = np.zeros((self.cols, self.rows))
+        self.reachability = None
         self.__clear_visualization()
 
         self.start_point = None
-        self.end_point = None
+        self.end_points = []
         
         self.__reload_graphic_view()
 
 
-    def __draw_grid(self):
-        gwidth, gheight = self.__calculate_graphics_view_size()
-        step = self.__calculate_row_col_step()
-
-        for x in range(0, gwidth, step[0]):
-            self.graphics_scene.addLine(x, 0, x, gheight, QPen(Qt.black))
+    def __reload_graphic_view(self):
+        self.board_item.render(self.board, self.visualization_nodes)
 
-        for y in range(0, gheight, step[1]):
-            self.graphics_scene.addLine(0, y, gwidth, y, QPen(Qt.black))
 
+    def __fit_scale(self):
+        viewport = self.graphics_view.viewport().size()
+        return min(viewport.width() / self.cols, viewport.height() / self.rows)
 
-    def __reload_graphic_view(self, include_visualization=False):
-        gwidth, gheight = self.__calculate_graphics_view_size()
-        self.graphics_scene.clear()
-        self.graphics_view.setFixedSize(gwidth, gheight)
 
-        self.__draw_grid()
-        self.__add_existing_nodes(include_visualization)
+    def __update_view_transform(self):
+        scale = self.__fit_scale() * self.zoom
+        self.graphics_view.setTransform(QTransform.fromScale(scale, scale))
 
 
-    def __calculate_graphics_view_size(self):
-        cell_size = int(math.floor(self.height() / self.rows))
-        new_width = cell_size * self.cols
-        new_height = cell_size * self.rows
+    def __zoom_view(self, factor, position):
+        # Zooming out stops once the whole board is visible, the point under the mouse cursor stays in place
+        max_zoom = max(self.max_cell_size / self.__fit_scale(), 1.0)
+        zoom = min(max(self.zoom * factor, 1.0), max_zoom)
+        anchor = self.graphics_view.mapToScene(position.toPoint())
 
-        return new_width, new_height
-    
+        self.graphics_view.scale(zoom / self.zoom, zoom / self.zoom)
+        self.zoom = zoom
+        self.__pan_view(position - self.graphics_view.mapFromScene(anchor).toPointF())
 
-    def __add_existing_nodes(self, include_visualization):
-        node_types = {0: 'Empty', 1: 'Wall', 2: 'Start point', 3: 'End point', 4: 'Visualization', 5: 'Path'}
-        step = self.__calculate_row_col_step()
 
-        brush = QBrush()
-        brush.setStyle(Qt.SolidPattern)
+    def __pan_view(self, delta):
+        # Hidden scroll bars still scroll the view
+        horizontal, vertical = self.graphics_view.horizontalScrollBar(), self.graphics_view.verticalScrollBar()
+        horizontal.setValue(horizontal.value() - round(delta.x()))
+        vertical.setValue(vertical.value() - round(delta.y()))
 
-        for i, row in enumerate(self.board):
-            for j, node in enumerate(row):
-                if include_visualization:
-                    node_type = node_types[self.visualization_nodes[i, j]]
-                    brush.setColor(self.colors[node_type])
-                    self.graphics_scene.addRect(QRectF(i * step[0], j * step[1], step[0], step[1]), QPen(Qt.black), brush)
 
-                if node != 0:
-                    node_type = node_types[node]
-                    brush.setColor(self.colors[node_type])
-                    self.graphics_scene.addRect(QRectF(i * step[0], j * step[1], step[0], step[1]), QPen(Qt.black), brush)
-
-
-    def __calculate_row_col_step(self):
-        gwidth, gheight = self.__calculate_graphics_view_size()
-        w_step = round(gwidth / self.cols, 0)
-        h_step = round(gheight / self.rows, 0)
-
-        return (int(w_step), int(h_step))
+    def __node_at(self, position):
+        point = self.graphics_view.mapToScene(position.toPoint())
+        return math.floor(point.x()), math.floor(point.y())
 
 
     def __update_board_matrix(self, x, y, color):
-        step = self.__calculate_row_col_step()
-        x = int(x / step[0])
-        y = int(y / step[1])
-
-        if x >= self.cols or y >= self.rows:
+        if not (0 <= x < self.cols and 0 <= y < self.rows):
             return False
 
+        old_value = self.board[x, y]
+
         if color == self.colors['Empty']:
-            self.board[x, y] = 0
+            value = 0
             if (x, y) == self.start_point:
                 self.start_point = None
-            if (x, y) == self.end_point:
-                self.end_point = None
-            return True
-        elif self.board[x, y] == 0:
+            if (x, y) in self.end_points:
+                self.end_points.remove((x, y))
+        elif old_value == 0:
+            terrain_values = [value for terrain, value in self.terrain_types.items() if color == self.colors[terrain]]
             if color == self.colors['Wall']:
-                self.board[x, y] = 1
-                return True
-            if color == self.colors['Start point'] and not self.start_point:
-                self.board[x, y] = 2
+                value = 1
+            elif terrain_values:
+                value = terrain_values[0]
+            elif color == self.colors['Start point'] and not self.start_point:
+                value = 2
                 self.start_point = (x, y)
-                return True
-            if color == self.colors['End point'] and not self.end_point:
-                self.board[x, y] = 3
-                self.end_point = (x, y)
-                return True
-
-        return False
+            elif color == self.colors['End point']:
+                value = 3
+                self.end_points.append((x, y))
+            else:
+                return False
+        else:
+            return False
 
+        self.board[x, y] = value
+        self.visualization_nodes[x, y] = 0
+        self.board_item.set_node(x, y, value)
+        self.distance_cache.update_node(self.board, (x, y), old_value)
+        if self.reachability is not None:
+            self.reachability.update_node(self.board, (x, y), old_value)
 
-    def eventFilter(self, watched, event):
-        gwidth, gheight = self.__calculate_graphics_view_size()
-        step = self.__calculate_row_col_step()
+        return True
 
-        brush = QBrush()
-        brush.setStyle(Qt.SolidPattern)
 
-        border = QPen(Qt.black)
+    def eventFilter(self, watched, event):
         color = self.colors[self.node_types.currentText()]
 
-        if event.type() == QEvent.MouseButtonPress and watched is self.graphics_view.viewport():
-            pos = event.position()
-            x = pos.x() - (pos.x() % step[0])
-            y = pos.y() - (pos.y() % step[1])
+        if event.type() == QEvent.Resize and watched is self.graphics_view.viewport():
+            self.__update_view_transform()
 
-            if event.button() == Qt.LeftButton and self.__update_board_matrix(x, y, color):
-                brush.setColor(color)
-                self.graphics_scene.addRect(QRectF(x, y, step[0], step[1]), border, brush)
+        if event.type() == QEvent.Wheel and watched is self.graphics_view.viewport():
+            self.__zoom_view(1.25 ** (event.angleDelta().y() / 120), event.position())
+            return True
 
-            elif event.button() == Qt.RightButton and self.__update_board_matrix(x, y, self.colors['Empty']):
-                brush.setColor(self.colors['Empty'])
-                self.graphics_scene.addRect(QRectF(x, y, step[0], step[1]), border, brush)
+        if event.type() == QEvent.MouseButtonPress and watched is self.graphics_view.viewport():
+            if event.button() == Qt.LeftButton:
+                self.__update_board_matrix(*self.__node_at(event.position()), color)
+            elif event.button() == Qt.RightButton:
+                self.__update_board_matrix(*self.__node_at(event.position()), self.colors['Empty'])
 
             self.last = event.button()
+            self.last_position = event.position()
 
-        if event.type() == QEvent.MouseMove and watched is self.graphics_view.viewport() and not (self.last == Qt.LeftButton and color in [self.colors['Start point'], self.colors['End point']]):
-            pos = event.position()
-            x = pos.x() - (pos.x() % step[0])
-            y = pos.y() - (pos.y() % step[1])
-            in_board = x <= gwidth or y <= gheight
-            brush.setColor(color) if self.last == Qt.LeftButton else brush.setColor(self.colors['Empty'])
+        if event.type() == QEvent.MouseMove and watched is self.graphics_view.viewport() and self.last == Qt.MiddleButton:
+            self.__pan_view(event.position() - self.last_position)
+            self.last_position = event.position()
+            return True
 
-            if in_board:
-                if self.__update_board_matrix(x, y, brush.color()):
-                    self.graphics_scene.addRect(QRectF(x, y, step[0], step[1]), border, brush)
+        if event.type() == QEvent.MouseMove and watched is self.graphics_view.viewport() and not (self.last == Qt.LeftButton and color in [self.colors['Start point'], self.colors['End point']]):
+            self.__update_board_matrix(*self.__node_at(event.position()), color if self.last == Qt.LeftButton else self.colors['Empty'])
 
         return QWidget.eventFilter(self, watched, event)
-    
-
-    def __set_new_minimum_width(self):
-        ratio = self.cols / self.rows
-        new_min_width = int(round(self.height() * ratio, 0))
-        self.setMinimumWidth(new_min_width + 135)
-
-
-    def resizeEvent(self, event):
-        self.__reload_graphic_view(include_visualization=True)
-        self.__set_new_minimum_width()
 
 
     def __display_warning(self, title, text):
@@ -411,9 +727,27 @@ class PathfindingVisualizer(QMainWindow):
         self.board_saving_window.show()
 
 
+    def __display_race_window(self):
+        if self.start_point is None or not self.end_points:
+            self.__display_warning('Race error', 'Start or end point not found!')
+            return
+
+        # The race works on a copy of the board, editing this one doesn't change it
+        node_colors = {value: self.colors[name] for value, name in self.node_names.items()}
+        self.race_window = RaceWindow(self.board.copy(), self.start_point, list(self.end_points), list(self.algorithm_types),
+                                      node_colors, self.speed_levels, self.diagonal_checkbox.isChecked())
+        self.race_window.show()
+
+
     def __on_save_button(self):
         name = self.board_saving_window.name_input.text()
-        self.board_saver.save_board(name, self.board)
+        try:
+            # Board files keep a single end point, the other ones are saved as empty nodes
+            self.board_saver.save_board(name, self.board, self.start_point, self.end_points[0] if self.end_points else None)
+        except ValueError as e:
+            self.__display_warning('Save error', str(e))
+            return
+
         self.board_saving_window.close()
         self.__update_saved_boards_list()
         self.__reload_graphic_view()
@@ -427,5 +761,7 @@ class PathfindingVisualizer(QMainWindow):
             return
         
         self.__clear_board()
-        self.board = self.board_saver.load_board(name)
+        self.board, self.start_point, end_point = self.board_saver.load_board_with_points(name)
+        self.end_points = [end_point] if end_point is not None else []
+        self.reachability = None
         self.__reload_graphic_view()
\ No newline at end of file
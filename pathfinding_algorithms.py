@@ -1,204 +1,876 @@
+import time
 import numpy as np
 import heapq
+from array import array
+
+
+UNREACHED = np.iinfo(np.int32).max
+
+# Progress events yielded by the algorithms as (event, data) pairs: an expanded node, a node pushed
+# to the frontier and the index of a path node in the flattened board, path nodes come from start to end
+EXPAND = 'expand'
+PUSH = 'push'
+PATH = 'path'
+
+# Cost of entering a node for board values other than empty (0) and wall (1), start and end cost the same as empty
+TERRAIN_COSTS = {6: 3, 7: 5}
+
+# Moves as (row, col) steps, orthogonal ones first (up, down, left, right) and then the diagonal ones
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+# With diagonal moves the cost of entering a node is multiplied by these, their ratio is close to sqrt(2)
+# and costs stay integers for the bucket queue
+ORTHOGONAL_COST = 70
+DIAGONAL_COST = 99
+
+
+def node_costs(board):
+    # Cost of entering every node, walls cost 0 and are never entered
+    costs = (board != 1).astype(np.uint8)
+    for value, cost in TERRAIN_COSTS.items():
+        costs[board == value] = cost
+
+    return costs
+
+
+def octile_distance(d_row, d_col):
+    # Cost of the cheapest path with diagonal moves over empty nodes, in the units of ORTHOGONAL_COST
+    return ORTHOGONAL_COST * max(d_row, d_col) + (DIAGONAL_COST - ORTHOGONAL_COST) * min(d_row, d_col)
+
+
+class SearchGrid:
+    def __init__(self, board, diagonal=False, costs=None):
+        # Node costs can be given instead of the board, e.g. for a part of a board whose costs are already known
+        board_costs = node_costs(board) if costs is None else costs
+        self.rows, self.cols = board_costs.shape
+        self.diagonal = diagonal
+
+        # The board is padded with a ring of walls, so neighbor lookups never need bounds checks
+        self.width = self.cols + 2
+        self.size = (self.rows + 2) * self.width
+
+        costs = np.zeros((self.rows + 2, self.width), dtype=np.uint8)
+        costs[1:-1, 1:-1] = board_costs
+        self.costs = costs.tobytes()
+        self.passable = (costs > 0).astype(np.uint8).tobytes()
+        self.max_cost = int(costs.max())
+        self.weighted = self.max_cost > 1
+
+        # Flat index offsets of the neighboring nodes (up, down, left, right and the diagonal ones with diagonal moves)
+        # and the multipliers of their costs
+        directions = DIRECTIONS if diagonal else DIRECTIONS[:4]
+        self.offsets = tuple(d_row * self.width + d_col for d_row, d_col in directions)
+        step_costs = [ORTHOGONAL_COST] * 4 + [DIAGONAL_COST] * 4 if diagonal else [1] * 4
+        self.max_move_cost = self.max_cost * max(step_costs)
+
+        # Neighbor table: a bit for every move that can be made from a node, walls are left out and a diagonal move
+        # needs both orthogonal nodes next to it passable, so corners are never cut. Expansions look up the
+        # (offset, step cost) pairs of the moves of a node in move_table instead of checking every neighbor
+        passable = costs > 0
+        moves = np.zeros(costs.shape, dtype=np.uint8)
+        rows, cols = costs.shape
+        for bit, (d_row, d_col) in enumerate(directions):
+            allowed = passable[1:-1, 1:-1] & passable[1 + d_row:rows - 1 + d_row, 1 + d_col:cols - 1 + d_col]
+            if d_row and d_col:
+                allowed &= passable[1 + d_row:rows - 1 + d_row, 1:-1] & passable[1:-1, 1 + d_col:cols - 1 + d_col]
+            moves[1:-1, 1:-1] |= allowed.astype(np.uint8) << bit
+        self.moves = moves.tobytes()
+        self.move_table = [tuple((self.offsets[bit], step_costs[bit]) for bit in range(len(directions)) if mask >> bit & 1)
+                           for mask in range(1 << len(directions))]
+
+    def index(self, node):
+        return (int(node[0]) + 1) * self.width + int(node[1]) + 1
+
+    def node(self, index):
+        x, y = divmod(index, self.width)
+        return (x - 1, y - 1)
+
+    def board_index(self, index):
+        # Convert padded index to the index of the node in the flattened board
+        x, y = divmod(index, self.width)
+        return (x - 1) * self.cols + y - 1
+
+    def closed_set(self):
+        return bytearray(self.size)
+
+    def distances(self):
+        return array('i', [UNREACHED]) * self.size
+
+    def predecessors(self):
+        return array('i', [-1]) * self.size
+
+    def reconstruct_path(self, predecessors, end):
+        # Walk the predecessor pointers from the end node back to the start node
+        path = []
+        current = end
+        while current != -1:
+            path.append(self.board_index(current))
+            current = predecessors[current]
+        path.reverse()
+
+        return path
+
+
+class SearchMetrics:
+    # Counters and timings of a single search, the algorithms count frontier operations and mark their phases
+    # and measure_events counts the events and times the algorithm. Time spent by the caller between events,
+    # e.g. on rendering, isn't counted
+    def __init__(self):
+        self.expanded = 0
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.peak_frontier = 0
+        self.path_length = 0
+        # Phase name: [wall time, CPU time of the searching thread] in seconds
+        self.phases = {}
+        self.phase = 'setup'
+        self.clock = None
+
+    def begin_phase(self, name):
+        running = self.clock is not None
+        if running:
+            self.stop_clock()
+        self.phase = name
+        if running:
+            self.start_clock()
+
+    def start_clock(self):
+        self.clock = (time.perf_counter(), time.thread_time())
+
+    def stop_clock(self):
+        wall, cpu = self.clock
+        times = self.phases.setdefault(self.phase, [0.0, 0.0])
+        times[0] += time.perf_counter() - wall
+        times[1] += time.thread_time() - cpu
+        self.clock = None
+
+    def wall_time(self):
+        return sum(wall for wall, _ in self.phases.values())
+
+    def to_dict(self):
+        return {'expanded': self.expanded,
+                'pushes': self.pushes,
+                'pops': self.pops,
+                'stale_pops': self.stale_pops,
+                'peak_frontier': self.peak_frontier,
+                'path_length': self.path_length,
+                'phases': {name: {'wall': wall, 'cpu': cpu} for name, (wall, cpu) in self.phases.items()}}
+
+
+def measure_events(events, metrics):
+    # Events of an algorithm with its running time and the number of expanded, pushed and path nodes put into metrics
+    try:
+        while True:
+            metrics.start_clock()
+            try:
+                event = next(events)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                metrics.stop_clock()
+
+            if event[0] == EXPAND:
+                metrics.expanded += 1
+            elif event[0] == PUSH:
+                metrics.pushes += 1
+            else:
+                metrics.path_length += 1
+            yield event
+    finally:
+        events.close()
+
+
+def collect_events(events, metrics=None):
+    # Gather the events of an algorithm into the visited nodes and the path
+    if metrics is not None:
+        events = measure_events(events, metrics)
+
+    visited, path = [], []
+    for event, data in events:
+        if event == EXPAND:
+            visited.append(data)
+        elif event == PATH:
+            path.append(data)
+
+    return visited, path
+
+
+def path_events(path):
+    for index in path:
+        yield PATH, index
+
+
+def run_search(events):
+    # Run an event generator to the end and return its result
+    while True:
+        try:
+            next(events)
+        except StopIteration as stop:
+            return stop.value
+
+
+def as_events(algorithm):
+    # Event generator for an algorithm that returns its whole (visited, path) result at once,
+    # only its events and times get into the metrics
+    def events(board, start, end, metrics=None):
+        metrics = metrics if metrics is not None else SearchMetrics()
+        metrics.begin_phase('search')
+        visited, path = algorithm(board, start, end)
+        metrics.begin_phase('path')
+        for node in visited:
+            yield EXPAND, node
+        yield from path_events(path)
+
+    return events
+
+
+def dial_search(grid, start_index, end_index=-1, targets=None):
+    # Run Dial's algorithm to the end, returns the padded indices in expansion order with distances and predecessors
+    expanded = []
+    events = dial_events(grid, start_index, end_index, targets=targets)
+    while True:
+        try:
+            event, node = next(events)
+        except StopIteration as stop:
+            distance, predecessors = stop.value
+            return expanded, distance, predecessors
+
+        if event == EXPAND:
+            expanded.append(grid.index(node))
+
+
+def dial_events(grid, start_index, end_index=-1, metrics=None, targets=None):
+    metrics = metrics if metrics is not None else SearchMetrics()
+    # With targets the search stops once all of them are reached, distances of the nodes reached by then are final
+    remaining = set(targets) if targets is not None else None
+    costs = grid.costs
+    moves, move_table = grid.moves, grid.move_table
+
+    distance = grid.distances()
+    distance[start_index] = 0
+    closed = grid.closed_set()
+    predecessors = grid.predecessors()
+
+    # Circular bucket queue (Dial's algorithm), pushed distances are never more than the max cost of a move ahead
+    buckets = [[] for _ in range(grid.max_move_cost + 1)]
+    buckets[0].append(start_index)
+    queued = 1
+    curr_dist = 0
+
+    while queued:
+        bucket = buckets[curr_dist % len(buckets)]
+        if not bucket:
+            curr_dist += 1
+            # No node costs 0, so a bucket is complete once the search gets to it. Its nodes are expanded
+            # in index order like the heap of the other searches pops them, popped from the end
+            buckets[curr_dist % len(buckets)].sort(reverse=True)
+            continue
+
+        curr_index = bucket.pop()
+        queued -= 1
+        metrics.pops += 1
+
+        # Skip stale entries of nodes that were already expanded
+        if closed[curr_index]:
+            metrics.stale_pops += 1
+            continue
+
+        # Check if the current node is the end node (shortest path found), without an end node the whole board is searched
+        if curr_index == end_index:
+            break
+        if remaining is not None and curr_index in remaining:
+            remaining.discard(curr_index)
+            if not remaining:
+                break
+
+        closed[curr_index] = 1
+        yield EXPAND, grid.node(curr_index)
+
+        # Walls are never in the moves of a node
+        for offset, step_cost in move_table[moves[curr_index]]:
+            neighbor = curr_index + offset
+            # Skip already expanded nodes
+            if closed[neighbor]:
+                continue
+
+            tentative_dist = curr_dist + costs[neighbor] * step_cost
+            if tentative_dist < distance[neighbor]:
+                distance[neighbor] = tentative_dist
+                predecessors[neighbor] = curr_index
+                buckets[tentative_dist % len(buckets)].append(neighbor)
+                queued += 1
+                if queued > metrics.peak_frontier:
+                    metrics.peak_frontier = queued
+                yield PUSH, grid.node(neighbor)
+
+    return distance, predecessors
 
 
 class PathfindingAlgorithms:
-    def dijkstra_shortest_path(self, board, start, end):
+    def dijkstra_shortest_path(self, board, start, end, metrics=None, diagonal=False):
+        return collect_events(self.dijkstra_events(board, start, end, metrics, diagonal), metrics)
+
+    def dijkstra_events(self, board, start, end, metrics=None, diagonal=False):
         if start is None or end is None:
             raise ValueError("Start or end point not found!")
-        
-        # Get the number of rows and columns in the board
-        rows, cols = board.shape
 
-        # Initialize an array to store the distance to each node (initialized with infinity)
-        distance = np.inf * np.ones((rows, cols))
-        distance[start] = 0
+        metrics = metrics if metrics is not None else SearchMetrics()
+        grid = SearchGrid(board, diagonal)
+        end_index = grid.index(end)
+        metrics.begin_phase('search')
+        distance, predecessors = yield from dial_events(grid, grid.index(start), end_index, metrics)
+
+        # If the end node was never reached, no path is found
+        if distance[end_index] == UNREACHED:
+            raise RuntimeError('No path found!')
+
+        metrics.begin_phase('path')
+        yield from path_events(grid.reconstruct_path(predecessors, end_index))
+
+    def multi_target_shortest_path(self, board, start, ends, metrics=None, diagonal=False):
+        # Returns the visited nodes and {end point: path}, end points that can't be reached get None
+        events = self.multi_target_events(board, start, ends, metrics, diagonal)
+        if metrics is not None:
+            events = measure_events(events, metrics)
 
-        # Initialize a priority queue to store nodes prioritized by their distance
-        priority_queue = []
-        heapq.heappush(priority_queue, (0, start))
         visited = []
+        while True:
+            try:
+                event, data = next(events)
+            except StopIteration as stop:
+                return visited, stop.value
+
+            if event == EXPAND:
+                visited.append(data)
+
+    def multi_target_events(self, board, start, ends, metrics=None, diagonal=False):
+        # A single Dijkstra search runs until every end point is reached. The path events of the reachable ones
+        # follow one another from the nearest end point, each path from the start node, and the paths by end point
+        # are returned
+        if start is None or not ends:
+            raise ValueError("Start or end point not found!")
 
-        while priority_queue:
-            curr_dist, curr_node = heapq.heappop(priority_queue)
+        metrics = metrics if metrics is not None else SearchMetrics()
+        grid = SearchGrid(board, diagonal)
+        ends = [tuple(int(i) for i in end) for end in ends]
+        end_indices = {grid.index(end) for end in ends}
+        metrics.begin_phase('search')
+        distance, predecessors = yield from dial_events(grid, grid.index(start), metrics=metrics, targets=end_indices)
 
-            # Check if the current node is the end node (shortest path found)
-            if curr_node == end:
-                break
+        reached = sorted((distance[grid.index(end)], grid.index(end), end) for end in set(ends) if distance[grid.index(end)] != UNREACHED)
+        if not reached:
+            raise RuntimeError('No path found!')
 
-            # Mark the current node as visited
-            visited.append(curr_node)
+        metrics.begin_phase('path')
+        paths = dict.fromkeys(ends)
+        for _, end_index, end in reached:
+            paths[end] = grid.reconstruct_path(predecessors, end_index)
+            yield from path_events(paths[end])
 
-            # Get the neighboring nodes (up, down, left, right)
-            neighbors = [(curr_node[0] - 1, curr_node[1]), (curr_node[0] + 1, curr_node[1]),
-                        (curr_node[0], curr_node[1] - 1), (curr_node[0], curr_node[1] + 1)]
+        return paths
 
-            # Check each neighbor
-            for neighbor in neighbors:
-                neighbor_row, neighbor_col = neighbor
-                # Verify if the neighbor is within the bounds of the board
-                if 0 <= neighbor_row < rows and 0 <= neighbor_col < cols:
-                    # Skip walls (obstacles with value 1)
-                    if board[neighbor_row, neighbor_col] == 1:
-                        continue
+    def batch_shortest_paths(self, board, pairs, metrics=None, diagonal=False):
+        # Paths of many (start, goal) pairs, pairs with the same start point share one search.
+        # Returns {(start, goal): path}, goals that can't be reached get None
+        grid = SearchGrid(board, diagonal)
+        paths = {}
+        for start, goals in self.__group_goals(pairs).items():
+            distance, predecessors = self.__settle(grid, start, goals, metrics)
+            for goal in goals:
+                goal_index = grid.index(goal)
+                paths[(start, goal)] = grid.reconstruct_path(predecessors, goal_index) if distance[goal_index] != UNREACHED else None
 
-                    # Calculate the tentative distance to the neighbor
-                    tentative_dist = curr_dist + 1
+        return paths
 
-                    # Update the distance if the tentative distance is shorter
-                    if tentative_dist < distance[neighbor_row, neighbor_col]:
-                        distance[neighbor_row, neighbor_col] = tentative_dist
+    def distance_matrix(self, board, sources, targets, metrics=None, diagonal=False):
+        # Path costs from every source (rows) to every target (columns), one search per source, -1 where there is no path.
+        # With diagonal moves the costs are in units of ORTHOGONAL_COST
+        grid = SearchGrid(board, diagonal)
+        target_indices = [grid.index(target) for target in targets]
+        matrix = np.full((len(sources), len(targets)), -1, dtype=np.int64)
+        for row, source in enumerate(sources):
+            distance, _ = self.__settle(grid, source, targets, metrics)
+            for column, target_index in enumerate(target_indices):
+                if distance[target_index] != UNREACHED:
+                    matrix[row, column] = distance[target_index]
 
-                        # Push the neighbor and its distance to the priority queue
-                        heapq.heappush(priority_queue, (tentative_dist, neighbor))
+        return matrix
 
-        # If the distance to the end node is still infinity, no path is found
-        if distance[end] == np.inf:
-            raise RuntimeError('No path found!')
 
-        # Reconstruct the shortest path from end to start
-        path = []
-        current = end
-        while current != start:
-            path.append(np.ravel_multi_index(current, dims=(rows, cols)))
-            neighbors = [(current[0] - 1, current[1]), (current[0] + 1, current[1]),
-                        (current[0], current[1] - 1), (current[0], current[1] + 1)]
-            for neighbor in neighbors:
-                neighbor_row, neighbor_col = neighbor
-                if 0 <= neighbor_row < rows and 0 <= neighbor_col < cols:
-                    # Find the neighbor with a distance one less than the current node and mark it as the new current node
-                    if distance[neighbor_row, neighbor_col] == distance[current] - 1:
-                        current = neighbor
-                        break
-
-        # Add the start node to the path and reverse the order
-        path.append(np.ravel_multi_index(start, dims=(rows, cols)))
-        path.reverse()
+    def __group_goals(self, pairs):
+        goals = {}
+        for start, goal in pairs:
+            goals.setdefault(tuple(int(i) for i in start), []).append(tuple(int(i) for i in goal))
 
-        return visited, path
+        return {start: list(dict.fromkeys(start_goals)) for start, start_goals in goals.items()}
 
 
-    def heuristic(self, node, end):
-        # Manhattan distance heuristic
-        return abs(node[0] - end[0]) + abs(node[1] - end[1])
+    def __settle(self, grid, start, targets, metrics=None):
+        # Dijkstra from the start node until all targets are reached, returns distances and predecessors
+        metrics = metrics if metrics is not None else SearchMetrics()
+        metrics.begin_phase('search')
+        events = dial_events(grid, grid.index(start), metrics=metrics, targets=[grid.index(target) for target in targets])
 
-    def astar_shortest_path(self, board, start, end):
-        if start is None or end is None:
-            raise ValueError("Start or end point not found!")
+        return run_search(measure_events(events, metrics))
 
-        rows, cols = board.shape
 
-        # Initialize an array to store the distance to each node (initialized with infinity)
-        distance = np.inf * np.ones((rows, cols))
-        distance[start] = 0
+    def heuristic(self, node, end, diagonal=False):
+        # Manhattan distance heuristic, octile distance with diagonal moves
+        d_row, d_col = abs(node[0] - end[0]), abs(node[1] - end[1])
+        return octile_distance(d_row, d_col) if diagonal else d_row + d_col
 
-        priority_queue = []
-        heapq.heappush(priority_queue, (0, start))
+    def astar_shortest_path(self, board, start, end, metrics=None, diagonal=False):
+        return collect_events(self.astar_events(board, start, end, metrics, diagonal), metrics)
 
-        # Initialize a list to keep track of visited nodes
-        visited = []
+    def astar_events(self, board, start, end, metrics=None, diagonal=False):
+        if start is None or end is None:
+            raise ValueError("Start or end point not found!")
+
+        metrics = metrics if metrics is not None else SearchMetrics()
+        grid = SearchGrid(board, diagonal)
+        costs = grid.costs
+        moves, move_table = grid.moves, grid.move_table
+        width = grid.width
+        start_index, end_index = grid.index(start), grid.index(end)
+        end_row, end_col = divmod(end_index, width)
+        # Octile distance is max * ORTHOGONAL_COST + min * (DIAGONAL_COST - ORTHOGONAL_COST), inlined for speed
+        diagonal_extra = DIAGONAL_COST - ORTHOGONAL_COST
+
+        distance = grid.distances()
+        distance[start_index] = 0
+        closed = grid.closed_set()
+        predecessors = grid.predecessors()
+
+        # Heap entries are (priority, index), padded indices sort the same way as (x, y) tuples
+        priority_queue = [(0, start_index)]
+        metrics.begin_phase('search')
 
         while priority_queue:
-            _, curr_node = heapq.heappop(priority_queue)
+            if len(priority_queue) > metrics.peak_frontier:
+                metrics.peak_frontier = len(priority_queue)
+            _, curr_index = heapq.heappop(priority_queue)
+            metrics.pops += 1
+
+            # Skip stale entries of nodes that were already expanded
+            if closed[curr_index]:
+                metrics.stale_pops += 1
+                continue
 
             # Check if the current node is the end node (shortest path found)
-            if curr_node == end:
+            if curr_index == end_index:
                 break
 
-            # Mark the current node as visited
-            visited.append(curr_node)
+            closed[curr_index] = 1
+            yield EXPAND, grid.node(curr_index)
+            curr_dist = distance[curr_index]
+
+            # Walls are never in the moves of a node
+            for offset, step_cost in move_table[moves[curr_index]]:
+                neighbor = curr_index + offset
+                # Skip already expanded nodes
+                if closed[neighbor]:
+                    continue
+
+                tentative_dist = curr_dist + costs[neighbor] * step_cost
+                if tentative_dist < distance[neighbor]:
+                    distance[neighbor] = tentative_dist
+                    predecessors[neighbor] = curr_index
+
+                    # Manhattan (octile with diagonal moves) distance stays admissible, no node costs less than 1 to enter
+                    row, col = divmod(neighbor, width)
+                    d_row, d_col = abs(row - end_row), abs(col - end_col)
+                    if diagonal:
+                        priority = tentative_dist + (ORTHOGONAL_COST * d_row + diagonal_extra * d_col if d_row > d_col
+                                                     else ORTHOGONAL_COST * d_col + diagonal_extra * d_row)
+                    else:
+                        priority = tentative_dist + d_row + d_col
+
+                    heapq.heappush(priority_queue, (priority, neighbor))
+                    yield PUSH, grid.node(neighbor)
+
+        # If the end node was never reached, no path is found
+        if distance[end_index] == UNREACHED:
+            raise RuntimeError('No path found!')
+
+        metrics.begin_phase('path')
+        yield from path_events(grid.reconstruct_path(predecessors, end_index))
+
+
+    def bidirectional_dijkstra_shortest_path(self, board, start, end, metrics=None, diagonal=False):
+        return collect_events(self.bidirectional_dijkstra_events(board, start, end, metrics, diagonal), metrics)
+
+    def bidirectional_dijkstra_events(self, board, start, end, metrics=None, diagonal=False):
+        return self.__bidirectional_search(board, start, end, use_heuristic=False, metrics=metrics, diagonal=diagonal)
 
-            # Get the neighboring nodes (up, down, left, right)
-            neighbors = [(curr_node[0] - 1, curr_node[1]), (curr_node[0] + 1, curr_node[1]),
-                        (curr_node[0], curr_node[1] - 1), (curr_node[0], curr_node[1] + 1)]
+    def bidirectional_astar_shortest_path(self, board, start, end, metrics=None, diagonal=False):
+        return collect_events(self.bidirectional_astar_events(board, start, end, metrics, diagonal), metrics)
 
-            # Check each neighbor
-            for neighbor in neighbors:
-                neighbor_row, neighbor_col = neighbor
-                # Verify if the neighbor is within the bounds of the board
-                if 0 <= neighbor_row < rows and 0 <= neighbor_col < cols:
-                    # Skip walls (obstacles with value 1)
-                    if board[neighbor_row, neighbor_col] == 1:
-                        continue
+    def bidirectional_astar_events(self, board, start, end, metrics=None, diagonal=False):
+        return self.__bidirectional_search(board, start, end, use_heuristic=True, metrics=metrics, diagonal=diagonal)
 
-                    # Calculate the tentative distance to the neighbor
-                    tentative_dist = distance[curr_node] + 1
 
-                    # Update the distance if the tentative distance is shorter
-                    if tentative_dist < distance[neighbor_row, neighbor_col]:
-                        distance[neighbor_row, neighbor_col] = tentative_dist
+    def __bidirectional_search(self, board, start, end, use_heuristic, metrics=None, diagonal=False):
+        if start is None or end is None:
+            raise ValueError("Start or end point not found!")
+
+        metrics = metrics if metrics is not None else SearchMetrics()
+        grid = SearchGrid(board, diagonal)
+        costs = grid.costs
+        moves, move_table = grid.moves, grid.move_table
+        width = grid.width
+        start_index, end_index = grid.index(start), grid.index(end)
+        start_row, start_col = divmod(start_index, width)
+        end_row, end_col = divmod(end_index, width)
+
+        def potential(index):
+            # Estimate to the end node minus the estimate to the start node. Halves of it are the potentials of the searches
+            # (plus for the one from the start node, minus for the other one), which keeps both consistent, so the
+            # searches can stop like bidirectional Dijkstra. Keys are doubled to stay integers
+            if not use_heuristic:
+                return 0
+            row, col = divmod(index, width)
+            to_end, to_start = (abs(row - end_row), abs(col - end_col)), (abs(row - start_row), abs(col - start_col))
+            if diagonal:
+                return octile_distance(*to_end) - octile_distance(*to_start)
+            return sum(to_end) - sum(to_start)
+
+        if start_index == end_index:
+            metrics.begin_phase('path')
+            yield PATH, grid.board_index(start_index)
+            return
+
+        # Side 0 searches from the start node towards the end node, side 1 the other way round
+        sign = (1, -1)
+        distance = (grid.distances(), grid.distances())
+        closed = (grid.closed_set(), grid.closed_set())
+        predecessors = (grid.predecessors(), grid.predecessors())
+        priority_queues = ([(potential(start_index), start_index)], [(-potential(end_index), end_index)])
+        distance[0][start_index] = 0
+        distance[1][end_index] = 0
+
+        # Length of the shortest path found so far and the (node, neighbor, side) edge where both searches met
+        best_dist = UNREACHED
+        meeting = None
+        metrics.begin_phase('search')
+
+        while priority_queues[0] and priority_queues[1]:
+            # No better path can be found once the frontiers have passed the best meeting point
+            if priority_queues[0][0][0] + priority_queues[1][0][0] >= 2 * best_dist:
+                break
 
-                        # Calculate the priority of the neighbor based on the tentative distance and heuristic estimate
-                        priority = tentative_dist + self.heuristic(neighbor, end)
+            # Expand the side with the smaller frontier
+            side = 0 if len(priority_queues[0]) <= len(priority_queues[1]) else 1
+            frontier = len(priority_queues[0]) + len(priority_queues[1])
+            if frontier > metrics.peak_frontier:
+                metrics.peak_frontier = frontier
+            _, curr_index = heapq.heappop(priority_queues[side])
+            metrics.pops += 1
 
-                        # Push the neighbor and its priority to the priority queue
-                        heapq.heappush(priority_queue, (priority, neighbor))
+            if closed[side][curr_index]:
+                metrics.stale_pops += 1
+                continue
 
-        # If the distance to the end node is still infinity, no path is found
-        if distance[end] == np.inf:
+            # Expanded and pushed nodes are (x, y, side) so both frontiers can be told apart
+            closed[side][curr_index] = 1
+            yield EXPAND, grid.node(curr_index) + (side,)
+            curr_dist = distance[side][curr_index]
+            other_distance = distance[1 - side]
+
+            # Walls are never in the moves of a node, and moves are the same both ways
+            for offset, step_cost in move_table[moves[curr_index]]:
+                neighbor = curr_index + offset
+
+                # The search from the start node pays for entering the neighbor, the one from the end node for leaving it
+                tentative_dist = curr_dist + (costs[neighbor] if side == 0 else costs[curr_index]) * step_cost
+
+                if other_distance[neighbor] != UNREACHED and tentative_dist + other_distance[neighbor] < best_dist:
+                    best_dist = tentative_dist + other_distance[neighbor]
+                    meeting = (curr_index, neighbor, side)
+
+                if closed[side][neighbor] or tentative_dist >= distance[side][neighbor]:
+                    continue
+
+                distance[side][neighbor] = tentative_dist
+                predecessors[side][neighbor] = curr_index
+
+                priority = 2 * tentative_dist + sign[side] * potential(neighbor)
+                heapq.heappush(priority_queues[side], (priority, neighbor))
+                yield PUSH, grid.node(neighbor) + (side,)
+
+        if meeting is None:
             raise RuntimeError('No path found!')
 
-        # Reconstruct the shortest path from end to start
-        path = []
-        current = end
-        while current != start:
-            path.append(np.ravel_multi_index(current, dims=(rows, cols)))
-            neighbors = [(current[0] - 1, current[1]), (current[0] + 1, current[1]),
-                        (current[0], current[1] - 1), (current[0], current[1] + 1)]
-            for neighbor in neighbors:
-                neighbor_row, neighbor_col = neighbor
-                if 0 <= neighbor_row < rows and 0 <= neighbor_col < cols:
-                    # Find the neighbor with a distance one less than the current node and mark it as the new current node
-                    if distance[neighbor_row, neighbor_col] == distance[current] - 1 and neighbor in visited:
-                        current = neighbor
-                        break
-
-        # Add the start node to the path and reverse the order
-        path.append(np.ravel_multi_index(start, dims=(rows, cols)))
+        # Join the path from the start node to the meeting edge with the path from the meeting edge to the end node
+        metrics.begin_phase('path')
+        curr_index, neighbor, side = meeting
+        forward_node, backward_node = (curr_index, neighbor) if side == 0 else (neighbor, curr_index)
+
+        yield from path_events(grid.reconstruct_path(predecessors[0], forward_node))
+        current = backward_node
+        while current != -1:
+            yield PATH, grid.board_index(current)
+            current = predecessors[1][current]
+
+
+    def jps_shortest_path(self, board, start, end, metrics=None):
+        return collect_events(self.jps_events(board, start, end, metrics), metrics)
+
+    def jps_events(self, board, start, end, metrics=None):
+        if start is None or end is None:
+            raise ValueError("Start or end point not found!")
+
+        metrics = metrics if metrics is not None else SearchMetrics()
+        grid = SearchGrid(board)
+        if grid.weighted:
+            raise ValueError('Jump Point Search works only on boards without terrain!')
+
+        passable = grid.passable
+        width = grid.width
+        start_index, end_index = grid.index(start), grid.index(end)
+        end_row, end_col = divmod(end_index, width)
+
+        # Search states are jump points together with the direction they were reached from (up, down, left, right)
+        directions = grid.offsets
+        start_state = start_index * 4
+        distance = array('i', [UNREACHED]) * (grid.size * 4)
+        distance[start_state] = 0
+        closed = bytearray(grid.size * 4)
+        predecessors = array('i', [-1]) * (grid.size * 4)
+
+        # Every node scanned by the jumps is shown once, in the order it was first reached,
+        # nodes scanned during an expansion are buffered and yielded after it
+        scanned = grid.closed_set()
+        scanned[start_index] = 1
+        visited = [grid.node(start_index)]
+
+        def scan(index):
+            if not scanned[index]:
+                scanned[index] = 1
+                if index != end_index:
+                    visited.append(grid.node(index))
+
+        # Shortest paths are made canonical by moving vertically first, a horizontal move
+        # turns vertical only when the node behind it blocks the vertical-first alternative
+        def jump_horizontal(index, step):
+            while True:
+                index += step
+                if not passable[index]:
+                    return None
+                scan(index)
+                if index == end_index:
+                    return index
+                for vertical in (-width, width):
+                    if passable[index + vertical] and not passable[index - step + vertical]:
+                        return index
+
+        # Turning horizontally is always allowed after a vertical move, so every node on the way is probed sideways
+        def jump_vertical(index, step):
+            while True:
+                index += step
+                if not passable[index]:
+                    return None
+                scan(index)
+                if index == end_index:
+                    return index
+                if jump_horizontal(index, -1) is not None or jump_horizontal(index, 1) is not None:
+                    return index
+
+        priority_queue = [(0, start_state)]
+        metrics.begin_phase('search')
+
+        while priority_queue:
+            for node in visited:
+                yield EXPAND, node
+            visited.clear()
+
+            if len(priority_queue) > metrics.peak_frontier:
+                metrics.peak_frontier = len(priority_queue)
+            _, curr_state = heapq.heappop(priority_queue)
+            metrics.pops += 1
+
+            if closed[curr_state]:
+                metrics.stale_pops += 1
+                continue
+
+            curr_index, curr_direction = divmod(curr_state, 4)
+            if curr_index == end_index:
+                break
+
+            closed[curr_state] = 1
+            curr_dist = distance[curr_state]
+
+            # Get the jump points reachable from the current node, (direction, jump point) pairs
+            if curr_state == start_state:
+                successors = [(direction, jump_horizontal(curr_index, directions[direction]) if direction > 1 else jump_vertical(curr_index, directions[direction])) for direction in range(4)]
+            elif curr_direction > 1:
+                step = directions[curr_direction]
+                successors = [(curr_direction, jump_horizontal(curr_index, step))]
+                for direction in (0, 1):
+                    vertical = directions[direction]
+                    if passable[curr_index + vertical] and not passable[curr_index - step + vertical]:
+                        successors.append((direction, jump_vertical(curr_index, vertical)))
+            else:
+                successors = [(curr_direction, jump_vertical(curr_index, directions[curr_direction])),
+                              (2, jump_horizontal(curr_index, -1)),
+                              (3, jump_horizontal(curr_index, 1))]
+
+            for direction, jump_point in successors:
+                if jump_point is None:
+                    continue
+
+                state = jump_point * 4 + direction
+                if closed[state]:
+                    continue
+
+                step_count = abs(jump_point - curr_index) if direction > 1 else abs(jump_point - curr_index) // width
+                tentative_dist = curr_dist + step_count
+                if tentative_dist < distance[state]:
+                    distance[state] = tentative_dist
+                    predecessors[state] = curr_state
+
+                    row, col = divmod(jump_point, width)
+                    priority = tentative_dist + abs(row - end_row) + abs(col - end_col)
+                    heapq.heappush(priority_queue, (priority, state))
+                    yield PUSH, grid.node(jump_point)
+        else:
+            # Nodes scanned by the last expansions are still buffered
+            for node in visited:
+                yield EXPAND, node
+            raise RuntimeError('No path found!')
+
+        # Fill in the straight segments between consecutive jump points
+        metrics.begin_phase('path')
+        path = [end_index]
+        state = curr_state
+        while predecessors[state] != -1:
+            state = predecessors[state]
+            index = state // 4
+            step = 1 if abs(index - path[-1]) < width else width
+            if index < path[-1]:
+                step = -step
+            while path[-1] != index:
+                path.append(path[-1] + step)
         path.reverse()
 
-        return visited, path
-    
+        yield from path_events(grid.board_index(index) for index in path)
+
+
+    def dfs_shortest_path(self, board, start, end, metrics=None, diagonal=False):
+        return collect_events(self.dfs_events(board, start, end, metrics, diagonal), metrics)
 
-    def dfs_shortest_path(self, board, start, end):
+    def dfs_events(self, board, start, end, metrics=None, diagonal=False):
         if start is None or end is None:
             raise ValueError("Start or end point not found!")
 
-        rows, cols = board.shape
-        visited = []
-        path = []
+        metrics = metrics if metrics is not None else SearchMetrics()
+        grid = SearchGrid(board, diagonal)
+        moves, move_table = grid.moves, grid.move_table
+        start_index, end_index = grid.index(start), grid.index(end)
 
-        stack = [(start, [start])]
+        closed = grid.closed_set()
+        predecessors = grid.predecessors()
+
+        # The predecessor is overwritten on every push, the latest push is also the first one to be popped
+        stack = [start_index]
+        metrics.begin_phase('search')
         while stack:
-            # Pop the top node and its current path from the stack
-            node, current_path = stack.pop()
+            if len(stack) > metrics.peak_frontier:
+                metrics.peak_frontier = len(stack)
+            curr_index = stack.pop()
+            metrics.pops += 1
 
             # Check if the current node is the end node (path found)
-            if node == end:
-                path = current_path
-                break
+            if curr_index == end_index:
+                metrics.begin_phase('path')
+                yield from path_events(grid.reconstruct_path(predecessors, end_index))
+                return
+
+            if closed[curr_index]:
+                metrics.stale_pops += 1
+                continue
+
+            closed[curr_index] = 1
+            yield EXPAND, grid.node(curr_index)
+
+            for offset, _ in move_table[moves[curr_index]]:
+                neighbor = curr_index + offset
+                # Check if the neighbor has not been visited, obstacles are never in the moves of a node
+                if not closed[neighbor]:
+                    predecessors[neighbor] = curr_index
+                    stack.append(neighbor)
+                    yield PUSH, grid.node(neighbor)
 
-            if node != 1:
-                visited.append(node)
+        # Raise an error if no path is found
+        raise RuntimeError('No path found!')
+
+
+    def wavefront_shortest_path(self, board, start, end, metrics=None):
+        return collect_events(self.wavefront_events(board, start, end, metrics), metrics)
+
+    def wavefront_events(self, board, start, end, metrics=None):
+        metrics = metrics if metrics is not None else SearchMetrics()
+        grid, layers, distance, end_index = self.__wavefront(board, start, end, metrics)
+
+        # Nodes of the last layer are expanded in index order until the end node is reached
+        last_layer = layers.pop()
+        layers.append(last_layer[last_layer < end_index])
+        rows, cols = np.divmod(np.concatenate(layers), grid.width)
+        for node in zip((rows - 1).tolist(), (cols - 1).tolist()):
+            yield EXPAND, node
+
+        # Walk back through the neighbors one layer closer to the start, preferring the earliest expanded one
+        metrics.begin_phase('path')
+        path = [end_index]
+        current = end_index
+        while distance[current] > 0:
+            current = min(current + offset for offset in grid.offsets if distance[current + offset] == distance[current] - 1)
+            path.append(current)
+        path.reverse()
 
-            # Get the neighboring nodes (up, down, left, right)
-            neighbors = [(node[0] - 1, node[1]), (node[0] + 1, node[1]),
-                        (node[0], node[1] - 1), (node[0], node[1] + 1)]
+        yield from path_events(grid.board_index(index) for index in path)
 
-            # Check each neighbor
-            for neighbor in neighbors:
-                neighbor_row, neighbor_col = neighbor
-                # Verify if the neighbor is within the bounds of the board
-                if 0 <= neighbor_row < rows and 0 <= neighbor_col < cols:
-                    # Check if the neighbor has not been visited and is not an obstacle (value 1)
-                    if neighbor not in visited and board[neighbor_row, neighbor_col] != 1:
-                        # Push the neighbor and its updated path to the stack
-                        stack.append((neighbor, current_path + [neighbor]))
+    def wavefront_layers(self, board, start, end):
+        grid, layers, _, _ = self.__wavefront(board, start, end)
 
-        # If a path is found, convert the nodes to their corresponding indices and return the visited nodes and path
-        if path:
-            path = [np.ravel_multi_index(node, dims=(rows, cols)) for node in path]
-            return visited, path
+        return [[grid.node(index) for index in layer.tolist()] for layer in layers]
 
-        # Raise an error if no path is found
-        raise RuntimeError('No path found!')
\ No newline at end of file
+
+    def __wavefront(self, board, start, end, metrics=None):
+        if start is None or end is None:
+            raise ValueError("Start or end point not found!")
+
+        metrics = metrics if metrics is not None else SearchMetrics()
+        grid = SearchGrid(board)
+        if grid.weighted:
+            raise ValueError('Wavefront BFS works only on boards without terrain!')
+
+        offsets = np.array(grid.offsets)
+        start_index, end_index = grid.index(start), grid.index(end)
+
+        # Walls are marked as reached up front, so a single lookup filters both
+        reached = np.frombuffer(grid.passable, dtype=np.uint8) == 0
+        distance = np.full(grid.size, -1, dtype=np.int32)
+
+        frontier = np.array([start_index])
+        reached[start_index] = True
+        distance[start_index] = 0
+        layers = []
+        metrics.begin_phase('search')
+
+        # Whole layers are the frontier, every node of a layer is pushed and popped once
+        while frontier.size:
+            layers.append(frontier)
+            metrics.pushes += frontier.size
+            metrics.pops += frontier.size
+            metrics.peak_frontier = max(metrics.peak_frontier, frontier.size)
+            if distance[end_index] >= 0:
+                return grid, layers, distance, end_index
+
+            # Expand the whole frontier at once, np.unique keeps every layer in index order
+            neighbors = (frontier[:, None] + offsets).ravel()
+            frontier = np.unique(neighbors[~reached[neighbors]])
+            reached[frontier] = True
+            distance[frontier] = len(layers)
+
+        raise RuntimeError('No path found!')
@@ -0,0 +1,335 @@
+import time
+import numpy as np
+from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel, QPushButton, QComboBox, QListWidget, QListWidgetItem,
+                               QSplitter, QSlider, QGraphicsView, QGraphicsScene, QMessageBox)
+from PySide6.QtCore import Qt, QEvent, QTimer
+from board_renderer import BoardItem
+from animation import RaceWorker
+from algorithm_race import run_race_entry
+
+
+class RacePanel(QWidget):
+    # One algorithm of a race, its nodes are shown up to the position of the shared timeline
+    def __init__(self, name, board, node_colors):
+        super().__init__()
+        self.name = name
+        self.board = board
+        self.result = None
+        self.failed = False
+        self.shown = 0
+
+        self.title = QLabel(f'{name}\nRunning...')
+        self.graphics_view = QGraphicsView()
+        self.graphics_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.graphics_view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.graphics_scene = QGraphicsScene()
+        self.board_item = BoardItem(board.shape, node_colors)
+        self.graphics_scene.addItem(self.board_item)
+        self.graphics_view.setScene(self.graphics_scene)
+        self.graphics_view.viewport().installEventFilter(self)
+
+        self.visualization_nodes = np.zeros(board.shape)
+        self.board_item.render(self.board, self.visualization_nodes)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.title)
+        layout.addWidget(self.graphics_view, stretch=1)
+        self.setLayout(layout)
+
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Resize:
+            self.graphics_view.fitInView(self.board_item.boundingRect(), Qt.KeepAspectRatio)
+
+        return super().eventFilter(watched, event)
+
+
+    def set_result(self, result):
+        self.result = result
+        self.show_nodes(0)
+
+
+    def set_error(self, message):
+        self.failed = True
+        self.title.setText(f'{self.name}\n{message}')
+
+
+    def node_count(self, fraction, mode, max_nodes, max_time):
+        # Nodes shown at a fraction of the timeline, which goes either by painted nodes or by search time
+        if mode == 'Steps':
+            return min(int(fraction * max_nodes), len(self.result['nodes']))
+
+        return int(np.interp(fraction * max_time, self.result['checkpoint_times'], self.result['checkpoint_counts']))
+
+
+    def show_nodes(self, count):
+        nodes, values = self.result['nodes'], self.result['values']
+        visited_count = self.result['visited_count']
+
+        # Going back or far ahead is rendered at once, small steps only update the new nodes
+        if count < self.shown or count - self.shown > self.board.size // 8:
+            self.visualization_nodes[:] = 0
+            self.shown = 0
+            full_render = True
+        else:
+            full_render = False
+
+        # Path nodes come after the visited ones and are put on top of them
+        new_nodes = nodes[self.shown:count]
+        for part in [slice(0, max(visited_count - self.shown, 0)), slice(max(visited_count - self.shown, 0), None)]:
+            self.visualization_nodes.flat[new_nodes[part]] = values[self.shown:count][part]
+        self.shown = count
+
+        if full_render:
+            self.board_item.render(self.board, self.visualization_nodes)
+        else:
+            new_nodes = np.unique(new_nodes)
+            new_values = self.visualization_nodes.flat[new_nodes]
+            for value in np.unique(new_values):
+                xs, ys = np.divmod(new_nodes[new_values == value], self.board.shape[1])
+                self.board_item.set_nodes(xs, ys, value)
+
+        self.__update_title()
+
+
+    def __update_title(self):
+        visited_count = self.result['visited_count']
+        path_length = len(self.result['nodes']) - visited_count
+        search_time = self.result['checkpoint_times'][-1] * 1000
+
+        lines = [self.name,
+                 f'visited {min(self.shown, visited_count)}/{visited_count}, path {max(self.shown - visited_count, 0)}/{path_length}',
+                 f'search {search_time:.1f} ms, {visited_count / max(search_time, 1e-3):.0f} nodes/ms']
+        if self.result['error'] is not None:
+            lines.append(self.result['error'])
+        self.title.setText('\n'.join(lines))
+
+
+
+class RaceWindow(QWidget):
+    # Several algorithms solve the same board, each one in its own process, and are played back side by side
+    def __init__(self, board, start, end_points, algorithm_names, node_colors, speed_levels, diagonal=False):
+        super().__init__()
+        self.setWindowTitle('Algorithm race')
+        self.setMinimumSize(930, 635)
+        self.resize(1400, 800)
+
+        self.board = board
+        self.start = start
+        self.end_points = end_points
+        self.diagonal = diagonal
+        self.node_colors = node_colors
+        self.speed_levels = speed_levels
+        self.panels = {}
+        self.panels_per_row = 3
+        self.worker = None
+
+        # Playback position in seconds, the whole timeline takes duration seconds and goes up to
+        # the most nodes or the longest search time of the algorithms
+        self.position = 0.0
+        self.duration = 0.0
+        self.max_nodes = 0
+        self.max_time = 0.0
+        self.timer = QTimer(self)
+        self.timer.setInterval(16)
+        self.timer.timeout.connect(self.__on_frame)
+
+        self.algorithms_list = QListWidget()
+        for name in algorithm_names:
+            item = QListWidgetItem(name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if name in ['Dijkstra\'s Algorithm', 'A* Search', 'Bidirectional A*'] else Qt.Unchecked)
+            self.algorithms_list.addItem(item)
+
+        self.race_button = QPushButton('Start race')
+        self.race_button.setMinimumSize(120, 50)
+
+        self.speed = QComboBox()
+        self.speed.setMinimumSize(120, 35)
+        self.speed.addItems(self.speed_levels.keys())
+        self.speed.setToolTip('Nodes painted per second by the algorithm with the most nodes')
+
+        self.timeline_mode = QComboBox()
+        self.timeline_mode.setMinimumSize(120, 35)
+        self.timeline_mode.addItems(['Steps', 'Search time'])
+        self.timeline_mode.setToolTip('Play back by painted nodes or by the time every algorithm took')
+
+        self.play_button = QPushButton('Play')
+        self.play_button.setMinimumSize(120, 35)
+        self.play_button.setEnabled(False)
+
+        self.timeline = QSlider(Qt.Horizontal)
+        self.timeline.setRange(0, 1000)
+        self.timeline.setEnabled(False)
+
+        self.race_button.clicked.connect(self.__start_race)
+        self.play_button.clicked.connect(self.__on_play_button)
+        self.timeline.valueChanged.connect(self.__on_timeline_moved)
+        self.timeline_mode.currentTextChanged.connect(self.__show_position)
+        self.speed.currentTextChanged.connect(self.__update_duration)
+
+        menu_layout = QVBoxLayout()
+        menu_layout.addWidget(self.algorithms_list)
+        menu_layout.addWidget(self.race_button)
+        menu_layout.addWidget(self.speed)
+        menu_layout.addWidget(self.timeline_mode)
+        menu_layout.addWidget(self.play_button)
+        menu_widget = QWidget()
+        menu_widget.setLayout(menu_layout)
+        menu_widget.setMinimumWidth(200)
+        menu_widget.setMaximumWidth(250)
+
+        self.splitter = QSplitter(Qt.Vertical)
+        race_layout = QVBoxLayout()
+        race_layout.addWidget(self.splitter, stretch=1)
+        race_layout.addWidget(self.timeline)
+
+        layout = QHBoxLayout()
+        layout.addWidget(menu_widget)
+        layout.addLayout(race_layout, stretch=1)
+        self.setLayout(layout)
+
+
+    def __start_race(self):
+        names = [self.algorithms_list.item(i).text() for i in range(self.algorithms_list.count())
+                 if self.algorithms_list.item(i).checkState() == Qt.Checked]
+        if not names:
+            QMessageBox.warning(self, 'Race error', 'Choose at least one algorithm!')
+            return
+
+        self.__cancel_race()
+        for panel in self.panels.values():
+            panel.deleteLater()
+        self.panels = {name: RacePanel(name, self.board, self.node_colors) for name in names}
+
+        # Panels are split into rows of at most panels_per_row views
+        while self.splitter.count():
+            self.splitter.widget(0).deleteLater()
+            self.splitter.widget(0).setParent(None)
+        for row in range(0, len(names), self.panels_per_row):
+            row_splitter = QSplitter(Qt.Horizontal)
+            for name in names[row:row + self.panels_per_row]:
+                row_splitter.addWidget(self.panels[name])
+            self.splitter.addWidget(row_splitter)
+
+        self.worker = RaceWorker(run_race_entry, names, self.board, self.start, self.end_points, self.diagonal)
+        self.worker.result.connect(self.__on_result)
+        self.worker.failed.connect(self.__on_failed)
+        self.worker.start()
+
+
+    def __on_result(self, result):
+        if self.sender().cancelled:
+            return
+
+        self.panels[result['name']].set_result(result)
+        self.__start_playback()
+
+
+    def __on_failed(self, name, message):
+        if self.sender().cancelled:
+            return
+
+        self.panels[name].set_error(message)
+        self.__start_playback()
+
+
+    def __finished_panels(self):
+        # Panels of algorithms with results, None until every algorithm is done
+        if any(panel.result is None and not panel.failed for panel in self.panels.values()):
+            return None
+
+        return [panel for panel in self.panels.values() if panel.result is not None]
+
+
+    def __start_playback(self):
+        # Playback starts once every algorithm is done, the timeline is shared by all of them
+        panels = self.__finished_panels()
+        if not panels:
+            return
+
+        self.max_nodes = max(len(panel.result['nodes']) for panel in panels)
+        self.max_time = max(panel.result['checkpoint_times'][-1] for panel in panels)
+        self.position = 0.0
+        self.__update_duration()
+        self.timeline.setEnabled(True)
+        self.play_button.setEnabled(True)
+        self.__play()
+
+
+    def __update_duration(self):
+        # The algorithm with the most nodes paints them at the chosen speed, in both timeline modes
+        if not self.__finished_panels():
+            return
+
+        fraction = self.position / self.duration if self.duration else 0.0
+        self.duration = max(self.max_nodes / self.speed_levels[self.speed.currentText()], 0.001)
+        self.position = fraction * self.duration
+
+
+    def __play(self):
+        if self.position >= self.duration:
+            self.position = 0.0
+
+        self.last_frame = time.perf_counter()
+        self.timer.start()
+        self.play_button.setText('Pause')
+
+
+    def __pause(self):
+        self.timer.stop()
+        self.play_button.setText('Play')
+
+
+    def __on_play_button(self):
+        if self.timer.isActive():
+            self.__pause()
+        else:
+            self.__play()
+
+
+    def __on_frame(self):
+        now = time.perf_counter()
+        self.position = min(self.position + now - self.last_frame, self.duration)
+        self.last_frame = now
+
+        self.timeline.blockSignals(True)
+        self.timeline.setValue(round(self.position / self.duration * self.timeline.maximum()))
+        self.timeline.blockSignals(False)
+        self.__show_position()
+
+        if self.position >= self.duration:
+            self.__pause()
+
+
+    def __on_timeline_moved(self, value):
+        self.position = value / self.timeline.maximum() * self.duration
+        self.__show_position()
+
+
+    def __show_position(self):
+        if not self.duration:
+            return
+
+        fraction = self.position / self.duration
+        mode = self.timeline_mode.currentText()
+        for panel in self.__finished_panels():
+            panel.show_nodes(panel.node_count(fraction, mode, self.max_nodes, self.max_time))
+
+
+    def __cancel_race(self):
+        self.__pause()
+        self.duration = 0.0
+        self.timeline.setValue(0)
+        self.timeline.setEnabled(False)
+        self.play_button.setEnabled(False)
+        if self.worker is not None:
+            self.worker.cancelled = True
+
+
+    def closeEvent(self, event):
+        self.__cancel_race()
+        if self.worker is not None:
+            self.worker.wait()
+        super().closeEvent(event)
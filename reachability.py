@@ -0,0 +1,209 @@
+from collections import deque
+import numpy as np
+
+
+# Neighbors of a node around it in circular order, orthogonal ones at even positions
+RING = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+
+# Nodes searched to find out whether a new wall splits its component, beyond that the board is labeled again before the next query
+SEPARATION_BUDGET = 5000
+
+
+def label_components(passable):
+    # Connected components of the passable nodes (4-connected), labels are numbered from 0 and walls get -1.
+    # Nodes are grouped into runs along board lines first, runs of neighboring lines that touch are joined
+    cols, rows = passable.shape
+    flat = passable.ravel()
+    run_starts = passable.copy()
+    run_starts[:, 1:] &= ~passable[:, :-1]
+    runs = np.cumsum(run_starts.ravel()) - 1
+    run_count = int(runs[-1]) + 1 if flat.size else 0
+
+    # Touching runs of neighboring lines, consecutive duplicates are dropped
+    touching = (passable[:-1] & passable[1:]).ravel()
+    first = runs[:-rows][touching] if rows else runs[:0]
+    second = runs[rows:][touching]
+    keep = np.ones(len(first), dtype=bool)
+    keep[1:] = (first[1:] != first[:-1]) | (second[1:] != second[:-1])
+    first, second = first[keep], second[keep]
+
+    # Trees of runs are hooked onto the smallest neighboring root and flattened by pointer jumping, all edges at once.
+    # Roots only ever point to smaller ones, so no cycles are made
+    parent = np.arange(run_count)
+    while len(first):
+        first_root, second_root = parent[first], parent[second]
+        crossing = first_root != second_root
+        first_root, second_root = first_root[crossing], second_root[crossing]
+        np.minimum.at(parent, np.maximum(first_root, second_root), np.minimum(first_root, second_root))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+        # Edges inside a single tree are done
+        first, second = first[crossing], second[crossing]
+
+    labels = np.full(flat.size, -1, dtype=np.int32)
+    labels[flat] = np.unique(parent, return_inverse=True)[1][runs[flat]]
+
+    return labels.reshape(passable.shape)
+
+
+class ReachabilityIndex:
+    # Connected components of the board kept up to date as nodes change. Labels of merged components are
+    # joined in a union-find instead of relabeling the board, so removing a wall is O(1)
+    def __init__(self, board):
+        self.passable = board != 1
+        self.__label()
+
+    def component(self, node):
+        if self.stale:
+            self.__label()
+
+        label = int(self.labels[node])
+        return -1 if label < 0 else self.__find(label)
+
+    def reachable(self, start, end):
+        component = self.component(start)
+        return component >= 0 and component == self.component(end)
+
+    def region(self, node):
+        # Mask of the nodes reachable from the node
+        component = self.component(node)
+        if component < 0:
+            return np.zeros(self.labels.shape, dtype=bool)
+
+        return self.__components() == component
+
+    def update_node(self, board, node, old_value):
+        # Only turning a node into a wall or back changes the components, terrain and points don't
+        x, y = node
+        passable = board[x, y] != 1
+        if passable == (old_value != 1):
+            return
+
+        self.passable[x, y] = passable
+        if self.stale:
+            return
+        if passable:
+            self.__add_node(x, y)
+        else:
+            self.__remove_node(x, y)
+
+    def __label(self):
+        self.labels = label_components(self.passable)
+        self.parent = list(range(int(self.labels.max()) + 1))
+        # Set when a split couldn't be resolved locally, the next query labels the board again
+        self.stale = False
+
+    def __find(self, label):
+        parent = self.parent
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    def __components(self):
+        # Component of every node, labels are resolved to their roots by pointer jumping
+        roots = np.array(self.parent)
+        while True:
+            grandparent = roots[roots]
+            if np.array_equal(grandparent, roots):
+                break
+            roots = grandparent
+
+        return np.where(self.labels >= 0, roots[self.labels], -1)
+
+    def __neighbors(self, x, y):
+        cols, rows = self.passable.shape
+        return [(x + dx, y + dy) for dx, dy in RING[::2] if 0 <= x + dx < cols and 0 <= y + dy < rows and self.passable[x + dx, y + dy]]
+
+    def __add_node(self, x, y):
+        # A new node joins the components around it into one
+        components = {self.component(neighbor) for neighbor in self.__neighbors(x, y)}
+        if not components:
+            self.parent.append(len(self.parent))
+            self.labels[x, y] = len(self.parent) - 1
+            return
+
+        target = components.pop()
+        for component in components:
+            self.parent[component] = target
+        self.labels[x, y] = target
+
+    def __remove_node(self, x, y):
+        self.labels[x, y] = -1
+        groups = self.__neighbor_groups(x, y)
+        if len(groups) > 1:
+            self.__separate(groups)
+
+    def __separate(self, starts):
+        # Searches from one neighbor of every group run in turns and join when they meet. A search that runs out
+        # of nodes first has found a part cut off by the new wall, which gets a new label, the last one keeps the old label
+        cols, rows = self.passable.shape
+        owner = {start: search for search, start in enumerate(starts)}
+        joined = list(range(len(starts)))
+        queues = {search: deque([start]) for search, start in enumerate(starts)}
+        nodes = {search: [start] for search, start in enumerate(starts)}
+
+        def find(search):
+            while joined[search] != search:
+                search = joined[search]
+            return search
+
+        while len(queues) > 1:
+            if len(owner) > SEPARATION_BUDGET:
+                self.stale = True
+                return
+
+            for search in list(queues):
+                if search not in queues:
+                    continue
+
+                queue = queues[search]
+                if not queue:
+                    # Cut off part, nothing else can reach it
+                    del queues[search]
+                    xs, ys = zip(*nodes.pop(search))
+                    self.labels[list(xs), list(ys)] = len(self.parent)
+                    self.parent.append(len(self.parent))
+                    if len(queues) == 1:
+                        return
+                    continue
+
+                x, y = queue.popleft()
+                for dx, dy in RING[::2]:
+                    neighbor = (x + dx, y + dy)
+                    if not (0 <= neighbor[0] < cols and 0 <= neighbor[1] < rows and self.passable[neighbor]):
+                        continue
+
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = search
+                        queue.append(neighbor)
+                        nodes[search].append(neighbor)
+                        continue
+
+                    # Both searches are in the same part, the smaller one is added to the larger one
+                    other = find(other)
+                    if other != search:
+                        if len(nodes[other]) > len(nodes[search]):
+                            search, other = other, search
+                        joined[other] = search
+                        queues[search].extend(queues.pop(other))
+                        nodes[search].extend(nodes.pop(other))
+                        queue = queues[search]
+
+    def __neighbor_groups(self, x, y):
+        # One neighbor of every group of neighbors joined through the nodes around the removed one,
+        # an orthogonal neighbor reaches the next one through the diagonal node between them
+        cols, rows = self.passable.shape
+        ring = [0 <= x + dx < cols and 0 <= y + dy < rows and bool(self.passable[x + dx, y + dy]) for dx, dy in RING]
+
+        groups = [(x + RING[i][0], y + RING[i][1]) for i in range(0, 8, 2) if ring[i] and not (ring[i - 1] and ring[i - 2])]
+        # A ring passable all around has no start of a group
+        if not groups and any(ring[::2]):
+            return [(x + RING[0][0], y + RING[0][1])]
+
+        return groups
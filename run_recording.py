@@ -0,0 +1,166 @@
+import os
+import struct
+import json
+from array import array
+import numpy as np
+from pathfinding_algorithms import SearchMetrics, EXPAND, PATH
+from board_saving import board_content_hash, board_values
+
+
+# Run recordings are a fixed size header followed by sections in this order: algorithm name (UTF-8), points as int32 (x, y)
+# pairs (start point first, (-1, -1) when not set, then the end points), visited nodes as int32 flat board indices, their
+# values as int8 (4 from the start point, 8 from the end point), path as int32 flat board indices, checkpoints as int32
+# recorded node counts and float64 seconds of search time, and metrics with the error of the run as JSON.
+# Header: magic, version, header size, cols, rows, blake2b hash of the board values, lengths of the sections
+RUN_MAGIC = b'PFRR'
+RUN_VERSION = 1
+RUN_HEADER = struct.Struct('<4sHHII16s6I')
+RUN_HEADER_SIZE = 64
+
+
+def board_hash(board):
+    # Same hash as the one of saved boards, start and end points don't change it
+    return board_content_hash(board_values(board)).hex()
+
+
+class RunRecorder:
+    # Collects the events of a search into a run, which can be written to a recording and played back without the algorithm
+    def __init__(self, algorithm, board, start, end_points):
+        self.algorithm = algorithm
+        self.shape = board.shape
+        self.board_hash = board_hash(board)
+        self.start = start
+        self.end_points = list(end_points)
+
+        self.visited, self.visited_values, self.path = array('i'), array('b'), array('i')
+        self.checkpoint_counts, self.checkpoint_times = [0], [0.0]
+
+    def add_event(self, event, data):
+        if event == EXPAND:
+            self.visited.append(data[0] * self.shape[1] + data[1])
+            # Nodes expanded by the search from the end point of bidirectional algorithms are (x, y, 1)
+            self.visited_values.append(8 if len(data) == 3 and data[2] == 1 else 4)
+        elif event == PATH:
+            self.path.append(data)
+
+    def add_events(self, events):
+        for event, data in events:
+            self.add_event(event, data)
+
+    def add_checkpoint(self, search_time):
+        self.checkpoint_counts.append(len(self.visited) + len(self.path))
+        self.checkpoint_times.append(search_time)
+
+    def finish(self, metrics, error=None):
+        self.add_checkpoint(metrics.wall_time())
+
+        return {'algorithm': self.algorithm,
+                'shape': self.shape,
+                'board_hash': self.board_hash,
+                'start': self.start,
+                'end_points': self.end_points,
+                'visited': np.frombuffer(self.visited, dtype=np.int32),
+                'visited_values': np.frombuffer(self.visited_values, dtype=np.int8),
+                'path': np.frombuffer(self.path, dtype=np.int32),
+                'checkpoint_counts': np.array(self.checkpoint_counts, dtype=np.int32),
+                'checkpoint_times': np.array(self.checkpoint_times),
+                'metrics': metrics.to_dict(),
+                'error': error}
+
+
+def write_run(path, run):
+    name = run['algorithm'].encode()
+    points = np.array([run['start'] or (-1, -1), *run['end_points']], dtype=np.int32)
+    info = json.dumps({'metrics': run['metrics'], 'error': run['error']}).encode()
+    sections = [name, points, run['visited'].astype(np.int32), run['visited_values'].astype(np.int8), run['path'].astype(np.int32),
+                run['checkpoint_counts'].astype(np.int32), run['checkpoint_times'].astype(np.float64), info]
+
+    header = RUN_HEADER.pack(RUN_MAGIC, RUN_VERSION, RUN_HEADER_SIZE, *run['shape'], bytes.fromhex(run['board_hash']),
+                             len(name), len(points), len(run['visited']), len(run['path']), len(run['checkpoint_counts']), len(info))
+
+    # Written next to the target and renamed like boards, a failed write leaves the old recording
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(header.ljust(RUN_HEADER_SIZE, b'\0'))
+        for section in sections:
+            file.write(section if isinstance(section, bytes) else section.tobytes())
+    os.replace(temp_path, path)
+
+
+def read_run(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    if len(data) < RUN_HEADER.size:
+        raise ValueError(f'{path} is not a run recording!')
+    magic, version, header_size, cols, rows, content_hash, name_length, point_count, visited_count, path_count, checkpoint_count, info_length = \
+        RUN_HEADER.unpack_from(data)
+    if magic != RUN_MAGIC:
+        raise ValueError(f'{path} is not a run recording!')
+    if version > RUN_VERSION:
+        raise ValueError(f'{path} was recorded by a newer version (format {version})!')
+
+    offset = header_size
+    def section(dtype, count):
+        nonlocal offset
+        values = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += values.nbytes
+        return values
+
+    name = section(np.uint8, name_length).tobytes().decode()
+    points = [tuple(int(i) for i in point) for point in section(np.int32, point_count * 2).reshape(-1, 2)]
+    visited, visited_values, run_path = section(np.int32, visited_count), section(np.int8, visited_count), section(np.int32, path_count)
+    checkpoint_counts, checkpoint_times = section(np.int32, checkpoint_count), section(np.float64, checkpoint_count)
+    info = json.loads(section(np.uint8, info_length).tobytes())
+
+    return {'algorithm': name,
+            'shape': (cols, rows),
+            'board_hash': content_hash.hex(),
+            'start': points[0] if points[0][0] >= 0 else None,
+            'end_points': points[1:],
+            'visited': visited,
+            'visited_values': visited_values,
+            'path': run_path,
+            'checkpoint_counts': checkpoint_counts,
+            'checkpoint_times': checkpoint_times,
+            'metrics': info['metrics'],
+            'error': info['error']}
+
+
+def metrics_from_dict(data):
+    # SearchMetrics back from SearchMetrics.to_dict, e.g. of a recorded run to show them next to its replay
+    metrics = SearchMetrics()
+    for name in ['expanded', 'pushes', 'pops', 'stale_pops', 'peak_frontier', 'path_length']:
+        setattr(metrics, name, data[name])
+    metrics.phases = {phase: [times['wall'], times['cpu']] for phase, times in data['phases'].items()}
+
+    return metrics
+
+
+def solver_run(board, result):
+    # Run of a solver result, e.g. to record the runs of the benchmark
+    recorder = RunRecorder(result['algorithm'], board, result['start'], [result['end']])
+    recorder.add_events((EXPAND, node) for node in result['visited'])
+    recorder.add_events((PATH, index) for index in result['path'])
+
+    return recorder.finish(metrics_from_dict(result['metrics']))
+
+
+def painted_nodes(run):
+    # Nodes of a run as the visualizer paints them, visited nodes and then the path with their values, start and end points
+    # are left out. Also returns the number of visited ones and how many nodes are painted after every recorded node
+    rows = run['shape'][1]
+    points = [point[0] * rows + point[1] for point in [run['start'], *run['end_points']] if point is not None]
+    visited_painted, path_painted = ~np.isin(run['visited'], points), ~np.isin(run['path'], points)
+
+    nodes = np.concatenate([run['visited'][visited_painted], run['path'][path_painted]])
+    values = np.concatenate([run['visited_values'][visited_painted], np.full(np.count_nonzero(path_painted), 5, dtype=np.int8)])
+    painted_counts = np.concatenate([[0], np.cumsum(np.concatenate([visited_painted, path_painted]))])
+
+    return nodes, values, int(np.count_nonzero(visited_painted)), painted_counts
+
+
+def runs_match(run, other):
+    # Same board, same nodes visited in the same order and the same path, times may differ
+    return (run['board_hash'] == other['board_hash'] and np.array_equal(run['visited'], other['visited'])
+            and np.array_equal(run['visited_values'], other['visited_values']) and np.array_equal(run['path'], other['path']))
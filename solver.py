@@ -0,0 +1,175 @@
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from pathfinding_algorithms import PathfindingAlgorithms, SearchMetrics
+from hierarchical_planner import HierarchicalPlanner
+from board_saving import BoardSaver
+
+
+# Algorithm name: (attribute of the Solver, method of it)
+ALGORITHMS = {'dijkstra': ('pf_algorithms', 'dijkstra_shortest_path'),
+              'astar': ('pf_algorithms', 'astar_shortest_path'),
+              'dfs': ('pf_algorithms', 'dfs_shortest_path'),
+              'wavefront': ('pf_algorithms', 'wavefront_shortest_path'),
+              'jps': ('pf_algorithms', 'jps_shortest_path'),
+              'bidijkstra': ('pf_algorithms', 'bidirectional_dijkstra_shortest_path'),
+              'biastar': ('pf_algorithms', 'bidirectional_astar_shortest_path'),
+              'hpa': ('hierarchical_planner', 'shortest_path')}
+
+# Algorithms that can also move to diagonal neighbors
+DIAGONAL_ALGORITHMS = ['dijkstra', 'astar', 'dfs', 'bidijkstra', 'biastar']
+
+BOARD_SIZES = ['Small', 'Medium', 'Large']
+
+
+def find_point(board, value):
+    points = np.argwhere(board == value)
+    if len(points) == 0:
+        return None
+
+    return tuple(int(i) for i in points[0])
+
+
+def parse_board_size(text):
+    # Menu sizes by name or custom sizes as "ROWSxCOLS", both name the directories of saved boards
+    if text.capitalize() in BOARD_SIZES:
+        return text.capitalize()
+
+    try:
+        rows, cols = (int(i) for i in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{text} is neither one of {", ".join(BOARD_SIZES)} nor "ROWSxCOLS"')
+    return f'{rows}x{cols}'
+
+
+def parse_point(text):
+    if text is None:
+        return None
+
+    x, y = text.split(',')
+    return (int(x), int(y))
+
+
+class Solver:
+    def __init__(self):
+        self.pf_algorithms = PathfindingAlgorithms()
+        # Keeps its cluster graphs between solves, boards of the same size only rebuild the clusters that differ
+        self.hierarchical_planner = HierarchicalPlanner()
+
+    def get_algorithm(self, name):
+        if name not in ALGORITHMS:
+            raise ValueError(f'Unknown algorithm: {name}!')
+
+        owner, method = ALGORITHMS[name]
+        return getattr(getattr(self, owner), method)
+
+    def solve(self, board, algorithm, start=None, end=None, diagonal=False):
+        # Points can be passed explicitly, e.g. the ones from a board file header, otherwise they are looked up on the board
+        start = start if start is not None else find_point(board, 2)
+        end = end if end is not None else find_point(board, 3)
+
+        algorithm_function = self.get_algorithm(algorithm)
+        if diagonal and algorithm not in DIAGONAL_ALGORITHMS:
+            raise ValueError(f'{algorithm} moves only to orthogonal neighbors!')
+        options = {'diagonal': True} if diagonal else {}
+
+        metrics = SearchMetrics()
+        start_time = time.perf_counter()
+        visited, path = algorithm_function(board, start, end, metrics, **options)
+        elapsed = time.perf_counter() - start_time
+
+        return {'algorithm': algorithm,
+                'start': start,
+                'end': end,
+                'visited': visited,
+                'path': path,
+                'time': elapsed,
+                'metrics': metrics.to_dict()}
+
+
+def result_to_json(name, result):
+    return {'board': name,
+            'algorithm': result['algorithm'],
+            'start': [int(i) for i in result['start']],
+            'end': [int(i) for i in result['end']],
+            'visited': [[int(i) for i in node] for node in result['visited']],
+            'path': [int(node) for node in result['path']],
+            'time': result['time'],
+            'metrics': result['metrics']}
+
+
+def write_jsonl(results, file):
+    for name, result in results:
+        if isinstance(result, Exception):
+            line = {'board': name, 'error': str(result)}
+        else:
+            line = result_to_json(name, result)
+        file.write(json.dumps(line) + '\n')
+
+
+def write_npz(results, output):
+    arrays = {}
+    for name, result in results:
+        if isinstance(result, Exception):
+            continue
+        # Bidirectional algorithms add the expanding side as a third column
+        visited = np.array(result['visited'], dtype=np.int32)
+        arrays[f'{name}/visited'] = visited if visited.ndim == 2 else visited.reshape(-1, 2)
+        arrays[f'{name}/path'] = np.array(result['path'], dtype=np.int32)
+        arrays[f'{name}/endpoints'] = np.array([result['start'], result['end']], dtype=np.int32)
+
+    np.savez(output, **arrays)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m solver', description='Solve saved boards without the GUI.')
+    parser.add_argument('boards', nargs='*', help='names of saved boards (all boards of the size if omitted)')
+    parser.add_argument('-s', '--size', default='Medium', type=parse_board_size,
+                        help=f'{", ".join(BOARD_SIZES)} or a custom size as "ROWSxCOLS"')
+    parser.add_argument('-a', '--algorithm', default='dijkstra', choices=ALGORITHMS.keys())
+    parser.add_argument('--start', type=parse_point, help='start point as "x,y"')
+    parser.add_argument('--end', type=parse_point, help='end point as "x,y"')
+    parser.add_argument('--diagonal', action='store_true', help=f'move to diagonal neighbors too ({", ".join(DIAGONAL_ALGORITHMS)})')
+    parser.add_argument('-f', '--format', default='jsonl', choices=['jsonl', 'npz'])
+    parser.add_argument('-o', '--output', help='output file (stdout for jsonl if omitted)')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    solver = Solver()
+
+    # Solving only reads boards, the library index isn't built
+    board_saver = BoardSaver(args.size, index=False)
+    names = args.boards or sorted(board_saver.get_boards_names())
+
+    results = []
+    for name in names:
+        # A missing or corrupt board fails only its own line. Binary boards keep their start and end points
+        # in the header, JSON boards have none
+        try:
+            board, start, end = board_saver.load_board_with_points(name)
+            start = args.start if args.start is not None else start
+            end = args.end if args.end is not None else end
+            results.append((name, solver.solve(board, args.algorithm, start, end, args.diagonal)))
+        except (OSError, ValueError, RuntimeError) as e:
+            results.append((name, e))
+
+    if args.format == 'npz':
+        if not args.output:
+            raise SystemExit('Output file is required for npz format!')
+        write_npz(results, args.output)
+    elif args.output:
+        with open(args.output, 'w') as file:
+            write_jsonl(results, file)
+    else:
+        write_jsonl(results, sys.stdout)
+
+    return 0 if all(not isinstance(result, Exception) for _, result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import heapq
+from collections import deque
+import numpy as np
+from pathfinding_algorithms import TERRAIN_COSTS, ORTHOGONAL_COST, DIAGONAL_COST
+
+
+# Plain reference searches over (x, y) tuples that the algorithms are checked against
+
+
+def node_cost(board, node):
+    value = int(board[node])
+    return 0 if value == 1 else TERRAIN_COSTS.get(value, 1)
+
+
+def moves(board, node, diagonal=False):
+    # Moves as (neighbor, step cost multiplier), diagonal moves never cut corners
+    cols, rows = board.shape
+    x, y = node
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbor = (x + dx, y + dy)
+            if (dx, dy) == (0, 0) or (dx and dy and not diagonal):
+                continue
+            if not (0 <= neighbor[0] < cols and 0 <= neighbor[1] < rows) or not node_cost(board, neighbor):
+                continue
+            if dx and dy:
+                if not node_cost(board, (x + dx, y)) or not node_cost(board, (x, y + dy)):
+                    continue
+                yield neighbor, DIAGONAL_COST
+            else:
+                yield neighbor, ORTHOGONAL_COST if diagonal else 1
+
+
+def reference_distances(board, start, diagonal=False):
+    distance = {start: 0}
+    queue = [(0, start)]
+    while queue:
+        dist, node = heapq.heappop(queue)
+        if dist > distance[node]:
+            continue
+        for neighbor, step_cost in moves(board, node, diagonal):
+            tentative = dist + node_cost(board, neighbor) * step_cost
+            if tentative < distance.get(neighbor, tentative + 1):
+                distance[neighbor] = tentative
+                heapq.heappush(queue, (tentative, neighbor))
+
+    return distance
+
+
+def path_cost(board, path, start, end, diagonal=False):
+    # Checks that the path is made of legal moves between the points and returns its cost
+    rows = board.shape[1]
+    nodes = [divmod(int(index), rows) for index in path]
+    assert nodes[0] == tuple(start) and nodes[-1] == tuple(end)
+
+    cost = 0
+    for node, next_node in zip(nodes, nodes[1:]):
+        step_costs = dict(moves(board, node, diagonal))
+        assert next_node in step_costs
+        cost += node_cost(board, next_node) * step_costs[next_node]
+
+    return cost
+
+
+def components(board):
+    # Component of every passable node by BFS
+    labels = {}
+    for node in map(tuple, np.argwhere(board != 1).tolist()):
+        if node in labels:
+            continue
+        labels[node] = node
+        queue = deque([node])
+        while queue:
+            current = queue.popleft()
+            for neighbor, _ in moves(board, current):
+                if neighbor not in labels:
+                    labels[neighbor] = node
+                    queue.append(neighbor)
+
+    return labels
+
+
+def random_board(rng, weighted, density=0.3):
+    cols, rows = rng.integers(2, 20, 2)
+    values, p = ([0, 1, 6, 7], [1 - density - 0.15, density, 0.1, 0.05]) if weighted else ([0, 1], [1 - density, density])
+    board = rng.choice(values, size=(cols, rows), p=p).astype(np.int8)
+
+    cells = np.argwhere(board != 1)
+    if len(cells) < 2:
+        board[0, 0], board[-1, -1] = 0, 0
+        cells = np.argwhere(board != 1)
+    start, end = (tuple(int(i) for i in cells[i]) for i in rng.choice(len(cells), 2, replace=False))
+    board[start], board[end] = 2, 3
+
+    return board, start, end
+
+
+def boards(seed, count, weighted):
+    rng = np.random.default_rng(seed)
+    return [random_board(rng, weighted) for _ in range(count)]
+
+
+def solve(algorithm, board, start, end, **options):
+    # Path of the algorithm or None when there is no path
+    try:
+        return algorithm(board, start, end, **options)[1]
+    except RuntimeError:
+        return None
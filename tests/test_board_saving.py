@@ -0,0 +1,149 @@
+import json
+import os
+import numpy as np
+import pytest
+from board_saving import (BOARD_HEADER, BOARD_VERSION, BoardSaver, board_values, write_binary_board, write_board_lines,
+                          read_binary_board, read_board_header)
+
+
+def weighted_board():
+    board = np.random.default_rng(8).choice([0, 1, 6, 7], size=(9, 7)).astype(np.uint8)
+    board[0, 0], board[8, 6] = 2, 3
+    return board
+
+
+def test_binary_board_round_trip(tmp_path):
+    path = str(tmp_path / 'board.board')
+    board = weighted_board()
+    write_binary_board(path, board, (0, 0), (8, 6))
+
+    values, header = read_binary_board(path, verify=True)
+    assert (header['shape'], header['start'], header['end'], header['version']) == ((9, 7), (0, 0), (8, 6), BOARD_VERSION)
+    # Start and end points are kept in the header only
+    assert values.tolist() == board_values(board).tolist() and values[0, 0] == 0
+
+
+def test_boards_without_points(tmp_path):
+    path = str(tmp_path / 'board.board')
+    write_binary_board(path, np.zeros((3, 4)))
+    header = read_board_header(path)
+    assert header['start'] is None and header['end'] is None
+
+
+def test_boards_are_mapped_copy_on_write(tmp_path):
+    path = str(tmp_path / 'board.board')
+    write_binary_board(path, np.zeros((5, 5)))
+
+    values, _ = read_binary_board(path)
+    assert isinstance(values, np.memmap)
+    values[2, 2] = 1
+    assert read_binary_board(path, verify=True)[0][2, 2] == 0
+
+
+def test_written_lines_match_the_whole_board(tmp_path):
+    board = weighted_board()
+    write_binary_board(str(tmp_path / 'whole.board'), board)
+    write_board_lines(str(tmp_path / 'lines.board'), board.shape, (line for line in board_values(board)))
+
+    assert read_board_header(str(tmp_path / 'whole.board'))['hash'] == read_board_header(str(tmp_path / 'lines.board'))['hash']
+    with pytest.raises(ValueError):
+        write_board_lines(str(tmp_path / 'short.board'), board.shape, board[:3])
+
+
+def test_corrupted_boards_fail_verification(tmp_path):
+    path = tmp_path / 'board.board'
+    write_binary_board(str(path), np.zeros((5, 5)))
+    data = bytearray(path.read_bytes())
+    data[-1] = 1
+    path.write_bytes(bytes(data))
+
+    read_binary_board(str(path))
+    with pytest.raises(ValueError, match='corrupted'):
+        read_binary_board(str(path), verify=True)
+
+
+@pytest.mark.parametrize('field, value, message', [(0, b'JSON', 'not a board'), (1, BOARD_VERSION + 1, 'newer version')])
+def test_unknown_files_are_rejected(tmp_path, field, value, message):
+    path = tmp_path / 'board.board'
+    write_binary_board(str(path), np.zeros((5, 5)))
+    data = bytearray(path.read_bytes())
+    header = list(BOARD_HEADER.unpack_from(data))
+    header[field] = value
+    BOARD_HEADER.pack_into(data, 0, *header)
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match=message):
+        read_board_header(str(path))
+
+
+def test_truncated_files_are_rejected(tmp_path):
+    path = tmp_path / 'board.board'
+    path.write_bytes(b'PFVB')
+    with pytest.raises(ValueError, match='not a board'):
+        read_board_header(str(path))
+
+
+@pytest.fixture
+def board_saver(tmp_path, monkeypatch):
+    # Boards and the library are saved under ./saved_boards
+    monkeypatch.chdir(tmp_path)
+    return BoardSaver('small')
+
+
+def test_duplicates_are_rejected(board_saver):
+    board = weighted_board()
+    board_saver.save_board('first', board)
+    # Saving again under the same name replaces the board, points don't count for duplicates
+    board_saver.save_board('first', board, (0, 0), (8, 6))
+    with pytest.raises(ValueError, match='first'):
+        board_saver.save_board('second', board_values(board), (1, 1))
+    # Duplicates are found in other size directories too
+    with pytest.raises(ValueError, match='first'):
+        BoardSaver('large').save_board('third', board)
+
+    assert board_saver.get_boards_names() == ['first']
+
+
+def test_listing_filters_and_pages(board_saver):
+    for name, walls in [('b', 1), ('a', 3), ('c', 5), ('ab', 2)]:
+        board = np.zeros((5, 5), dtype=np.uint8)
+        board[0, :walls] = 1
+        board_saver.save_board(name, board)
+
+    assert [board['name'] for board in board_saver.list_boards(order='density')] == ['b', 'ab', 'a', 'c']
+    assert [board['name'] for board in board_saver.list_boards(order='name', limit=2, offset=1)] == ['ab', 'b']
+    assert [board['name'] for board in board_saver.list_boards(order='name', name='a')] == ['a', 'ab']
+    assert [board['name'] for board in board_saver.list_boards(order='name', min_density=0.1, max_density=0.15)] == ['a']
+    assert board_saver.thumbnail('c').shape == (5, 5) and board_saver.thumbnail('missing') is None
+
+
+def test_library_follows_files_changed_outside(board_saver):
+    board_saver.save_board('kept', np.zeros((5, 5)))
+    board_saver.save_board('changed', np.ones((5, 5)))
+    board_saver.save_board('removed', np.eye(5))
+    boards_path = board_saver.boards_path
+
+    os.remove(os.path.join(boards_path, 'removed.board'))
+    write_binary_board(os.path.join(boards_path, 'changed.board'), np.full((5, 5), 6))
+    os.utime(os.path.join(boards_path, 'changed.board'), (0, 0))
+    with open(os.path.join(boards_path, 'added.json'), 'w') as file:
+        json.dump(np.eye(5)[::-1].tolist(), file)
+    # Unreadable files aren't indexed
+    with open(os.path.join(boards_path, 'broken.board'), 'wb') as file:
+        file.write(b'broken')
+
+    board_saver = BoardSaver('small')
+    assert board_saver.get_boards_names() == ['added', 'changed', 'kept']
+    assert board_saver.thumbnail('changed').tolist() == np.full((5, 5), 6).tolist()
+    assert [board['wall_density'] for board in board_saver.list_boards(name='added')] == [0.2]
+
+
+def test_boards_are_read_without_the_index(board_saver):
+    board_saver.save_board('board', np.zeros((5, 5)), (0, 0), (4, 4))
+    os.remove('saved_boards/library.sqlite')
+
+    reader = BoardSaver('small', index=False)
+    assert reader.get_boards_names() == ['board']
+    assert reader.load_board_with_points('board')[1:] == ((0, 0), (4, 4))
+    assert BoardSaver('large', index=False).get_boards_names() == []
+    assert sorted(os.listdir('saved_boards')) == ['small']
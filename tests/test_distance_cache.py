@@ -0,0 +1,42 @@
+import numpy as np
+import distance_cache
+from distance_cache import DistanceFieldCache
+from reference import reference_distances, path_cost, random_board, solve
+
+
+def test_cache_follows_edits():
+    # The cache keeps fields between queries, the board is edited between them
+    rng = np.random.default_rng(4)
+    for _ in range(40):
+        board, start, end = random_board(rng, weighted=True)
+        cache = DistanceFieldCache()
+        for _ in range(5):
+            expected = reference_distances(board, start).get(end)
+            path = solve(cache.shortest_path, board, start, end)
+            assert (path is None) == (expected is None)
+            if path is not None:
+                assert path_cost(board, path, start, end) == expected
+
+            node = tuple(int(i) for i in rng.integers(0, board.shape))
+            if node not in (start, end):
+                old_value = int(board[node])
+                board[node] = rng.choice([0, 1, 6, 7])
+                cache.update_node(board, node, old_value)
+
+
+def test_board_is_hashed_only_after_changes(monkeypatch):
+    hashed = []
+    monkeypatch.setattr(distance_cache, 'board_hash', lambda costs: hashed.append(costs) or str(len(hashed)))
+    board = np.zeros((8, 8), dtype=np.int8)
+    cache = DistanceFieldCache()
+
+    cache.shortest_path(board, (0, 0), (7, 7))
+    visited, path = cache.shortest_path(board, (0, 0), (7, 0))
+    assert len(hashed) == 1 and visited == [] and len(path) == 8
+
+    # An edit keeps the field, the next query hashes the edited board once
+    board[3, 3] = 1
+    cache.update_node(board, (3, 3), 0)
+    cache.shortest_path(board, (0, 0), (7, 7))
+    cache.shortest_path(board, (0, 0), (7, 7))
+    assert len(hashed) == 2 and len(cache.fields) == 1
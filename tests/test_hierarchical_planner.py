@@ -0,0 +1,46 @@
+import numpy as np
+from pathfinding_algorithms import node_costs
+from hierarchical_planner import ClusterGraph, HierarchicalPlanner
+from reference import reference_distances, path_cost, random_board, boards, solve
+
+
+def test_planner_finds_valid_paths():
+    # Paths aren't always the shortest ones, they must exist exactly when a path does
+    planner = HierarchicalPlanner(cluster_size=4)
+    for board, start, end in boards(5, 150, weighted=True):
+        expected = reference_distances(board, start).get(end)
+        path = solve(planner.shortest_path, board, start, end)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert path_cost(board, path, start, end) >= expected
+
+
+def test_cluster_edges_match_searches_inside_the_cluster():
+    # Edges of all abstract nodes of a cluster come from a single search, they must match searches from each of them
+    for board, _, _ in boards(12, 40, weighted=True):
+        for cluster_size in [3, 4, 7]:
+            graph = ClusterGraph(node_costs(board), cluster_size)
+            for nodes in graph.nodes.values():
+                for node in nodes:
+                    assert graph.intra_edges(node) == graph.distances(node, nodes - {node})
+
+
+def test_updated_graphs_match_new_ones():
+    rng = np.random.default_rng(13)
+    for _ in range(30):
+        board, _, _ = random_board(rng, weighted=True)
+        graph = ClusterGraph(node_costs(board), 4)
+        for _ in range(5):
+            # Edges of the old board are built before the edits, updates have to drop the changed ones
+            for node in list(graph.partners):
+                graph.intra_edges(node)
+            for node in map(tuple, rng.integers(0, board.shape, (3, 2))):
+                board[node] = rng.choice([0, 1, 6, 7])
+            graph.update(node_costs(board))
+
+            new_graph = ClusterGraph(node_costs(board), 4)
+            # Borders are rebuilt in another order, so the partners may be too
+            assert {node: set(partners) for node, partners in graph.partners.items()} == \
+                   {node: set(partners) for node, partners in new_graph.partners.items()}
+            for node in new_graph.partners:
+                assert graph.intra_edges(node) == new_graph.intra_edges(node)
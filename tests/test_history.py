@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from history import SegmentHistory
+from maze_generator import MazeGenerator
+
+
+def test_nodes_round_trip():
+    rng = np.random.default_rng(9)
+    for _ in range(50):
+        shape = tuple(int(i) for i in rng.integers(1, 12, 2))
+        # Lines along both axes and scattered nodes, with repeated values so that runs join
+        indices = np.concatenate([np.arange(0, shape[0] * shape[1], shape[1]), rng.integers(0, shape[0] * shape[1], 30),
+                                  np.arange(shape[1])]).tolist()
+        values = rng.choice([4, 5], len(indices), p=[0.9, 0.1]).tolist()
+
+        history = SegmentHistory(shape)
+        history.add_nodes(indices, values)
+        assert list(history.cells()) == [(*divmod(index, shape[1]), value) for index, value in zip(indices, values)]
+        assert history.node_count() == len(indices) and len(history) <= len(indices)
+
+
+def test_lines_take_a_single_run():
+    history = SegmentHistory((20, 30))
+    history.add_nodes(range(30, 60), [4] * 30)
+    history.add_nodes(range(5, 600, 30), [5] * 20)
+    assert len(history) == 2 and history.nbytes() == 2 * 13
+
+
+@pytest.mark.parametrize('method', ['generate', 'generate_kruskal', 'generate_eller'])
+def test_maze_history_draws_the_maze(method):
+    generator = MazeGenerator((23, 33))
+    board, history = getattr(generator, method)(3)
+
+    drawn = np.full(board.shape, generator.initial_value)
+    for x, y, value in history.cells():
+        drawn[x, y] = value
+    assert np.array_equal(drawn, board)
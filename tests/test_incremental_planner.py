@@ -0,0 +1,37 @@
+import numpy as np
+from incremental_planner import IncrementalPlanner
+from reference import reference_distances, path_cost, random_board, solve
+
+
+def test_planner_follows_edits():
+    # The planner keeps state between queries, the board is edited between them
+    rng = np.random.default_rng(4)
+    for _ in range(40):
+        board, start, end = random_board(rng, weighted=True)
+        planner = IncrementalPlanner()
+        for _ in range(5):
+            expected = reference_distances(board, start).get(end)
+            path = solve(planner.shortest_path, board, start, end)
+            assert (path is None) == (expected is None)
+            if path is not None:
+                assert path_cost(board, path, start, end) == expected
+
+            node = tuple(int(i) for i in rng.integers(0, board.shape))
+            if node not in (start, end):
+                board[node] = rng.choice([0, 1, 6, 7])
+
+
+def test_unchanged_board_is_not_searched_again():
+    board = np.zeros((20, 20), dtype=np.int8)
+    planner = IncrementalPlanner()
+    visited, path = planner.shortest_path(board, (0, 0), (19, 19))
+    assert visited
+
+    visited, same_path = planner.shortest_path(board, (0, 0), (19, 19))
+    assert visited == [] and list(same_path) == list(path)
+
+    # Repairing the old search after a new wall expands fewer nodes than searching again
+    board[10, :19] = 1
+    visited, path = planner.shortest_path(board, (0, 0), (19, 19))
+    assert 0 < len(visited) < len(IncrementalPlanner().shortest_path(board, (0, 0), (19, 19))[0])
+    assert path_cost(board, path, (0, 0), (19, 19)) == reference_distances(board, (0, 0))[(19, 19)]
@@ -0,0 +1,45 @@
+import inspect
+import sys
+import numpy as np
+import pytest
+from board_saving import read_binary_board
+from maze_generator import MazeGenerator, write_eller_maze
+from reference import components
+
+
+METHODS = ['generate', 'generate_kruskal', 'generate_eller']
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_same_seed_gives_the_same_maze(method):
+    mazes = [getattr(MazeGenerator((23, 33)), method)(seed)[0] for seed in [1, 1, 2]]
+    assert np.array_equal(mazes[0], mazes[1]) and not np.array_equal(mazes[0], mazes[2])
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_mazes_are_connected(method):
+    # Board sizes are always odd, maze cells lie at odd coordinates
+    for shape in [(5, 5), (23, 33), (33, 23), (41, 41)]:
+        board, _ = getattr(MazeGenerator(shape), method)(0)
+        assert board.shape == shape
+        assert len(set(components(board).values())) == 1
+
+
+@pytest.mark.parametrize('shape', [(23, 33), (24, 34), (3, 9), (1, 1)])
+def test_streamed_eller_maze_matches_the_generator(tmp_path, shape):
+    path = str(tmp_path / 'maze.board')
+    write_eller_maze(path, shape, 5)
+    board, _ = read_binary_board(path, verify=True)
+    assert np.array_equal(board, MazeGenerator(shape).generate_eller(5)[0])
+
+
+def test_large_mazes_are_not_recursive():
+    # Chambers are divided level by level, so large boards don't need more stack than small ones
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 20)
+    try:
+        board, history = MazeGenerator((4001, 4001)).generate(0, record_history=False)
+    finally:
+        sys.setrecursionlimit(limit)
+    assert history is None and board.shape == (4001, 4001)
+    assert board[1::2, 1::2].sum() == 0
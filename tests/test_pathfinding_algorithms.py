@@ -0,0 +1,211 @@
+import numpy as np
+import pytest
+from pathfinding_algorithms import PathfindingAlgorithms, SearchGrid, SearchMetrics, EXPAND, PATH
+from benchmark import make_board
+from reference import reference_distances, path_cost, boards, solve
+
+
+# Algorithms that find the cheapest path, with whether they are checked on boards with terrain too
+SHORTEST_PATH_CASES = [('dijkstra', False), ('astar', False), ('wavefront', False), ('jps', False), ('dijkstra', True),
+                       ('astar', True), ('bidirectional_dijkstra', False), ('bidirectional_astar', False),
+                       ('bidirectional_dijkstra', True), ('bidirectional_astar', True)]
+
+
+@pytest.mark.parametrize('name, weighted', SHORTEST_PATH_CASES)
+def test_shortest_paths(name, weighted):
+    algorithm = getattr(PathfindingAlgorithms(), f'{name}_shortest_path')
+    for board, start, end in boards(1, 150, weighted):
+        expected = reference_distances(board, start).get(end)
+        path = solve(algorithm, board, start, end)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert path_cost(board, path, start, end) == expected
+
+
+@pytest.mark.parametrize('name', ['dijkstra', 'astar', 'bidirectional_dijkstra', 'bidirectional_astar'])
+def test_diagonal_shortest_paths(name):
+    algorithm = getattr(PathfindingAlgorithms(), f'{name}_shortest_path')
+    for board, start, end in boards(2, 150, weighted=True):
+        expected = reference_distances(board, start, diagonal=True).get(end)
+        path = solve(algorithm, board, start, end, diagonal=True)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert path_cost(board, path, start, end, diagonal=True) == expected
+
+
+@pytest.mark.parametrize('weighted, diagonal', [(False, False), (True, False), (True, True)])
+def test_dfs_finds_a_path(weighted, diagonal):
+    pf_algorithms = PathfindingAlgorithms()
+    for board, start, end in boards(3, 150, weighted):
+        expected = reference_distances(board, start, diagonal).get(end)
+        path = solve(pf_algorithms.dfs_shortest_path, board, start, end, diagonal=diagonal)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            path_cost(board, path, start, end, diagonal)
+
+
+def test_octile_heuristic_guides_astar():
+    # The octile estimate is exact on an open board, A* expands only the nodes on some shortest path
+    board = np.zeros((30, 20))
+    expanded = {}
+    for name in ['dijkstra', 'astar']:
+        metrics = SearchMetrics()
+        getattr(PathfindingAlgorithms(), f'{name}_shortest_path')(board, (0, 0), (29, 19), metrics=metrics, diagonal=True)
+        expanded[name] = metrics.expanded
+    # Those are the nodes with y <= x <= y + 10, the end node isn't expanded
+    assert expanded['astar'] < 20 * 11 < expanded['dijkstra']
+
+
+@pytest.mark.parametrize('weighted', [False, True])
+def test_dijkstra_expansion_order(weighted):
+    # Nodes are expanded by distance and nodes of the same distance in index order, up to the end node
+    for board, start, end in boards(10, 150, weighted):
+        distance = reference_distances(board, start)
+        order = sorted((dist, node) for node, dist in distance.items())
+        if end in distance:
+            order = [item for item in order if item < (distance[end], end)]
+
+        # Searches without a path still expand every reachable node
+        visited = []
+        try:
+            for event, data in PathfindingAlgorithms().dijkstra_events(board, start, end):
+                if event == EXPAND:
+                    visited.append(data)
+        except RuntimeError:
+            pass
+        assert visited == [node for _, node in order]
+
+
+def test_wavefront_matches_dijkstra():
+    # Layers are expanded in index order, which is the order Dijkstra expands nodes of the same distance in
+    pf_algorithms = PathfindingAlgorithms()
+    for board, start, end in boards(9, 150, weighted=False):
+        if solve(pf_algorithms.dijkstra_shortest_path, board, start, end) is None:
+            with pytest.raises(RuntimeError):
+                pf_algorithms.wavefront_shortest_path(board, start, end)
+            continue
+
+        visited, path = pf_algorithms.wavefront_shortest_path(board, start, end)
+        expected_visited, expected_path = pf_algorithms.dijkstra_shortest_path(board, start, end)
+        assert list(visited) == list(expected_visited) and list(path) == list(expected_path)
+
+
+def test_jps_without_path_scans_every_reachable_node():
+    # Scans are buffered until the next expansion, the last ones must still come before the error
+    for board, start, end in boards(11, 150, weighted=False):
+        reachable = reference_distances(board, start)
+        if end in reachable:
+            continue
+
+        scanned = set()
+        with pytest.raises(RuntimeError):
+            for event, data in PathfindingAlgorithms().jps_events(board, start, end):
+                if event == EXPAND:
+                    scanned.add(data)
+        assert scanned == set(reachable)
+
+
+@pytest.mark.parametrize('rows, cols', [(23, 33), (65, 79)])
+def test_bidirectional_astar_expands_fewer_nodes_than_astar(rows, cols):
+    # Benchmark mazes of the Small and Large classes, summed over the seeds
+    pf_algorithms = PathfindingAlgorithms()
+    expanded = {}
+    for seed in range(10):
+        board, start, end = make_board(rows, cols, seed)
+        for name in ['astar', 'bidirectional_astar']:
+            metrics = SearchMetrics()
+            getattr(pf_algorithms, f'{name}_shortest_path')(board, start, end, metrics=metrics)
+            expanded[name] = expanded.get(name, 0) + metrics.expanded
+    assert expanded['bidirectional_astar'] < expanded['astar']
+
+
+def random_goals(rng, board):
+    return [tuple(int(i) for i in node) for node in rng.integers(0, board.shape, (3, 2)) if board[tuple(node)] != 1]
+
+
+def test_multi_target_paths():
+    pf_algorithms = PathfindingAlgorithms()
+    rng = np.random.default_rng(6)
+    for board, start, _ in boards(6, 60, weighted=True):
+        goals = random_goals(rng, board)
+        if not goals:
+            continue
+        distance = reference_distances(board, start)
+
+        try:
+            _, paths = pf_algorithms.multi_target_shortest_path(board, start, goals)
+        except RuntimeError:
+            assert not any(goal in distance for goal in goals)
+            continue
+        assert set(paths) == set(goals)
+        for goal, path in paths.items():
+            assert (path is None) == (goal not in distance)
+            if path is not None:
+                assert path_cost(board, path, start, goal) == distance[goal]
+
+
+def test_multi_target_events_follow_one_another():
+    # Path events come from the nearest end point on, the view paints them as they come
+    board = np.zeros((5, 5))
+    events = PathfindingAlgorithms().multi_target_events(board, (0, 0), [(4, 4), (0, 2), (2, 0)])
+    path_nodes = []
+    while True:
+        try:
+            event, data = next(events)
+        except StopIteration as stop:
+            paths = stop.value
+            break
+        if event == PATH:
+            path_nodes.append(data)
+
+    assert [len(path) for path in paths.values()] == [9, 3, 3]
+    assert path_nodes == paths[(0, 2)] + paths[(2, 0)] + paths[(4, 4)]
+
+
+def test_batch_queries():
+    pf_algorithms = PathfindingAlgorithms()
+    rng = np.random.default_rng(6)
+    for board, start, _ in boards(6, 60, weighted=True):
+        goals = random_goals(rng, board)
+        if not goals:
+            continue
+        distance = reference_distances(board, start)
+
+        matrix = pf_algorithms.distance_matrix(board, [start], goals)
+        assert matrix[0].tolist() == [distance.get(goal, -1) for goal in goals]
+
+        paths = pf_algorithms.batch_shortest_paths(board, [(start, goal) for goal in goals])
+        for goal in goals:
+            path = paths[(start, goal)]
+            assert (path is None) == (goal not in distance)
+            if path is not None:
+                assert path_cost(board, path, start, goal) == distance[goal]
+
+
+@pytest.mark.parametrize('name', ['wavefront', 'jps'])
+def test_unit_cost_algorithms_reject_terrain(name):
+    board = np.zeros((3, 3))
+    board[1, 1] = 6
+    with pytest.raises(ValueError):
+        getattr(PathfindingAlgorithms(), f'{name}_shortest_path')(board, (0, 0), (2, 2))
+
+
+def test_missing_points():
+    board = np.zeros((3, 3))
+    for name in ['dijkstra', 'astar', 'dfs']:
+        with pytest.raises(ValueError):
+            getattr(PathfindingAlgorithms(), f'{name}_shortest_path')(board, None, (2, 2))
+
+
+def test_search_grid_indices():
+    board = np.zeros((4, 6))
+    board[1, 2] = 1
+    grid = SearchGrid(board)
+    for node in [(0, 0), (1, 3), (3, 5)]:
+        index = grid.index(node)
+        assert grid.node(index) == node
+        assert grid.board_index(index) == node[0] * 6 + node[1]
+    assert not grid.passable[grid.index((1, 2))]
+    # The padding ring is never passable
+    assert not grid.passable[grid.index((0, 0)) - 1] and not grid.passable[grid.index((3, 5)) + grid.width]
+
@@ -0,0 +1,33 @@
+import numpy as np
+from reachability import ReachabilityIndex
+from reference import components
+
+
+def test_index_follows_edits():
+    rng = np.random.default_rng(7)
+    for _ in range(40):
+        board = (rng.random(tuple(rng.integers(2, 16, 2))) < 0.35).astype(np.int8)
+        index = ReachabilityIndex(board)
+        for _ in range(20):
+            node = tuple(int(i) for i in rng.integers(0, board.shape))
+            old_value = int(board[node])
+            board[node] = 1 - old_value
+            index.update_node(board, node, old_value)
+
+            labels = components(board)
+            nodes = list(labels)
+            for first, second in zip(nodes, nodes[1:]):
+                assert index.reachable(first, second) == (labels[first] == labels[second])
+
+
+def test_regions_and_walls():
+    board = np.zeros((5, 5), dtype=np.int8)
+    board[2, :] = 1
+    index = ReachabilityIndex(board)
+    assert index.region((0, 0)).sum() == 10 and not index.reachable((0, 0), (4, 4))
+    assert index.component((2, 2)) == -1 and not index.region((2, 2)).any()
+
+    # Terrain doesn't change the components
+    board[2, 2] = 6
+    index.update_node(board, (2, 2), 1)
+    assert index.reachable((0, 0), (4, 4)) and index.region((4, 4)).sum() == 21
@@ -0,0 +1,37 @@
+import glob
+import os
+import pytest
+from pathfinding_algorithms import PathfindingAlgorithms, SearchMetrics
+from benchmark import make_board
+from solver import Solver
+from run_recording import RunRecorder, solver_run, write_run, read_run, runs_match, painted_nodes
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def test_recordings_round_trip(tmp_path):
+    board, start, end = make_board(23, 33, 0, 0.2)
+    metrics = SearchMetrics()
+    recorder = RunRecorder('Bidirectional A*', board, start, [end])
+    recorder.add_events(PathfindingAlgorithms().bidirectional_astar_events(board, start, end, metrics))
+    run = recorder.finish(metrics)
+
+    write_run(str(tmp_path / 'run.run'), run)
+    loaded = read_run(str(tmp_path / 'run.run'))
+    assert runs_match(loaded, run)
+    assert (loaded['algorithm'], loaded['start'], loaded['end_points']) == ('Bidirectional A*', start, [end])
+    # Nodes of the search from the end point are painted in their own color
+    assert set(painted_nodes(loaded)[1].tolist()) == {4, 5, 8}
+
+
+@pytest.mark.parametrize('path', sorted(glob.glob(os.path.join(FIXTURES, '*.run'))), ids=os.path.basename)
+def test_runs_match_fixtures(path):
+    # Fixtures are recorded with "python -m benchmark -b Small --seeds 0 --densities 0.2 -r 1 --record tests/fixtures"
+    board_class, seed, density, algorithm = os.path.basename(path)[:-len('.run')].split('-')
+    assert board_class == 'Small'
+    board, start, end = make_board(23, 33, int(seed), None if density == 'maze' else float(density))
+
+    recording = read_run(path)
+    run = solver_run(board, Solver().solve(board, algorithm, start, end))
+    assert runs_match(recording, run)
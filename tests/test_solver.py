@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from board_saving import BoardSaver
+import solver
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def saved_boards(tmp_path, monkeypatch):
+    # Boards are saved under ./saved_boards, so every test gets its own working directory
+    monkeypatch.chdir(tmp_path)
+    board = np.zeros((9, 7), dtype=np.uint8)
+    board[4, :6] = 1
+    board_saver = BoardSaver('small')
+    board_saver.save_board('open', np.zeros((5, 5), dtype=np.uint8), (0, 0), (4, 4))
+    board_saver.save_board('wall', board, (0, 0), (8, 6))
+
+    return tmp_path
+
+
+def read_jsonl(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_solver_does_not_import_pyside():
+    code = 'import sys, solver; sys.exit("PySide6" in sys.modules)'
+    assert subprocess.run([sys.executable, '-c', code], cwd=ROOT).returncode == 0
+
+
+def test_jsonl_output(saved_boards):
+    assert solver.main(['-s', 'small', '-a', 'astar', '-o', 'results.jsonl']) == 0
+
+    lines = {line['board']: line for line in read_jsonl('results.jsonl')}
+    assert sorted(lines) == ['open', 'wall']
+    for name, rows in [('open', 5), ('wall', 7)]:
+        line = lines[name]
+        assert line['algorithm'] == 'astar'
+        # Points come from the board header, the path runs between them as flat board indices
+        assert line['path'][0] == line['start'][0] * rows + line['start'][1]
+        assert line['path'][-1] == line['end'][0] * rows + line['end'][1]
+        assert line['visited'][0] == line['start']
+        assert line['metrics']['path_length'] == len(line['path'])
+    assert len(lines['open']['path']) == 9
+
+
+def test_npz_output(saved_boards):
+    assert solver.main(['-s', 'small', 'wall', '-a', 'dijkstra', '-f', 'npz', '-o', 'results.npz']) == 0
+
+    arrays = np.load('results.npz')
+    assert arrays['wall/endpoints'].tolist() == [[0, 0], [8, 6]]
+    assert arrays['wall/visited'].shape[1] == 2
+    assert arrays['wall/path'][0] == 0 and arrays['wall/path'][-1] == 8 * 7 + 6
+
+
+def test_failed_boards_get_error_lines(saved_boards):
+    # A missing board and a board without a path don't stop the others
+    assert solver.main(['-s', 'small', 'wall', 'missing', '-a', 'astar', '--end', '4,0', '-o', 'results.jsonl']) == 1
+    lines = read_jsonl('results.jsonl')
+    assert [line['board'] for line in lines] == ['wall', 'missing']
+    assert all('error' in line for line in lines)
+
+    assert solver.main(['-s', 'small', 'missing', 'open', '-o', 'results.jsonl']) == 1
+    lines = read_jsonl('results.jsonl')
+    assert 'error' in lines[0] and 'path' in lines[1]
+
+
+def test_board_sizes():
+    assert solver.parse_board_size('large') == 'Large'
+    assert solver.parse_board_size('201X301') == '201x301'
+    with pytest.raises(argparse.ArgumentTypeError):
+        solver.parse_board_size('huge')
+
+
+def test_custom_board_size(tmp_path, monkeypatch):
+    # Boards of custom sizes are saved under their ROWSxCOLS name
+    monkeypatch.chdir(tmp_path)
+    BoardSaver('7x9').save_board('custom', np.zeros((9, 7), dtype=np.uint8), (0, 0), (8, 6))
+
+    assert solver.main(['-s', '7x9', '-o', 'results.jsonl']) == 0
+    assert read_jsonl('results.jsonl')[0]['metrics']['path_length'] == 15
+
+
+def test_solving_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert solver.main(['-s', 'small', '-o', 'results.jsonl']) == 0
+    assert read_jsonl('results.jsonl') == [] and os.listdir(tmp_path) == ['results.jsonl']
+
+
+def test_corrupted_boards_get_error_lines(saved_boards):
+    with open('saved_boards/small/broken.board', 'wb') as file:
+        file.write(b'broken')
+
+    assert solver.main(['-s', 'small', '-o', 'results.jsonl']) == 1
+    lines = {line['board']: line for line in read_jsonl('results.jsonl')}
+    assert sorted(lines) == ['broken', 'open', 'wall'] and 'error' in lines['broken']